@@ -3,21 +3,49 @@ import os
 import json
 from datetime import datetime
 import asyncio
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+# Start of the worker's import phase (see startup_timings)
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.auth.auth_handler import get_current_user
 from app.models import meeting as meeting_model
-from app.models.meeting_participant import MeetingParticipant
-from app.models.transcript import Transcript
-from app.services.vosk_service import vosk_transcriber, get_vosk_transcriber
+from app.services.async_decoder import get_async_decoder, async_decoder
+from app.services.batch_transcriber import shutdown_batch_transcribers
+from app.services.transcription_jobs import transcription_jobs
+from app.services.search_index import search_index
+from app.services.summarizer import summary_engine
+from app.services.topic_stream import topic_streams
+from app.services.broadcaster import meeting_connections, subscribe, unsubscribe, serialize_payload, audio_sockets
+from app.services.pubsub import broadcast_backend
+from app.services.partial_policy import get_partial_policy, PartialThrottle
+from app.services.vad import VadGate, VAD_ENABLED, SEGMENT_END, SampleTimeline
+from app.services.transcript_writer import transcript_writer
+from app.services.recording_writer import recording_manager
+from app.services.chunk_buffer import ChunkCoalescer
+from app.services.caption_codec import negotiate_format, FORMAT_BINARY
+from app.services.audio_codecs import AudioDecoder
+from app.services.resampler import StreamingResampler
+from app.services.admission import admission_controller, AdmissionRejected, process_rss_bytes
+from app.services.meeting_events import (
+    meeting_events, MessageSource, wait_for_transcription,
+    MEETING_STARTED, MEETING_ENDED, TRANSCRIPTION_STARTED, TRANSCRIPTION_STOPPED
+)
+from app.services.session_resume import resume_registry, ReplayBuffer
 
 # Import routers
 from app.routers import meeting as meeting_router
 from app.routers import transcript as transcript_router
+from app.routers import search as search_router
 
 app = FastAPI(title="Meeting Transcription API")
 
@@ -36,20 +64,448 @@ app.include_router(meeting_router.router, prefix="/meetings", tags=["meetings"])
 app.include_router(meeting_router.router, prefix="/api/meetings", tags=["meetings"])
 # Transcripts under /api to match earlier usage (/api/meetings/{id}/transcripts)
 app.include_router(transcript_router.router, prefix="/api", tags=["transcripts"])
+app.include_router(search_router.router, prefix="/api", tags=["search"])
 
 # Websocket connection storage
-meeting_connections = {}  # meeting_id -> list[WebSocket]
+# meeting_connections (meeting_id -> MeetingFanout) lives in app.services.broadcaster
 active_sessions = {}  # session_id -> metadata (recognizer, meeting_id, ...)
 
 
+def meeting_time_offset(meeting) -> float:
+    """Seconds between the meeting's actual start and now (0 if it has not been started)."""
+    if not meeting.actual_start:
+        return 0.0
+    try:
+        return max(0.0, (datetime.utcnow() - meeting.actual_start.replace(tzinfo=None)).total_seconds())
+    except Exception:
+        return 0.0
+
+
 async def broadcast_transcription(meeting_id: int, payload: dict):
-    conns = meeting_connections.get(meeting_id, []).copy()
-    for ws in conns:
+    # Local subscribers first (serialized once, queued per subscriber); with a broker
+    # backend the payload is also batched out to the other workers of the meeting
+    await broadcast_backend.publish(meeting_id, payload)
+
+
+def transcript_row(session: dict, text: str, result: dict) -> dict:
+    """
+    Build a Transcript row for a final result. Vosk word times count only the
+    samples actually decoded, so they are mapped back onto the received stream
+    (VAD gaps) and shifted to seconds since the meeting start.
+    """
+    timeline = session["timeline"]
+    offset = session["time_offset"]
+    words = [
+        {**w, "start": round(offset + timeline.to_stream_seconds(w.get("start", 0)), 3),
+         "end": round(offset + timeline.to_stream_seconds(w.get("end", 0)), 3)}
+        for w in result.get("result", [])
+    ]
+    if words:
+        start_time, end_time = words[0]["start"], words[-1]["end"]
+        confidence = sum(w.get("conf", 0) for w in words) / len(words)
+        timeline.prune(result["result"][-1].get("end", 0))
+    else:
+        start_time = end_time = round(offset + timeline.stream_seconds(), 3)
+        confidence = 0.0
+    user_id = session["user_id"]
+    return {
+        "meeting_id": session["meeting_id"],
+        "text": text,
+        "speaker": str(user_id) if user_id is not None else None,
+        "start_time": start_time,
+        "end_time": end_time,
+        "duration": round(end_time - start_time, 3),
+        "confidence": confidence,
+        "language": session["language"],
+        "is_final": True,
+        "raw_data": {"words": words, "session_id": session["session_id"], "user_id": user_id},
+    }
+
+
+async def process_segment(session: dict, audio: Optional[bytes], stream_start: Optional[int] = None):
+    """
+    Decode one audio segment and broadcast the resulting caption.
+    audio=None flushes the recognizer (speech end detected by the VAD).
+    stream_start is the segment's first sample in the received stream (model rate).
+    """
+    decoder_session = session["decoder"]
+    throttle = session["partials"]
+    if audio is None:
+        result = await decoder_session.final_result()
+        text, is_final, want_partial = result.get("text", ""), True, False
+        if not text:
+            throttle.reset()
+            return
+    else:
+        # Decoding runs on the executor; the loop only awaits the result.
+        # PartialResult() is only computed when the throttle would emit it.
+        want_partial = throttle.due()
+        session["timeline"].feed(len(audio) // 2, stream_start)
+        started = time.perf_counter()
+        text, is_final, result = await decoder_session.accept(audio, want_partial)
+        # Measured real-time factor (executor queueing included) drives admission
+        admission_controller.record_decode(
+            session.get("admission"), len(audio) / 2 / session["timeline"].sample_rate, time.perf_counter() - started
+        )
+
+    if is_final:
+        throttle.reset()
+        payload = {
+            "type": "transcription",
+            "text": text,
+            "final": True,
+            "timestamp": datetime.utcnow().isoformat(),
+            "user_id": session["user_id"],
+            "meeting_id": session["meeting_id"],
+            "words": result.get("result", [])
+        }
+        await broadcast_transcription(session["meeting_id"], payload)
+        # Persisted in batches by the write-behind buffer, off the hot path
+        if text:
+            row = transcript_row(session, text, result)
+            transcript_writer.add(row)
+            summary_engine.add(row)
+            topic_streams.add(row)
+    elif want_partial:
+        fields = throttle.partial_fields(text)
+        if fields:
+            payload = {
+                "type": "transcription",
+                "final": False,
+                "timestamp": datetime.utcnow().isoformat(),
+                "user_id": session["user_id"],
+                "meeting_id": session["meeting_id"],
+                "is_partial": True,
+                **fields
+            }
+            await broadcast_transcription(session["meeting_id"], payload)
+
+
+async def process_frame(session: dict, frame: bytes):
+    """Run a coalesced PCM frame through the VAD gate, then decode the speech segments."""
+    vad = session.get("vad")
+    if vad is None:
+        await process_segment(session, frame)
+        return
+    for kind, segment, stream_start in vad.process(frame):
+        await process_segment(session, None if kind == SEGMENT_END else segment, stream_start)
+
+
+async def process_audio(session: dict, audio_data: bytes):
+    """
+    Decode the wire encoding, downmix/resample to the model rate and buffer the PCM;
+    decode only once a full frame is available.
+    """
+    pcm = session["audio_decoder"].decode(audio_data)
+    pcm = session["resampler"].process(pcm)
+    if session.get("recording") is not None:
+        # Tee into the meeting recording; disk I/O happens on the writer thread
+        recording_manager.write(session["recording"], pcm)
+    for frame in session["coalescer"].push(pcm):
+        await process_frame(session, frame)
+
+
+async def flush_pending_audio(session: dict):
+    """Decode whatever is buffered (max-latency timer or end of stream)."""
+    frame = session["coalescer"].flush()
+    if frame:
+        await process_frame(session, frame)
+
+
+def session_stats(session: dict) -> dict:
+    vad = session.get("vad")
+    throttle = session["partials"]
+    ticket = session.get("admission")
+    return {
+        "ingest": session["audio_decoder"].stats(),
+        "coalescing": session["coalescer"].stats(),
+        "vad": vad.stats() if vad else None,
+        "partials_emitted": throttle.emitted,
+        "partials_skipped": throttle.skipped,
+        "rtf": round(ticket.rtf, 3) if ticket is not None and ticket.rtf is not None else None,
+    }
+
+
+async def handle_control(session: dict, ctrl: dict):
+    """Control messages sent as text frames by the speaker's client."""
+    if ctrl.get("command") == "stats":
+        await session["ws"].send_json({"type": "stats", "session_id": session["session_id"], **session_stats(session)})
+
+
+def ready_message(session: dict, **extra) -> dict:
+    audio_decoder = session["audio_decoder"]
+    coalescer = session["coalescer"]
+    return {
+        "type": "status",
+        "status": "ready",
+        "message": "Vosk prêt",
+        "session_id": session["session_id"],
+        "caption_format": session["caption_format"],
+        "encoding": audio_decoder.encoding,
+        "partials": session["partials"].policy.to_dict(),
+        # Clients should send chunks of this size: fewer, larger decode calls
+        "preferred_chunk_bytes": audio_decoder.encoded_size(
+            session["resampler"].input_bytes_for(coalescer.frame_bytes)
+        ),
+        "model_sample_rate": session["timeline"].sample_rate,
+        "preferred_chunk_ms": coalescer.frame_ms,
+        # Reconnect with this token within the grace period to carry on mid-utterance
+        "resume_token": session.get("resume_token"),
+        "resume_grace_seconds": resume_registry.grace_seconds if resume_registry.enabled else 0,
+        **extra
+    }
+
+
+async def open_live_session(websocket: WebSocket, meeting, stream: dict) -> Optional[dict]:
+    """Admission and recognizer setup. Returns None if the speaker was refused."""
+    meeting_id = meeting.id
+    user_id = stream["user_id"]
+    decoder_session = None
+
+    # Admission: wait for (or be refused) a recognizer slot before allocating one
+    async def notify_queued(reason, position):
+        await websocket.send_json({
+            "type": "status",
+            "status": "queued",
+            "reason": reason,
+            "position": position,
+            "message": "Serveur de transcription chargé, en attente d'une place",
+            "meeting_id": meeting_id,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+
+    try:
+        ticket = await admission_controller.acquire(meeting_id, notify_queued)
+    except AdmissionRejected as e:
+        await websocket.send_json({
+            "type": "status",
+            "status": "rejected",
+            "reason": e.reason,
+            "message": e.message,
+            "retry_after": e.retry_after,
+            "meeting_id": meeting_id,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        # 1013: try again later
+        await websocket.close(code=1013)
+        return None
+
+    # Initialize recognizer (off the event loop)
+    try:
+        decoder = get_async_decoder()
+        partial_policy = get_partial_policy(meeting)
+        rss_before = process_rss_bytes()
+        # Model picked from the meeting language (loaded on demand); recognizers
+        # always run at that model's native rate
+        decoder_session = await decoder.open_session(None, partial_policy.partial_words, meeting.language)
+        if decoder_session.recognizer is not None and not decoder_session.model_loaded:
+            # In-process recognizer: its footprint shows up in our RSS
+            admission_controller.record_recognizer_memory(process_rss_bytes() - rss_before)
+        model_rate = decoder_session.sample_rate
+        resampler = StreamingResampler(stream["sample_rate"], model_rate, stream["channels"])
+        throttle = PartialThrottle(partial_policy)
+    except Exception as e:
+        if decoder_session is not None:
+            decoder_session.close()
+        admission_controller.release(ticket)
+        await websocket.send_json({"type": "error", "message": f"Vosk non disponible: {str(e)}"})
+        return None
+
+    # Register connection; a slow caption reader on this socket must not end its audio
+    subscribe(meeting_id, websocket, stream["caption_format"])
+    audio_sockets.add(websocket)
+
+    # Prepare session id
+    session_id = f"{meeting_id}_{user_id or 'anonymous'}_{int(datetime.utcnow().timestamp()*1000)}"
+    session = active_sessions[session_id] = {
+        "recognizer": decoder_session.recognizer,
+        "decoder": decoder_session,
+        "partials": throttle,
+        "admission": ticket,
+        "audio_decoder": stream["audio_decoder"],
+        "resampler": resampler,
+        "vad": VadGate(model_rate) if VAD_ENABLED else None,
+        "coalescer": ChunkCoalescer(model_rate),
+        "timeline": SampleTimeline(model_rate),
+        # Transcript times are seconds since the meeting actually started
+        "time_offset": meeting_time_offset(meeting),
+        "language": meeting.language or "fr",
+        "meeting_id": meeting_id,
+        "user_id": user_id,
+        "ws": websocket,
+        "caption_format": stream["caption_format"],
+        "session_id": session_id,
+        "resume_token": resume_registry.new_token() if resume_registry.enabled else None,
+        "start_time": datetime.utcnow()
+    }
+    if meeting.record_audio:
+        session["recording"] = recording_manager.open_track(meeting_id, session_id, model_rate)
+
+    await websocket.send_json(ready_message(session))
+    return session
+
+
+async def resume_live_session(websocket: WebSocket, meeting_id, stream: dict, token: str) -> Optional[dict]:
+    """
+    Reattach a parked session to a new socket: captions buffered during the outage
+    are replayed first, then the subscriber's queue carries on on the new socket.
+    The encoding, sample rate and channels of the new init replace the parked ones.
+    """
+    session = resume_registry.claim(token, meeting_id, stream["user_id"])
+    if session is None:
+        return None
+    # The client may reconnect with other audio parameters: rebuild the ingest chain
+    resampler = session["resampler"]
+    if (resampler.in_rate, resampler.channels) != (stream["sample_rate"], stream["channels"]):
         try:
-            await ws.send_json(payload)
-        except Exception:
-            # ignore broken connections
-            pass
+            session["resampler"] = StreamingResampler(stream["sample_rate"], resampler.out_rate, stream["channels"])
+        except ValueError:
+            # Invalid parameters: end the parked session, a fresh one reports the error
+            await finish_live_session(session)
+            return None
+    if session["audio_decoder"].encoding != stream["audio_decoder"].encoding:
+        session["audio_decoder"] = stream["audio_decoder"]
+    old_format = session["caption_format"]
+    session["ws"] = websocket
+    audio_sockets.add(websocket)
+    session["caption_format"] = stream["caption_format"]
+    session["resume_token"] = resume_registry.new_token()
+
+    replay = session.pop("replay", None)
+    fanout = meeting_connections.get(meeting_id)
+    if replay is not None and fanout is not None and old_format == stream["caption_format"]:
+        if old_format == FORMAT_BINARY:
+            # Full interning table first: the client may have lost its copy
+            await websocket.send_text(serialize_payload(fanout.codec.dictionary()))
+        while replay.messages:
+            data = replay.messages.popleft()
+            if isinstance(data, bytes):
+                await websocket.send_bytes(data)
+            else:
+                await websocket.send_text(data)
+        # No await since the last check: nothing can slip into the buffer now
+        fanout.replace(replay, websocket)
+    else:
+        if replay is not None:
+            unsubscribe(meeting_id, replay)
+        subscribe(meeting_id, websocket, stream["caption_format"])
+
+    await websocket.send_json(ready_message(session, resumed=True, resumed_after=session.get("resumed_after")))
+    return session
+
+
+async def serve_live_session(websocket: WebSocket, session: dict, source: MessageSource):
+    """
+    Receive loop of a live session. Returns the lifecycle event that stopped it,
+    or None if the client disconnected.
+    """
+    while True:
+        # Wake up for the coalescer's max-latency deadline if audio is pending
+        kind, msg = await source.next(session["coalescer"].timeout())
+        if kind == "timeout":
+            try:
+                await flush_pending_audio(session)
+            except Exception as e:
+                await websocket.send_json({"type": "error", "message": f"Erreur transcription: {str(e)}"})
+            continue
+        if kind == "event":
+            if msg.event in (TRANSCRIPTION_STOPPED, MEETING_ENDED):
+                return msg
+            continue
+        if msg["type"] == "websocket.disconnect":
+            return None
+        if msg["type"] == "websocket.receive":
+            # binary payload (websocket.receive returns bytes in 'bytes' field when binary)
+            if msg.get("bytes") is not None:
+                audio_data = msg["bytes"]
+            elif "text" in msg:
+                # client may send control messages
+                try:
+                    ctrl = json.loads(msg["text"])
+                except Exception:
+                    continue
+                await handle_control(session, ctrl)
+                continue
+            else:
+                continue
+
+            try:
+                await process_audio(session, audio_data)
+            except Exception as e:
+                await websocket.send_json({"type": "error", "message": f"Erreur transcription: {str(e)}"})
+                # continue processing further chunks
+
+
+def close_live_session(session: dict):
+    """Release everything a live session holds (recording, recognizer, admission slot)."""
+    active_sessions.pop(session["session_id"], None)
+    audio_sockets.discard(session.get("ws"))
+    replay = session.pop("replay", None)
+    if replay is not None:
+        unsubscribe(session["meeting_id"], replay)
+    recording = session.pop("recording", None)
+    if recording is not None:
+        recording_manager.close_track(recording)
+    session["decoder"].close()
+    admission_controller.release(session.get("admission"))
+
+
+async def finish_live_session(session: dict):
+    """Flush buffered audio and the utterance in progress, then close the session."""
+    try:
+        await flush_pending_audio(session)
+        await process_segment(session, None)
+    except Exception:
+        pass
+    finally:
+        close_live_session(session)
+
+
+def park_live_session(session: dict):
+    """
+    The socket dropped: keep the recognizer and the utterance in progress for the
+    grace period. The meeting subscriber keeps draining into a replay buffer.
+    """
+    websocket = session["ws"]
+    audio_sockets.discard(websocket)
+    replay = ReplayBuffer()
+    fanout = meeting_connections.get(session["meeting_id"])
+    if fanout is None or not fanout.replace(websocket, replay):
+        # Already evicted by a failed send: subscribe the buffer afresh
+        subscribe(session["meeting_id"], replay, session["caption_format"])
+    session["replay"] = replay
+    session["ws"] = None
+    resume_registry.park(session, finish_live_session)
+
+
+async def run_live_session(websocket: WebSocket, meeting, stream: dict, source: MessageSource, resume_token: Optional[str] = None):
+    """
+    Run one transcription session for a connected speaker, resuming a parked one when
+    the token is still valid. Returns the lifecycle event that stopped it, or None if
+    the client disconnected (or was refused).
+    """
+    session = None
+    if resume_token:
+        session = await resume_live_session(websocket, meeting.id, stream, resume_token)
+    if session is None:
+        session = await open_live_session(websocket, meeting, stream)
+        if session is None:
+            return None
+
+    try:
+        stopped_by = await serve_live_session(websocket, session, source)
+    except WebSocketDisconnect:
+        stopped_by = None
+    except BaseException:
+        close_live_session(session)
+        raise
+
+    if stopped_by is None and resume_registry.enabled:
+        park_live_session(session)
+        return None
+    # Flush the utterance still in progress when the speaker leaves or transcription stops
+    await finish_live_session(session)
+    return stopped_by
 
 
 @app.websocket("/ws/transcribe")
@@ -58,14 +514,21 @@ async def websocket_transcribe(websocket: WebSocket):
     WebSocket endpoint for realtime transcription.
     Protocol (from client):
       - Send an "init" JSON message with { command: "init", meeting_id, sample_rate, user_id (opt) }
-      - Then send binary PCM chunks (s16le) matching sample_rate and channels=1
+      - Then send binary PCM chunks (s16le) matching sample_rate and channels (opt, default 1)
+        Audio is downmixed and resampled server-side to the model's native rate.
+    Optional init field caption_format: "json" (default) or "binary" (see app.services.caption_codec)
+    Optional init field encoding: "pcm_s16le" (default), "mulaw", "alaw" or "ima_adpcm"
+    (one self-contained IMA block per binary message, see app.services.audio_codecs)
+    While transcription is inactive the socket stays open; it is upgraded in place
+    (a new "ready" status) when the owner starts transcription, and parked again when it stops.
+    Optional init field resume_token: carry on a session whose socket dropped less than
+    RESUME_GRACE_SECONDS ago (same recognizer, buffered captions replayed first).
     """
     await websocket.accept()
     db: Session = None
     meeting_id = None
-    session_id = None
-    user_id = None
-    recognizer = None
+    watch = None
+    source = None
 
     try:
         # receive init
@@ -78,8 +541,23 @@ async def websocket_transcribe(websocket: WebSocket):
             return
 
         meeting_id = init.get("meeting_id")
-        sample_rate = int(init.get("sample_rate", 16000))
-        user_id = init.get("user_id")
+        # Optional: token from a previous "ready" status, to resume a dropped session
+        resume_token = init.get("resume_token")
+        # Optional compact binary captions; JSON stays the default
+        caption_format = negotiate_format(init.get("caption_format"))
+        stream = {
+            "sample_rate": int(init.get("sample_rate", 16000)),
+            "channels": int(init.get("channels", 1)),
+            "user_id": init.get("user_id"),
+            "caption_format": caption_format,
+        }
+        # Optional compressed ingest (mulaw, alaw, ima_adpcm); raw s16le by default
+        try:
+            stream["audio_decoder"] = AudioDecoder(init.get("encoding"))
+        except ValueError as e:
+            await websocket.send_json({"type": "error", "message": str(e)})
+            await websocket.close()
+            return
 
         # Vérifier si la transcription est active pour cette réunion
         try:
@@ -96,110 +574,36 @@ async def websocket_transcribe(websocket: WebSocket):
                 })
                 return
 
-            if not meeting.transcription_active:
-                # Inform client: don't send audio, wait for owner to start transcription
-                await websocket.send_json({
-                    "action": "transcription_inactive",
-                    "type": "status",
-                    "message": "En attente du démarrage de la transcription par l'organisateur",
-                    "meeting_id": meeting_id,
-                    "requires_microphone": False,
-                    "timestamp": datetime.utcnow().isoformat()
-                })
-                # keep socket open so client can get notification when transcription starts
-                meeting_connections.setdefault(meeting_id, []).append(websocket)
-                # Wait for messages but ignore binary until transcription starts
-                while True:
-                    msg = await websocket.receive()
-                    if msg is None:
-                        break
-                    if msg.get("type") == "websocket.disconnect":
-                        break
-                return
-
-            # If transcription is active: initialize recognizer
-            try:
-                vt = get_vosk_transcriber()
-                recognizer = vt.create_recognizer(sample_rate)
-            except Exception as e:
-                await websocket.send_json({"type": "error", "message": f"Vosk non disponible: {str(e)}"})
-                return
-
-            # Register connection
-            meeting_connections.setdefault(meeting_id, []).append(websocket)
-
-            # Prepare session id
-            session_id = f"{meeting_id}_{user_id or 'anonymous'}_{int(datetime.utcnow().timestamp()*1000)}"
-            active_sessions[session_id] = {
-                "recognizer": recognizer,
-                "meeting_id": meeting_id,
-                "user_id": user_id,
-                "ws": websocket,
-                "start_time": datetime.utcnow()
-            }
-
-            await websocket.send_json({
-                "type": "status",
-                "status": "ready",
-                "message": "Vosk prêt",
-                "session_id": session_id
-            })
-
-            # Loop to receive binary audio chunks
+            # Lifecycle events (transcription started/stopped, meeting ended) for this socket
+            watch = meeting_events.watch(meeting_id)
+            source = MessageSource(websocket, watch)
             while True:
-                msg = await websocket.receive()
-                if msg["type"] == "websocket.disconnect":
-                    break
-                if msg["type"] == "websocket.receive":
-                    # binary payload (websocket.receive returns bytes in 'bytes' field when binary)
-                    if "bytes" in msg:
-                        audio_data = msg["bytes"]
-                    elif "text" in msg:
-                        # client may send control messages
-                        try:
-                            ctrl = json.loads(msg["text"])
-                            # ignore or handle control messages
-                            continue
-                        except Exception:
-                            continue
-                    else:
-                        continue
-
-                    if not recognizer:
-                        await websocket.send_json({"type": "error", "message": "Reconnaisseur non initialisé"})
+                if not meeting.transcription_active:
+                    # Inform client: don't send audio, wait for owner to start transcription
+                    await websocket.send_json({
+                        "action": "transcription_inactive",
+                        "type": "status",
+                        "message": "En attente du démarrage de la transcription par l'organisateur",
+                        "meeting_id": meeting_id,
+                        "requires_microphone": False,
+                        "caption_format": caption_format,
+                        "timestamp": datetime.utcnow().isoformat()
+                    })
+                    # Listeners keep receiving captions while parked
+                    subscribe(meeting_id, websocket, caption_format)
+                    if not await wait_for_transcription(source):
+                        break
+                    # Upgrade in place: same socket, fresh meeting state
+                    db.refresh(meeting)
+                    if not meeting.transcription_active:
                         continue
 
-                    try:
-                        if recognizer.AcceptWaveform(audio_data):
-                            result = json.loads(recognizer.Result())
-                            text = result.get("text", "")
-                            payload = {
-                                "type": "transcription",
-                                "text": text,
-                                "final": True,
-                                "timestamp": datetime.utcnow().isoformat(),
-                                "user_id": user_id,
-                                "meeting_id": meeting_id,
-                                "words": result.get("result", [])
-                            }
-                            await broadcast_transcription(meeting_id, payload)
-                        else:
-                            partial_result = json.loads(recognizer.PartialResult())
-                            partial_text = partial_result.get("partial", "")
-                            if partial_text:
-                                payload = {
-                                    "type": "transcription",
-                                    "text": partial_text,
-                                    "final": False,
-                                    "timestamp": datetime.utcnow().isoformat(),
-                                    "user_id": user_id,
-                                    "meeting_id": meeting_id,
-                                    "is_partial": True
-                                }
-                                await broadcast_transcription(meeting_id, payload)
-                    except Exception as e:
-                        await websocket.send_json({"type": "error", "message": f"Erreur transcription: {str(e)}"})
-                        # continue processing further chunks
+                stopped_by = await run_live_session(websocket, meeting, stream, source, resume_token)
+                # A token only resumes the first session of this connection
+                resume_token = None
+                if stopped_by is None or stopped_by.event == MEETING_ENDED:
+                    break
+                db.refresh(meeting)
 
         except WebSocketDisconnect:
             pass
@@ -207,17 +611,13 @@ async def websocket_transcribe(websocket: WebSocket):
         print(f"❌ Erreur WebSocket: {e}")
     finally:
         # Cleanup
-        if meeting_id is not None and websocket in meeting_connections.get(meeting_id, []):
-            try:
-                meeting_connections[meeting_id].remove(websocket)
-                if not meeting_connections[meeting_id]:
-                    del meeting_connections[meeting_id]
-            except Exception:
-                pass
-
-        if session_id and session_id in active_sessions:
+        if source is not None:
+            source.close()
+        if watch is not None:
+            watch.close()
+        if meeting_id is not None:
             try:
-                del active_sessions[session_id]
+                unsubscribe(meeting_id, websocket)
             except Exception:
                 pass
 
@@ -228,52 +628,186 @@ async def websocket_transcribe(websocket: WebSocket):
             pass
 
 
+# ----------------- Startup / health -----------------
+# Startup breakdown (seconds) reported by /readyz; the model loads in the background
+startup_timings = {}
+
+
+@contextmanager
+def startup_step(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings[name] = round(time.perf_counter() - started, 3)
+
+
+@app.on_event("startup")
+def start_decoder():
+    # Non-blocking: the model loads on a background thread (thread mode) or in the
+    # ASR workers (process mode); recognizers are pre-warmed once it is ready
+    with startup_step("decoder_start_s"):
+        async_decoder.start()
+    # Load the meeting's language model as soon as it starts, before the first speaker
+    for event in (MEETING_STARTED, TRANSCRIPTION_STARTED):
+        meeting_events.on(event, lambda e: async_decoder.preload(e.data.get("language")))
+
+
+@app.on_event("startup")
+async def start_transcript_writer():
+    with startup_step("transcript_writer_start_s"):
+        transcript_writer.start()
+
+
+@app.on_event("shutdown")
+async def finish_parked_sessions():
+    # Finals of sessions waiting for a reconnect, before the writer and broadcaster stop
+    await resume_registry.expire_all()
+
+
+@app.on_event("startup")
+async def start_broadcast_backend():
+    with startup_step("broadcast_backend_start_s"):
+        await broadcast_backend.start()
+    # Routers publish lifecycle events from the threadpool; delivery happens on this loop
+    meeting_events.bind_loop(asyncio.get_running_loop())
+
+
+@app.on_event("shutdown")
+async def stop_broadcast_backend():
+    await broadcast_backend.stop()
+
+
+@app.on_event("shutdown")
+async def stop_transcript_writer():
+    # Write the finals still buffered before the worker exits
+    await transcript_writer.stop()
+
+
+@app.on_event("startup")
+def start_transcription_jobs():
+    # Uploaded recordings; TRANSCRIPTION_JOB_WORKERS=0 leaves them to a dedicated worker
+    with startup_step("transcription_jobs_start_s"):
+        transcription_jobs.start()
+
+
+@app.on_event("startup")
+def start_search_index():
+    # Built from the transcripts table on a background thread, then caught up incrementally
+    search_index.start()
+
+
+@app.on_event("shutdown")
+def stop_search_index():
+    search_index.stop()
+
+
+@app.on_event("shutdown")
+def shutdown_decoder():
+    async_decoder.shutdown()
+    # Unfinished jobs are picked up again once their heartbeat goes stale
+    transcription_jobs.stop(timeout=5)
+    shutdown_batch_transcribers()
+
+
+def check_database() -> Optional[str]:
+    """SELECT 1 on a fresh session; returns the error message, or None if reachable."""
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT 1"))
+        return None
+    except Exception as e:
+        return str(e)
+    finally:
+        db.close()
+
+
+@app.get("/healthz")
+def healthz():
+    # Liveness only: the process answers, whatever the state of the model or the DB
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: speech model loaded and database reachable (503 otherwise)."""
+    decoder_status = async_decoder.status()
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    try:
+        db_error = await asyncio.wait_for(loop.run_in_executor(None, check_database), timeout=2.0)
+    except asyncio.TimeoutError:
+        db_error = "timeout"
+    database = {"ok": db_error is None, "error": db_error, "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+    ready = decoder_status["state"] == "ready" and database["ok"]
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "model": decoder_status, "database": database, "startup": startup_timings},
+    )
+
+
+# ----------------- Session stats -----------------
+@app.get("/api/transcribe/sessions/{session_id}/stats")
+def get_session_stats(session_id: str, current_user=Depends(get_current_user)):
+    session = active_sessions.get(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session non trouvée")
+    return {"session_id": session_id, "meeting_id": session["meeting_id"], **session_stats(session)}
+
+
+@app.get("/api/transcribe/capacity")
+async def get_transcription_capacity(current_user=Depends(get_current_user)):
+    return {
+        **admission_controller.stats(),
+        "resume": resume_registry.stats(),
+        "engine": await async_decoder.engine_stats(),
+    }
+
+
 # ----------------- Test Vosk -----------------
 @app.post("/api/transcribe/test")
 async def transcribe_test():
-    # Use get_vosk_transcriber to check model presence
+    # Same engine as live sessions: decoding runs off the event loop
     try:
-        vt = get_vosk_transcriber()
+        decoder = get_async_decoder()
+        session = await decoder.open_session(16000, False)
     except Exception as e:
         return {"error": f"Modèle Vosk non chargé: {str(e)}"}
 
     try:
-        import wave, tempfile, os
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-            with wave.open(f.name, 'wb') as wav_file:
-                wav_file.setnchannels(1)
-                wav_file.setsampwidth(2)
-                wav_file.setframerate(16000)
-                wav_file.writeframes(b'\x00' * 32000)
-            recognizer = vt.create_recognizer(16000)
-            with wave.open(f.name, 'rb') as wav_file:
-                while True:
-                    data = wav_file.readframes(4000)
-                    if len(data) == 0: break
-                    recognizer.AcceptWaveform(data)
-                result = json.loads(recognizer.FinalResult())
-                text = result.get("text", "Aucune transcription")
-            os.unlink(f.name)
-            return {"success": True, "text": text, "confidence": result.get("confidence", 0), "test": "Fichier de silence transcrit"}
+        # One second of 16 kHz mono silence, fed in 4000-frame chunks
+        silence = b'\x00' * 32000
+        for offset in range(0, len(silence), 8000):
+            await session.accept(silence[offset:offset + 8000], False)
+        result = await session.final_result()
+        text = result.get("text", "Aucune transcription")
+        return {"success": True, "text": text, "confidence": result.get("confidence", 0), "test": "Fichier de silence transcrit"}
     except Exception as e:
         return {"error": f"Erreur test: {str(e)}"}
+    finally:
+        session.close()
 
 
 # ----------------- Root -----------------
 @app.get("/")
 def read_root():
-    status = "Vosk chargé" if vosk_transcriber else "Vosk non chargé"
+    state = async_decoder.status()["state"]
+    status = {"ready": "Vosk chargé", "loading": "Vosk en cours de chargement"}.get(state, "Vosk non chargé")
     return {
         "message": "Meeting Transcription API",
         "status": status,
         "endpoints": {
             "websocket": "/ws/transcribe",
             "test_vosk": "/api/transcribe/test",
+            "readiness": "/readyz",
             "check_transcription_permission": "/api/meetings/{meeting_id}/check-transcription-permission"
         }
     }
 
 
+startup_timings["app_import_s"] = round(time.perf_counter() - _import_started, 3)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 8080)))
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum, JSON
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -35,6 +35,8 @@ class Meeting(Base):
     record_audio = Column(Boolean, default=True)
     record_video = Column(Boolean, default=False)
     max_participants = Column(Integer, default=10)
+    # Politique des partiels posée par l'organisateur (PartialPolicy.to_dict), NULL = défauts
+    caption_settings = Column(JSON, nullable=True)
     
     # Propriétaire
     owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Double, Float, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class Transcript(Base):
     __tablename__ = "transcripts"
+    __table_args__ = (
+        # Lecture paginée par clé (start_time, id) dans une réunion
+        Index("ix_transcripts_meeting_start_id", "meeting_id", "start_time", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -15,10 +19,11 @@ class Transcript(Base):
     text = Column(Text, nullable=False)
     speaker = Column(String(100))  # Spécifiez une longueur
     
-    # Métadonnées temporelles
-    start_time = Column(Float)  # en secondes depuis le début
-    end_time = Column(Float)    # en secondes depuis le début
-    duration = Column(Float)    # durée en secondes
+    # Métadonnées temporelles (DOUBLE : start_time sert de clé au curseur de pagination,
+    # un FLOAT simple précision ne se compare pas exactement à la valeur relue)
+    start_time = Column(Double)  # en secondes depuis le début
+    end_time = Column(Double)    # en secondes depuis le début
+    duration = Column(Double)    # durée en secondes
     
     # Métadonnées de confiance/qualité
     confidence = Column(Float, default=0.0)
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+class TranscriptionJob(Base):
+    __tablename__ = "transcription_jobs"
+    __table_args__ = (
+        # File d'attente : prochain job prêt, par priorité puis ancienneté
+        Index("ix_transcription_jobs_queue", "status", "priority", "available_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Références
+    recording_id = Column(Integer, ForeignKey("audio_recordings.id", ondelete="CASCADE"), nullable=False)
+    meeting_id = Column(Integer, ForeignKey("meetings.id", ondelete="CASCADE"), nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+
+    # Ordonnancement
+    priority = Column(Integer, default=0)        # plus grand = plus prioritaire
+    status = Column(String(20), default="queued")  # queued, running, completed, failed
+    available_at = Column(DateTime(timezone=True), server_default=func.now())  # report après échec
+    offset_seconds = Column(Float, default=0.0)  # début du fichier depuis le début de la réunion
+
+    # Exécution
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    progress = Column(Float, default=0.0)        # 0 à 1
+    worker = Column(String(100))
+    error = Column(Text)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    heartbeat_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+    # Relations
+    recording = relationship("AudioRecording")
+
+    def __repr__(self):
+        return f"<TranscriptionJob(id={self.id}, recording_id={self.recording_id}, status='{self.status}')>"
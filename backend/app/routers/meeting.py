@@ -1,15 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
 from app.database import get_db
 from app.models.meeting import Meeting, MeetingStatus
 from app.models.transcript import Transcript
+from app.models.recording import AudioRecording
+from app.models.transcription_job import TranscriptionJob
+from app.models.summary import MeetingSummary
 from app.models.user import User
 from app.schemas.transcript import TranscriptCreate, Transcript as TranscriptSchema
 from app.auth.auth_handler import get_current_user
 from app.models.meeting_participant import MeetingParticipant, ParticipantRole
+from app.schemas.meeting import CaptionSettings
+from app.services.partial_policy import PartialPolicy, get_partial_policy, set_partial_policy
+from app.services.transcription_jobs import (
+    transcription_jobs, enqueue_recording, store_upload, UploadRejected, UPLOAD_MAX_BYTES
+)
+from app.services.summarizer import summary_engine
+from app.services.meeting_events import (
+    meeting_events, MEETING_STARTED, MEETING_ENDED, TRANSCRIPTION_STARTED, TRANSCRIPTION_STOPPED
+)
 
 router = APIRouter()
 
@@ -74,6 +88,7 @@ def start_meeting(
     meeting.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(meeting)
+    meeting_events.publish(MEETING_STARTED, meeting_id, language=meeting.language)
     return {"message": "Meeting started", "meeting": meeting}
 
 
@@ -93,8 +108,14 @@ def end_meeting(
     meeting.status = MeetingStatus.COMPLETED
     meeting.actual_end = datetime.utcnow()
     meeting.updated_at = datetime.utcnow()
+    meeting.transcription_active = False
+
     db.commit()
     db.refresh(meeting)
+    # Every worker closes the recording tracks it holds and registers them (app.services.recording_writer)
+    meeting_events.publish(MEETING_ENDED, meeting_id)
+    # Extractive summary once the last finals are written
+    summary_engine.schedule(meeting_id)
     return {"message": "Meeting ended", "meeting": meeting}
 
 
@@ -146,6 +167,17 @@ def add_member(
 
 
 # ---------------- Vérification permission transcription ----------------
+def can_control_transcription(db: Session, meeting: Meeting, user: User) -> bool:
+    if meeting.owner_id == user.id:
+        return True
+    participant = db.query(MeetingParticipant).filter(
+        MeetingParticipant.meeting_id == meeting.id,
+        MeetingParticipant.user_id == user.id,
+        MeetingParticipant.can_transcribe == True
+    ).first()
+    return (participant is not None) and meeting.allow_transcriptions
+
+
 @router.get("/{meeting_id}/check-transcription-permission")
 def check_transcription_permission(
     meeting_id: int,
@@ -158,15 +190,7 @@ def check_transcription_permission(
 
     # Autoriser si propriétaire OU si la réunion autorise les transcriptions ET
     # le participant est présent avec can_transcribe True.
-    if meeting.owner_id == current_user.id:
-        can_start = True
-    else:
-        participant = db.query(MeetingParticipant).filter(
-            MeetingParticipant.meeting_id == meeting_id,
-            MeetingParticipant.user_id == current_user.id,
-            MeetingParticipant.can_transcribe == True
-        ).first()
-        can_start = (participant is not None) and meeting.allow_transcriptions
+    can_start = can_control_transcription(db, meeting, current_user)
     return {
         "can_start_transcription": can_start,
         "user_id": current_user.id,
@@ -174,4 +198,238 @@ def check_transcription_permission(
         "meeting_owner_id": meeting.owner_id,
         "is_owner": (meeting.owner_id == current_user.id),
         "message": "Vous pouvez démarrer la transcription" if can_start else "Seul le propriétaire ou un participant autorisé peut démarrer la transcription"
-   }
\ No newline at end of file
+   }
+
+
+# ---------------- Démarrer/Arrêter la transcription ----------------
+def set_transcription_active(meeting_id: int, active: bool, db: Session, user: User) -> Meeting:
+    meeting = db.query(Meeting).filter(Meeting.id == meeting_id).first()
+    if not meeting:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Réunion non trouvée")
+    if not can_control_transcription(db, meeting, user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="Seul le propriétaire ou un participant autorisé peut contrôler la transcription")
+    if active and meeting.status in (MeetingStatus.COMPLETED, MeetingStatus.CANCELLED):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="La réunion est terminée")
+
+    if meeting.transcription_active != active:
+        meeting.transcription_active = active
+        meeting.updated_at = datetime.utcnow()
+        db.commit()
+        db.refresh(meeting)
+        # Les clients en attente sur /ws/transcribe passent en session active sans se reconnecter
+        meeting_events.publish(
+            TRANSCRIPTION_STARTED if active else TRANSCRIPTION_STOPPED, meeting_id,
+            user_id=user.id, language=meeting.language
+        )
+    return meeting
+
+
+@router.post("/{meeting_id}/transcription/start")
+def start_transcription(
+    meeting_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    meeting = set_transcription_active(meeting_id, True, db, current_user)
+    return {"message": "Transcription started", "meeting_id": meeting_id, "transcription_active": meeting.transcription_active}
+
+
+@router.post("/{meeting_id}/transcription/stop")
+def stop_transcription(
+    meeting_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    meeting = set_transcription_active(meeting_id, False, db, current_user)
+    return {"message": "Transcription stopped", "meeting_id": meeting_id, "transcription_active": meeting.transcription_active}
+
+
+# ---------------- Réglages des partiels ----------------
+@router.get("/{meeting_id}/caption-settings")
+def get_caption_settings(
+    meeting_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not user_has_access_to_meeting(db, meeting_id, current_user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'avez pas accès à cette réunion")
+    meeting = db.query(Meeting).filter(Meeting.id == meeting_id).first()
+    return {"meeting_id": meeting_id, "partials": get_partial_policy(meeting).to_dict()}
+
+
+@router.put("/{meeting_id}/caption-settings")
+def update_caption_settings(
+    meeting_id: int,
+    settings: CaptionSettings,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Politique d'émission des partiels (débit, doublons, mode delta, SetPartialWords)."""
+    meeting = db.query(Meeting).filter(
+        Meeting.id == meeting_id,
+        Meeting.owner_id == current_user.id
+    ).first()
+    if not meeting:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meeting not found")
+
+    policy = PartialPolicy(
+        max_rate=settings.max_partial_rate,
+        skip_unchanged=settings.skip_unchanged,
+        mode=settings.partial_mode,
+        partial_words=settings.partial_words,
+        enabled=settings.partials_enabled,
+    )
+    set_partial_policy(meeting, policy)
+    db.commit()
+    # S'applique aux sessions ouvertes après ce changement, sur tous les workers
+    return {"message": "Caption settings updated", "meeting_id": meeting_id, "partials": policy.to_dict()}
+
+
+# ---------------- Résumé ----------------
+@router.get("/{meeting_id}/summary")
+def get_meeting_summary(
+    meeting_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not user_has_access_to_meeting(db, meeting_id, current_user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'avez pas accès à cette réunion")
+    summary = db.query(MeetingSummary).filter(
+        MeetingSummary.meeting_id == meeting_id
+    ).order_by(MeetingSummary.id.desc()).first()
+    if not summary:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Summary not found")
+    return {
+        "meeting_id": meeting_id,
+        "summary_text": summary.summary_text,
+        "key_points": summary.key_points,
+        "action_items": summary.action_items,
+        "total_words": summary.total_words,
+        "total_speakers": summary.total_speakers,
+        "duration": summary.duration,
+        "model_used": summary.model_used,
+        "updated_at": summary.updated_at or summary.created_at
+    }
+
+
+@router.post("/{meeting_id}/summary", status_code=status.HTTP_202_ACCEPTED)
+def refresh_meeting_summary(
+    meeting_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Recalculer le résumé (owner), par exemple après l'import d'un enregistrement."""
+    meeting = db.query(Meeting).filter(
+        Meeting.id == meeting_id,
+        Meeting.owner_id == current_user.id
+    ).first()
+    if not meeting:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meeting not found")
+    summary_engine.schedule(meeting_id, delay=0)
+    return {"message": "Summary refresh scheduled", "meeting_id": meeting_id}
+
+
+# ---------------- Enregistrements importés ----------------
+@router.post("/{meeting_id}/recordings", status_code=status.HTTP_202_ACCEPTED)
+async def upload_recording(
+    meeting_id: int,
+    request: Request,
+    file_name: Optional[str] = Query(None),
+    priority: int = Query(0),
+    offset_seconds: float = Query(0.0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Importer un enregistrement WAV existant (owner OU participant). Le fichier est le
+    corps brut de la requête (audio/wav), écrit sur disque au fil de sa réception ;
+    la transcription passe par la file de jobs, hors du worker qui sert la requête.
+    offset_seconds : début du fichier dans la réunion.
+    """
+    loop = asyncio.get_running_loop()
+    if not await loop.run_in_executor(None, user_has_access_to_meeting, db, meeting_id, current_user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'avez pas accès à cette réunion")
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > UPLOAD_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Fichier trop volumineux (max {UPLOAD_MAX_BYTES // (1024 * 1024)} Mo)"
+        )
+
+    try:
+        path, size, layout = await store_upload(request.stream(), meeting_id, file_name)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    def queue_recording():
+        recording = AudioRecording(
+            meeting_id=meeting_id,
+            file_path=path,
+            file_name=os.path.basename(file_name or path),
+            file_size=size,
+            duration=layout.duration,
+            sample_rate=layout.sample_rate,
+            channels=layout.channels,
+            format="wav",
+            is_processed=False,
+            processing_status="pending"
+        )
+        db.add(recording)
+        db.flush()
+        job = enqueue_recording(db, recording, max(-10, min(10, priority)), current_user.id, max(0.0, offset_seconds))
+        db.commit()
+        return {
+            "message": "Recording queued for transcription",
+            "recording_id": recording.id,
+            "job_id": job.id,
+            "duration": round(layout.duration, 3),
+            "processing_status": recording.processing_status
+        }
+
+    result = await loop.run_in_executor(None, queue_recording)
+    transcription_jobs.notify()
+    return result
+
+
+@router.get("/{meeting_id}/recordings")
+def list_recordings(
+    meeting_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Enregistrements de la réunion et avancement de leur transcription."""
+    if not user_has_access_to_meeting(db, meeting_id, current_user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'avez pas accès à cette réunion")
+
+    recordings = db.query(AudioRecording).filter(
+        AudioRecording.meeting_id == meeting_id
+    ).order_by(AudioRecording.created_at).all()
+    jobs = {}
+    for job in db.query(TranscriptionJob).filter(
+        TranscriptionJob.meeting_id == meeting_id
+    ).order_by(TranscriptionJob.id):
+        jobs[job.recording_id] = job
+
+    return [
+        {
+            "id": r.id,
+            "file_name": r.file_name,
+            "file_size": r.file_size,
+            "duration": r.duration,
+            "processing_status": r.processing_status,
+            "is_processed": r.is_processed,
+            "transcript_id": r.transcript_id,
+            "created_at": r.created_at,
+            "processed_at": r.processed_at,
+            "job": {
+                "id": jobs[r.id].id,
+                "status": jobs[r.id].status,
+                "priority": jobs[r.id].priority,
+                "progress": jobs[r.id].progress,
+                "attempts": jobs[r.id].attempts,
+                "error": jobs[r.id].error,
+            } if r.id in jobs else None
+        }
+        for r in recordings
+    ]
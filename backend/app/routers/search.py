@@ -0,0 +1,80 @@
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import Optional, Set
+
+from app.database import get_db
+from app.models.meeting import Meeting
+from app.models.transcript import Transcript
+from app.models.user import User
+from app.auth.auth_handler import get_current_user
+from app.models.meeting_participant import MeetingParticipant
+from app.routers.transcript import user_has_access_to_meeting
+from app.services.search_index import search_index, hit_matches
+
+router = APIRouter()
+
+
+def accessible_meeting_ids(db: Session, user: User) -> Set[int]:
+    """Réunions dont l'utilisateur est owner OU participant."""
+    owned = db.query(Meeting.id).filter(Meeting.owner_id == user.id)
+    joined = db.query(MeetingParticipant.meeting_id).filter(MeetingParticipant.user_id == user.id)
+    return {meeting_id for (meeting_id,) in owned.union(joined)}
+
+
+@router.get("/search")
+def search_transcripts(
+    q: str = Query(..., min_length=1, max_length=200),
+    meeting_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Rechercher dans ce qui a été dit (réunions accessibles, ou une seule avec meeting_id).
+    Résultats classés (BM25) avec les timestamps des mots trouvés pour aller au bon moment.
+    """
+    started = time.perf_counter()
+    if meeting_id is not None:
+        if not user_has_access_to_meeting(db, meeting_id, current_user):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Vous n'avez pas accès à cette réunion")
+        meeting_ids = {meeting_id}
+    else:
+        meeting_ids = accessible_meeting_ids(db, current_user)
+
+    ranked, total = search_index.search(q, meeting_ids, limit)
+    rows, titles = {}, {}
+    if ranked:
+        rows = {t.id: t for t in db.query(Transcript).filter(Transcript.id.in_([tid for tid, _, _ in ranked]))}
+        titles = dict(db.query(Meeting.id, Meeting.title).filter(Meeting.id.in_({t.meeting_id for t in rows.values()})))
+
+    hits = []
+    for transcript_id, score, offsets in ranked:
+        transcript = rows.get(transcript_id)
+        if transcript is None:
+            # Supprimée depuis l'indexation (autre process)
+            search_index.remove(transcript_id)
+            total -= 1
+            continue
+        matches = hit_matches(transcript.raw_data, transcript.text, offsets)
+        hits.append({
+            "transcript_id": transcript.id,
+            "meeting_id": transcript.meeting_id,
+            "meeting_title": titles.get(transcript.meeting_id),
+            "text": transcript.text,
+            "speaker": transcript.speaker,
+            "score": round(score, 4),
+            "start_time": transcript.start_time,
+            "end_time": transcript.end_time,
+            # Premier mot trouvé : point de lecture
+            "jump_to": next((m["start"] for m in matches if m["start"] is not None), transcript.start_time),
+            "matches": matches,
+        })
+
+    return {
+        "query": q,
+        "total": total,
+        "hits": hits,
+        "index_ready": search_index.ready,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
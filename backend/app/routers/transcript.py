@@ -1,17 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import base64
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Iterator, List, Optional, Tuple
 from datetime import datetime
 
-from app.database import get_db
-from app.models.meeting import Meeting
+from app.database import get_db, SessionLocal
+from app.models.meeting import Meeting, MeetingStatus
 from app.models.transcript import Transcript
 from app.models.user import User
 from app.schemas.transcript import TranscriptCreate, Transcript as TranscriptSchema
 from app.auth.auth_handler import get_current_user
 from app.models.meeting_participant import MeetingParticipant
+from app.services.search_index import search_index
+from app.services import subtitle_export
 
 router = APIRouter()
+
+# Taille maximale d'une page (?limit=)
+MAX_PAGE_SIZE = 1000
+# Lignes lues par aller-retour sur le curseur serveur en mode flux
+STREAM_BATCH_ROWS = 500
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
 def user_has_access_to_meeting(db: Session, meeting_id: int, user: User) -> bool:
     meeting = db.query(Meeting).filter(Meeting.id == meeting_id).first()
     if not meeting:
@@ -50,17 +65,107 @@ def create_transcript(
     db.add(db_transcript)
     db.commit()
     db.refresh(db_transcript)
+    search_index.add(db_transcript.id, meeting_id, db_transcript.text)
 
     return db_transcript
 
 
+def encode_cursor(transcript: Transcript) -> str:
+    """Jeton opaque de la position (start_time, id) après la dernière ligne servie."""
+    raw = json.dumps([transcript.start_time, transcript.id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[Optional[float], int]:
+    try:
+        start_time, transcript_id = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        return (float(start_time) if start_time is not None else None), int(transcript_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Curseur invalide")
+
+
+def transcripts_query(db: Session, meeting_id: int, since_id: Optional[int] = None,
+                      after: Optional[Tuple[Optional[float], int]] = None):
+    """
+    Transcriptions d'une réunion dans l'ordre (start_time, id), servi par l'index
+    ix_transcripts_meeting_start_id. after : position d'un curseur (lignes strictement
+    après). Les start_time NULL passent en premier, comme dans le tri MySQL.
+    since_id : seulement les lignes insérées après celle-ci. Le filtre porte sur l'id
+    (croissant à l'insertion) et non sur start_time : un final écrit en différé ou un
+    enregistrement importé peut commencer avant la dernière ligne déjà vue.
+    """
+    query = db.query(Transcript).filter(Transcript.meeting_id == meeting_id)
+    if since_id is not None:
+        query = query.filter(Transcript.id > since_id)
+    if after is not None:
+        start_time, transcript_id = after
+        if start_time is None:
+            query = query.filter(or_(
+                Transcript.start_time.isnot(None),
+                and_(Transcript.start_time.is_(None), Transcript.id > transcript_id),
+            ))
+        else:
+            query = query.filter(or_(
+                Transcript.start_time > start_time,
+                and_(Transcript.start_time == start_time, Transcript.id > transcript_id),
+            ))
+    return query.order_by(Transcript.start_time, Transcript.id)
+
+
+def iter_transcripts(meeting_id: int, since_id: Optional[int] = None,
+                     after: Optional[Tuple[Optional[float], int]] = None) -> Iterator[Transcript]:
+    """
+    Parcourir les transcriptions avec un curseur côté serveur (lignes lues par lots
+    de STREAM_BATCH_ROWS) : mémoire constante quelle que soit la durée de la réunion.
+    Ouvre sa propre session : la réponse en flux survit à la dépendance get_db.
+    """
+    db = SessionLocal()
+    try:
+        query = transcripts_query(db, meeting_id, since_id, after)
+        for transcript in query.execution_options(stream_results=True).yield_per(STREAM_BATCH_ROWS):
+            yield transcript
+            db.expunge(transcript)
+    finally:
+        db.close()
+
+
+def transcript_json(transcript: Transcript) -> str:
+    return TranscriptSchema.model_validate(transcript).model_dump_json()
+
+
+def stream_json_array(rows: Iterator[Transcript]) -> Iterator[str]:
+    yield "["
+    first = True
+    for transcript in rows:
+        yield transcript_json(transcript) if first else "," + transcript_json(transcript)
+        first = False
+    yield "]"
+
+
+def stream_ndjson(rows: Iterator[Transcript]) -> Iterator[str]:
+    for transcript in rows:
+        yield transcript_json(transcript) + "\n"
+
+
 @router.get("/meetings/{meeting_id}/transcripts", response_model=List[TranscriptSchema])
 def get_meeting_transcripts(
     meeting_id: int,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    since_id: Optional[int] = Query(None, ge=0),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Lire les transcriptions (owner OU participant)"""
+    """
+    Lire les transcriptions (owner OU participant), triées par (start_time, id).
+    - limit : une page ; le curseur de la suivante est dans l'en-tête X-Next-Cursor
+      (absent sur la dernière page), à repasser dans ?cursor=.
+    - since_id : seulement les lignes d'id > since_id, pour le polling ; repasser le plus
+      grand id reçu (aussi dans l'en-tête X-Last-Id d'une page).
+    - format=ndjson : une transcription JSON par ligne.
+    Sans limit, toute la réunion est envoyée en flux depuis un curseur serveur.
+    """
 
     if not user_has_access_to_meeting(db, meeting_id, current_user):
         raise HTTPException(
@@ -68,11 +173,62 @@ def get_meeting_transcripts(
             detail="Vous n'avez pas accès à cette réunion"
         )
 
-    transcripts = db.query(Transcript).filter(
-        Transcript.meeting_id == meeting_id
-    ).order_by(Transcript.start_time).all()
+    after = decode_cursor(cursor) if cursor else None
+    media_type = NDJSON_MEDIA_TYPE if format == "ndjson" else "application/json"
+
+    if limit is None:
+        rows = iter_transcripts(meeting_id, since_id, after)
+        body = stream_ndjson(rows) if format == "ndjson" else stream_json_array(rows)
+        return StreamingResponse(body, media_type=media_type)
+
+    # Page bornée : une ligne de plus pour savoir s'il y a une suite
+    page = transcripts_query(db, meeting_id, since_id, after).limit(limit + 1).all()
+    headers = {}
+    if len(page) > limit:
+        page = page[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(page[-1])
+    if page:
+        headers["X-Last-Id"] = str(max(t.id for t in page))
+    body = stream_ndjson(page) if format == "ndjson" else stream_json_array(page)
+    return Response("".join(body), media_type=media_type, headers=headers)
+
+
+@router.get("/meetings/{meeting_id}/transcripts/export.{fmt}")
+def export_meeting_transcripts(
+    meeting_id: int,
+    fmt: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Exporter la transcription en sous-titres (srt, vtt) ou en texte (txt), en flux
+    depuis un curseur serveur. Les réunions terminées sont servies depuis le cache.
+    """
+    if fmt not in subtitle_export.RENDERERS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Format inconnu (srt, vtt, txt)")
+    if not user_has_access_to_meeting(db, meeting_id, current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Vous n'avez pas accès à cette réunion"
+        )
+
+    meeting = db.query(Meeting).filter(Meeting.id == meeting_id).first()
+    media_type = f"{subtitle_export.MEDIA_TYPES[fmt]}; charset=utf-8"
+    file_name = f"meeting_{meeting_id}.{fmt}"
+    headers = {"Content-Disposition": f'attachment; filename="{file_name}"'}
+    body = subtitle_export.RENDERERS[fmt](iter_transcripts(meeting_id))
+
+    if meeting.status == MeetingStatus.COMPLETED:
+        count, last_id = db.query(func.count(Transcript.id), func.max(Transcript.id)).filter(
+            Transcript.meeting_id == meeting_id
+        ).one()
+        fingerprint = f"{count}_{last_id or 0}"
+        cached = subtitle_export.cached_export(meeting_id, fmt, fingerprint)
+        if cached:
+            return FileResponse(cached, media_type=media_type, filename=file_name)
+        body = subtitle_export.write_through(body, meeting_id, fmt, fingerprint)
 
-    return transcripts
+    return StreamingResponse(body, media_type=media_type, headers=headers)
 
 
 @router.delete("/transcripts/{transcript_id}")
@@ -106,5 +262,6 @@ def delete_transcript(
     
     db.delete(transcript)
     db.commit()
+    search_index.remove(transcript_id)
     
     return {"message": "Transcript deleted successfully"}
\ No newline at end of file
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, EmailStr
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Literal
 from enum import Enum
 from app.models.meeting_participant import ParticipantRole
 
@@ -60,3 +60,12 @@ class AddMemberRequest(BaseModel):
     member_email: EmailStr
     display_name: Optional[str] = None
     role: Optional[ParticipantRole] = ParticipantRole.PARTICIPANT
+
+
+# ---------------- Réglages des sous-titres en direct ----------------
+class CaptionSettings(BaseModel):
+    max_partial_rate: float = Field(5.0, ge=0, le=50)  # partiels / seconde / orateur (0 = illimité)
+    skip_unchanged: bool = True
+    partial_mode: Literal["full", "delta"] = "full"
+    partial_words: bool = True
+    partials_enabled: bool = True
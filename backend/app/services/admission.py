@@ -0,0 +1,233 @@
+# app/services/admission.py
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Reconnaisseurs simultanés par process (0 = illimité) ; en VOSK_ENGINE=process,
+# remplacé par la capacité de la ferme (workers vivants x VOSK_WORKER_MAX_SESSIONS)
+ASR_MAX_SESSIONS = int(os.environ.get("ASR_MAX_SESSIONS", max(2, 4 * (os.cpu_count() or 1))))
+# Orateurs simultanés par réunion (0 = illimité)
+ASR_MAX_SESSIONS_PER_MEETING = int(os.environ.get("ASR_MAX_SESSIONS_PER_MEETING", 12))
+# Mémoire estimée d'un reconnaisseur (Mo), affinée par les mesures à l'ouverture
+ASR_RECOGNIZER_MB = float(os.environ.get("ASR_RECOGNIZER_MB", 40))
+# Budget mémoire total des reconnaisseurs (Mo, 0 = pas de limite)
+ASR_MEMORY_BUDGET_MB = float(os.environ.get("ASR_MEMORY_BUDGET_MB", 0))
+# Au-delà de ce facteur temps réel moyen (temps de décodage / durée audio), on n'admet plus
+ASR_MAX_RTF = float(os.environ.get("ASR_MAX_RTF", 0.8))
+# File d'attente des nouveaux orateurs : durée max d'attente et longueur max
+ADMISSION_QUEUE_SECONDS = float(os.environ.get("ADMISSION_QUEUE_SECONDS", 15))
+ADMISSION_QUEUE_MAX = int(os.environ.get("ADMISSION_QUEUE_MAX", 32))
+# Délai conseillé au client avant de réessayer après un refus
+ADMISSION_RETRY_SECONDS = float(os.environ.get("ADMISSION_RETRY_SECONDS", 10))
+
+# Lissage exponentiel du facteur temps réel et de la mémoire mesurée
+_EWMA_ALPHA = 0.1
+
+REASON_PROCESS_FULL = "process_full"
+REASON_MEETING_FULL = "meeting_full"
+REASON_MEMORY = "memory"
+REASON_OVERLOADED = "overloaded"
+
+
+def process_rss_bytes() -> int:
+    """Mémoire résidente du process (Linux : /proc/self/statm, sinon pic via getrusage)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        try:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except Exception:
+            return 0
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float, message: str):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+        self.message = message
+
+
+class AdmissionTicket:
+    """Place d'un reconnaisseur admis ; à rendre avec release()."""
+
+    def __init__(self, meeting_id):
+        self.meeting_id = meeting_id
+        self.audio_seconds = 0.0
+        self.decode_seconds = 0.0
+
+    @property
+    def rtf(self) -> Optional[float]:
+        return self.decode_seconds / self.audio_seconds if self.audio_seconds else None
+
+
+class AdmissionController:
+    """
+    Contrôle d'admission des sessions de reconnaissance.
+    Suit les reconnaisseurs vivants, leur mémoire estimée et le facteur temps réel
+    mesuré ; au-delà des limites, les nouveaux orateurs attendent dans une file
+    FIFO bornée puis sont refusés avec un délai de nouvel essai. Les sessions déjà
+    admises ne sont jamais dégradées par une arrivée.
+    """
+
+    def __init__(self):
+        self.tickets: Dict[int, AdmissionTicket] = {}
+        self.per_meeting: Dict[object, int] = {}
+        self._waiters: Deque[asyncio.Event] = deque()
+        self.recognizer_bytes = ASR_RECOGNIZER_MB * 1024 * 1024
+        self.rtf: Optional[float] = None
+        self.admitted = 0
+        self.queued = 0
+        self.rejected: Dict[str, int] = {}
+        # Places réellement disponibles côté moteur (ferme de workers), sinon ASR_MAX_SESSIONS
+        self._capacity: Optional[Callable[[], int]] = None
+
+    def set_capacity(self, provider: Optional[Callable[[], int]]):
+        """provider() -> nombre de sessions que le moteur peut porter (appelé à chaque admission)."""
+        self._capacity = provider
+
+    @property
+    def active(self) -> int:
+        return len(self.tickets)
+
+    @property
+    def max_sessions(self) -> int:
+        if self._capacity is not None:
+            return self._capacity()
+        return ASR_MAX_SESSIONS
+
+    def blocking_reason(self, meeting_id) -> Optional[str]:
+        if ASR_MAX_SESSIONS_PER_MEETING and self.per_meeting.get(meeting_id, 0) >= ASR_MAX_SESSIONS_PER_MEETING:
+            return REASON_MEETING_FULL
+        if self._capacity is not None:
+            if self.active >= self.max_sessions:
+                return REASON_PROCESS_FULL
+        elif ASR_MAX_SESSIONS and self.active >= ASR_MAX_SESSIONS:
+            return REASON_PROCESS_FULL
+        if ASR_MEMORY_BUDGET_MB and (self.active + 1) * self.recognizer_bytes > ASR_MEMORY_BUDGET_MB * 1024 * 1024:
+            return REASON_MEMORY
+        if self.active and self.rtf is not None and self.rtf > ASR_MAX_RTF:
+            return REASON_OVERLOADED
+        return None
+
+    def _grant(self, meeting_id) -> AdmissionTicket:
+        ticket = AdmissionTicket(meeting_id)
+        self.tickets[id(ticket)] = ticket
+        self.per_meeting[meeting_id] = self.per_meeting.get(meeting_id, 0) + 1
+        self.admitted += 1
+        return ticket
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        messages = {
+            REASON_MEETING_FULL: "Nombre maximal d'orateurs atteint pour cette réunion",
+            REASON_PROCESS_FULL: "Serveur de transcription complet",
+            REASON_MEMORY: "Mémoire du serveur de transcription insuffisante",
+            REASON_OVERLOADED: "Serveur de transcription surchargé",
+        }
+        return AdmissionRejected(reason, ADMISSION_RETRY_SECONDS, messages.get(reason, "Admission refusée"))
+
+    async def acquire(self, meeting_id, on_queued=None, timeout: float = ADMISSION_QUEUE_SECONDS) -> AdmissionTicket:
+        """
+        Obtenir une place. Si aucune n'est libre, attendre dans la file FIFO
+        (on_queued(reason, position) est appelé une fois) ; lève AdmissionRejected
+        si la file est pleine, si la réunion est complète ou à l'expiration du délai.
+        """
+        reason = self.blocking_reason(meeting_id)
+        if reason is None and not self._waiters:
+            return self._grant(meeting_id)
+        # Place libre mais file non vide : on passe derrière ceux qui attendent
+        reason = reason or REASON_PROCESS_FULL
+        if reason == REASON_MEETING_FULL or len(self._waiters) >= ADMISSION_QUEUE_MAX or timeout <= 0:
+            raise self._reject(reason)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        waiter = asyncio.Event()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            if on_queued is not None:
+                await on_queued(reason, len(self._waiters))
+            while True:
+                waiter.clear()
+                if self._waiters[0] is waiter:
+                    blocked = self.blocking_reason(meeting_id)
+                    if blocked is None:
+                        self._waiters.popleft()
+                        return self._grant(meeting_id)
+                    reason = blocked
+                    if blocked == REASON_MEETING_FULL:
+                        raise self._reject(blocked)
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise self._reject(reason)
+                try:
+                    await asyncio.wait_for(waiter.wait(), remaining)
+                except asyncio.TimeoutError:
+                    raise self._reject(reason)
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            # Le suivant peut tenir dans la place libérée ou laissée libre
+            self._wake_next()
+
+    def _wake_next(self):
+        if self._waiters:
+            self._waiters[0].set()
+
+    def release(self, ticket: Optional[AdmissionTicket]):
+        if ticket is None or self.tickets.pop(id(ticket), None) is None:
+            return
+        count = self.per_meeting.get(ticket.meeting_id, 1) - 1
+        if count > 0:
+            self.per_meeting[ticket.meeting_id] = count
+        else:
+            self.per_meeting.pop(ticket.meeting_id, None)
+        if not self.tickets:
+            # Plus aucun décodage en cours : la mesure de charge n'est plus représentative
+            self.rtf = None
+        self._wake_next()
+
+    def record_decode(self, ticket: Optional[AdmissionTicket], audio_seconds: float, decode_seconds: float):
+        """Temps de décodage (attente de l'executor incluse) pour audio_seconds de PCM."""
+        if ticket is None or audio_seconds <= 0:
+            return
+        ticket.audio_seconds += audio_seconds
+        ticket.decode_seconds += decode_seconds
+        sample = decode_seconds / audio_seconds
+        self.rtf = sample if self.rtf is None else self.rtf + _EWMA_ALPHA * (sample - self.rtf)
+        if self._waiters and self.rtf <= ASR_MAX_RTF:
+            self._wake_next()
+
+    def record_recognizer_memory(self, delta_bytes: int):
+        """Croissance de la mémoire résidente mesurée à l'ouverture d'un reconnaisseur."""
+        if delta_bytes > 0:
+            self.recognizer_bytes += _EWMA_ALPHA * (delta_bytes - self.recognizer_bytes)
+
+    def stats(self) -> dict:
+        return {
+            "active_sessions": self.active,
+            "max_sessions": self.max_sessions,
+            "max_sessions_per_meeting": ASR_MAX_SESSIONS_PER_MEETING,
+            "sessions_per_meeting": dict(self.per_meeting),
+            "queued_now": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": dict(self.rejected),
+            "rtf": round(self.rtf, 3) if self.rtf is not None else None,
+            "max_rtf": ASR_MAX_RTF,
+            "recognizer_mb": round(self.recognizer_bytes / (1024 * 1024), 1),
+            "recognizers_mb": round(self.active * self.recognizer_bytes / (1024 * 1024), 1),
+            "memory_budget_mb": ASR_MEMORY_BUDGET_MB or None,
+            "process_rss_mb": round(process_rss_bytes() / (1024 * 1024), 1),
+        }
+
+
+admission_controller = AdmissionController()
@@ -0,0 +1,448 @@
+# app/services/asr_farm.py
+import asyncio
+import itertools
+import json
+import logging
+import multiprocessing as mp
+import os
+import queue
+import struct
+import threading
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+from app.services.vosk_service import DEFAULT_MODEL_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# Mode moteur : "thread" (défaut, executor dans le process FastAPI) ou "process" (ferme de workers)
+VOSK_ENGINE = os.environ.get("VOSK_ENGINE", "thread")
+WORKER_PROCESSES = int(os.environ.get("VOSK_WORKER_PROCESSES", os.cpu_count() or 2))
+# Sessions simultanées par worker ; la capacité de la ferme dimensionne l'admission
+WORKER_MAX_SESSIONS = int(os.environ.get("VOSK_WORKER_MAX_SESSIONS", 4))
+# Taille du ring buffer partagé par worker (PCM en attente de décodage)
+WORKER_RING_BYTES = int(os.environ.get("VOSK_WORKER_RING_BYTES", 4 * 1024 * 1024))
+
+_HEADER = struct.Struct("<QQ")  # write_pos, read_pos (compteurs monotones)
+
+
+class ShmRing:
+    """
+    Ring buffer mono-producteur / mono-consommateur en mémoire partagée.
+    Le producteur (process FastAPI) copie le PCM dans le segment et n'envoie au
+    worker que (offset, longueur) : l'audio n'est jamais picklé.
+    Les positions sont des compteurs absolus ; seul le producteur écrit write_pos
+    et seul le consommateur écrit read_pos.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, capacity: int, owner: bool):
+        self.shm = shm
+        self.capacity = capacity
+        self.owner = owner
+        self._buf = shm.buf
+
+    @classmethod
+    def create(cls, capacity: int) -> "ShmRing":
+        shm = shared_memory.SharedMemory(create=True, size=_HEADER.size + capacity)
+        _HEADER.pack_into(shm.buf, 0, 0, 0)
+        return cls(shm, capacity, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, capacity: int) -> "ShmRing":
+        return cls(shared_memory.SharedMemory(name=name), capacity, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def _positions(self) -> Tuple[int, int]:
+        return _HEADER.unpack_from(self._buf, 0)
+
+    def free_space(self) -> int:
+        write_pos, read_pos = self._positions()
+        return self.capacity - (write_pos - read_pos)
+
+    def write(self, data: bytes) -> Optional[int]:
+        """Copier data dans le ring. Retourne la position absolue, ou None si plein."""
+        size = len(data)
+        write_pos, read_pos = self._positions()
+        if size > self.capacity - (write_pos - read_pos):
+            return None
+        offset = write_pos % self.capacity
+        first = min(size, self.capacity - offset)
+        base = _HEADER.size
+        view = memoryview(data)
+        self._buf[base + offset:base + offset + first] = view[:first]
+        if first < size:
+            self._buf[base:base + size - first] = view[first:]
+        struct.pack_into("<Q", self._buf, 0, write_pos + size)
+        return write_pos
+
+    def read(self, position: int, size: int) -> bytes:
+        """Lire size octets à la position absolue donnée et libérer l'espace."""
+        offset = position % self.capacity
+        first = min(size, self.capacity - offset)
+        base = _HEADER.size
+        if first == size:
+            data = bytes(self._buf[base + offset:base + offset + size])
+        else:
+            data = bytes(self._buf[base + offset:base + self.capacity]) + bytes(self._buf[base:base + size - first])
+        struct.pack_into("<Q", self._buf, 8, position + size)
+        return data
+
+    def close(self):
+        self._buf = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _worker_main(index: int, shm_name: str, capacity: int, conn):
+    """
+    Boucle d'un process décodeur. Le modèle Vosk est chargé une seule fois
+    (à l'import de vosk_service) puis partagé par toutes les sessions épinglées ici.
+    """
+    try:
+        from app.services.vosk_service import get_vosk_transcriber
+        from app.services.recognizer_pool import RecognizerPool, shift_word_times
+        from app.services.model_registry import model_registry
+        transcriber = get_vosk_transcriber()
+        ring = ShmRing.attach(shm_name, capacity)
+    except Exception as e:
+        conn.send(("failed", str(e)))
+        return
+
+    # session_id -> recognizer, taux, partial_words, transcriber, modèle et horloge de la session
+    recognizers = {}
+    pool = RecognizerPool()
+    model_registry.on_evict(pool.drop_model)
+    pool.prefill(transcriber.sample_rate, True, transcriber)
+    conn.send(("ready", os.getpid(), transcriber.sample_rate))
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        op = msg[0]
+        if op == "stop":
+            break
+        try:
+            if op == "audio":
+                _, session_id, request_id, position, size, want_partial = msg
+                data = ring.read(position, size)
+                item = recognizers[session_id]
+                text, is_final, result = item["transcriber"].process_audio_chunk(item["recognizer"], data, want_partial)
+                item["samples"] += size // 2
+                result = shift_word_times(result, item["clock_base"] / item["rate"])
+                conn.send(("result", request_id, (text, is_final, result)))
+            elif op == "open":
+                _, session_id, request_id, sample_rate, partial_words, language = msg
+                entry, model_transcriber, _ = model_registry.acquire(language)
+                try:
+                    rate = sample_rate or model_transcriber.sample_rate
+                    recognizer, clock_base = pool.acquire(rate, partial_words, model_transcriber)
+                except Exception:
+                    model_registry.release(entry)
+                    raise
+                recognizers[session_id] = {
+                    "recognizer": recognizer, "rate": rate, "partial_words": partial_words,
+                    "transcriber": model_transcriber, "entry": entry,
+                    # Horloge du recognizer recyclé : décodé avant / pendant cette session
+                    "clock_base": clock_base, "samples": 0,
+                }
+                conn.send(("result", request_id, rate))
+            elif op == "final":
+                _, session_id, request_id = msg
+                item = recognizers[session_id]
+                result = shift_word_times(json.loads(item["recognizer"].FinalResult()), item["clock_base"] / item["rate"])
+                conn.send(("result", request_id, json.dumps(result)))
+            elif op == "close":
+                item = recognizers.pop(msg[1], None)
+                if item is not None:
+                    pool.release(item["recognizer"], item["rate"], item["partial_words"], item["transcriber"],
+                                 item["clock_base"] + item["samples"])
+                    model_registry.release(item["entry"])
+            elif op == "preload":
+                model_registry.preload(msg[1])
+            elif op == "stats":
+                _, _, request_id = msg
+                conn.send(("result", request_id, {"recognizer_pool": pool.stats(), "models": model_registry.stats()}))
+        except Exception as e:
+            logger.error(f"Erreur worker ASR {index}: {e}", exc_info=True)
+            if len(msg) > 2:
+                conn.send(("error", msg[2], str(e)))
+
+    ring.close()
+
+
+class _Worker:
+    def __init__(self, index: int, ctx):
+        self.index = index
+        self.ring = ShmRing.create(WORKER_RING_BYTES)
+        self.conn, child_conn = ctx.Pipe(duplex=True)
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(index, self.ring.name, self.ring.capacity, child_conn),
+            name=f"vosk-worker-{index}",
+            daemon=True,
+        )
+        self.sessions = 0
+        self.state = "starting"
+        self.ready = threading.Event()
+        # Messages vers le worker, écrits dans le Pipe par un thread dédié :
+        # un worker lent ne bloque jamais la boucle asyncio
+        self.outbox: "queue.SimpleQueue" = queue.SimpleQueue()
+        # Sessions en attente de place dans le ring : (boucle, événement), réveillées à chaque résultat
+        self.space_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+        self.waiters_lock = threading.Lock()
+
+    def send(self, msg):
+        """Non bloquant : le message part dans l'ordre d'envoi."""
+        self.outbox.put(msg)
+
+    def wait_for_space(self) -> asyncio.Event:
+        """Événement posé dès que le worker a consommé de l'audio (ou s'est arrêté)."""
+        event = asyncio.Event()
+        with self.waiters_lock:
+            self.space_waiters.append((asyncio.get_running_loop(), event))
+        return event
+
+    def notify_space(self):
+        with self.waiters_lock:
+            waiters, self.space_waiters = self.space_waiters, []
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass
+
+
+class FarmDecoderSession:
+    """Même interface que DecoderSession, mais le recognizer vit dans un worker."""
+
+    recognizer = None
+
+    def __init__(self, farm: "ASRWorkerFarm", worker: _Worker, session_id: int, sample_rate: int):
+        self.farm = farm
+        self.worker = worker
+        self.session_id = session_id
+        self.sample_rate = sample_rate
+        self.model_loaded = False
+        self._lock = asyncio.Lock()
+
+    async def accept(self, audio_data: bytes, want_partial: bool = True) -> Tuple[str, bool, dict]:
+        async with self._lock:
+            worker = self.worker
+            position = worker.ring.write(audio_data)
+            while position is None:
+                if len(audio_data) > worker.ring.capacity:
+                    raise ValueError("Chunk audio plus grand que le ring buffer du worker")
+                if worker.state not in ("starting", "ready"):
+                    raise RuntimeError(f"Worker ASR {worker.index} indisponible ({worker.state})")
+                # Worker en retard : on attend qu'il libère de la place (backpressure).
+                # Inscription avant le nouvel essai : une place libérée entre-temps n'est pas perdue
+                space = worker.wait_for_space()
+                position = worker.ring.write(audio_data)
+                if position is None:
+                    await space.wait()
+                    position = worker.ring.write(audio_data)
+            return await self.farm.request(
+                self.worker, "audio", self.session_id, position, len(audio_data), want_partial
+            )
+
+    async def final_result(self) -> dict:
+        async with self._lock:
+            raw = await self.farm.request(self.worker, "final", self.session_id)
+            return json.loads(raw)
+
+    def close(self):
+        if self.worker is not None:
+            self.farm.release(self.worker, self.session_id)
+            self.worker = None
+
+
+class ASRWorkerFarm:
+    """
+    Ferme de N process décodeurs. Chaque session est épinglée à un worker
+    (le moins chargé à l'ouverture) pour conserver l'état du recognizer ;
+    un worker porte au plus `slots` sessions.
+    Le PCM transite par le ring buffer partagé du worker ; les commandes et
+    résultats (petits tuples) passent par un Pipe, lu par un thread par worker.
+    """
+
+    def __init__(self, processes: int = WORKER_PROCESSES, slots: int = WORKER_MAX_SESSIONS):
+        self.processes = max(1, processes)
+        self.slots = max(1, slots)
+        self.workers: List[_Worker] = []
+        # request_id -> (boucle, future, worker)
+        self._pending: Dict[int, Tuple[asyncio.AbstractEventLoop, asyncio.Future, _Worker]] = {}
+        self._request_ids = itertools.count(1)
+        self._session_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # Taux natif du modèle, confirmé par le premier worker prêt
+        self.sample_rate = DEFAULT_MODEL_SAMPLE_RATE
+
+    def start(self):
+        if self.workers:
+            return
+        ctx = mp.get_context("spawn")
+        for index in range(self.processes):
+            worker = _Worker(index, ctx)
+            worker.process.start()
+            threading.Thread(
+                target=self._reader, args=(worker,), name=f"vosk-worker-reader-{index}", daemon=True
+            ).start()
+            threading.Thread(
+                target=self._writer, args=(worker,), name=f"vosk-worker-writer-{index}", daemon=True
+            ).start()
+            self.workers.append(worker)
+        logger.info(f"🚀 Ferme ASR démarrée avec {self.processes} process")
+
+    def ensure_ready(self):
+        if not self.workers:
+            self.start()
+        if not any(w.state in ("starting", "ready") for w in self.workers):
+            raise RuntimeError("Aucun worker ASR disponible (modèle Vosk non chargé ?)")
+
+    def capacity(self) -> int:
+        """Sessions que la ferme peut porter : places des workers encore vivants."""
+        if not self.workers:
+            return self.processes * self.slots
+        return sum(self.slots for w in self.workers if w.state in ("starting", "ready"))
+
+    def _writer(self, worker: _Worker):
+        while True:
+            msg = worker.outbox.get()
+            if msg is None:
+                break
+            try:
+                worker.conn.send(msg)
+            except (OSError, ValueError) as e:
+                # Pipe fermé : le lecteur constate la mort du worker et échoue les requêtes
+                logger.error(f"Envoi au worker ASR {worker.index} impossible: {e}")
+                break
+
+    def _reader(self, worker: _Worker):
+        while True:
+            try:
+                msg = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+            kind = msg[0]
+            if kind in ("result", "error"):
+                # Le worker a lu son audio avant de répondre : de la place s'est libérée
+                worker.notify_space()
+            if kind == "result":
+                self._resolve(msg[1], result=msg[2])
+            elif kind == "error":
+                self._resolve(msg[1], error=RuntimeError(msg[2]))
+            elif kind == "ready":
+                self.sample_rate = msg[2]
+                worker.state = "ready"
+                worker.ready.set()
+                logger.info(f"✅ Worker ASR {worker.index} prêt (pid {msg[1]})")
+            elif kind == "failed":
+                worker.state = "failed"
+                worker.ready.set()
+                logger.error(f"Worker ASR {worker.index} en échec: {msg[1]}")
+        worker.state = "dead"
+        worker.ready.set()
+        worker.notify_space()
+        # Échouer les requêtes encore en attente sur ce worker
+        with self._lock:
+            pending = [rid for rid, entry in self._pending.items() if entry[2] is worker]
+        for rid in pending:
+            self._resolve(rid, error=RuntimeError(f"Worker ASR {worker.index} arrêté"))
+
+    def _resolve(self, request_id: int, result=None, error: Optional[Exception] = None):
+        with self._lock:
+            entry = self._pending.pop(request_id, None)
+        if entry is None:
+            return
+        loop, future, _ = entry
+
+        def _set():
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        loop.call_soon_threadsafe(_set)
+
+    async def request(self, worker: _Worker, op: str, session_id: int, *args):
+        if worker.state not in ("starting", "ready"):
+            raise RuntimeError(f"Worker ASR {worker.index} indisponible ({worker.state})")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        request_id = next(self._request_ids)
+        with self._lock:
+            self._pending[request_id] = (loop, future, worker)
+        worker.send((op, session_id, request_id, *args))
+        return await future
+
+    async def open_session(self, sample_rate: Optional[int] = None, partial_words: bool = True,
+                           language: Optional[str] = None) -> FarmDecoderSession:
+        """sample_rate=None : taux natif du modèle de la langue (chargé à la demande par le worker)."""
+        self.ensure_ready()
+        candidates = [w for w in self.workers if w.state in ("starting", "ready") and w.sessions < self.slots]
+        if not candidates:
+            raise RuntimeError("Ferme ASR complète : aucun worker n'a de place libre")
+        worker = min(candidates, key=lambda w: w.sessions)
+        worker.sessions += 1
+        session_id = next(self._session_ids)
+        try:
+            rate = await self.request(worker, "open", session_id, sample_rate, partial_words, language)
+        except Exception:
+            worker.sessions -= 1
+            raise
+        return FarmDecoderSession(self, worker, session_id, rate)
+
+    def preload(self, language: Optional[str] = None):
+        """Chaque worker charge le modèle de la langue en arrière-plan."""
+        for worker in self.workers:
+            if worker.state in ("starting", "ready"):
+                worker.send(("preload", language))
+
+    def status(self) -> dict:
+        """État du moteur pour /readyz : prêt dès qu'un worker a chargé le modèle."""
+        states = [w.state for w in self.workers]
+        if "ready" in states:
+            state = "ready"
+        elif "starting" in states or not states:
+            state = "loading"
+        else:
+            state = "failed"
+        return {"state": state, "engine": "process", "workers": states, "capacity": self.capacity()}
+
+    async def engine_stats(self) -> dict:
+        """Pool de recognizers et modèles résidents de chaque worker."""
+        stats = {}
+        for worker in self.workers:
+            if worker.state == "ready":
+                try:
+                    stats[f"worker-{worker.index}"] = await asyncio.wait_for(self.request(worker, "stats", 0), 2)
+                except Exception as e:
+                    stats[f"worker-{worker.index}"] = {"error": str(e)}
+        return stats
+
+    def release(self, worker: _Worker, session_id: int):
+        worker.sessions = max(0, worker.sessions - 1)
+        if worker.state in ("starting", "ready"):
+            worker.send(("close", session_id))
+
+    def shutdown(self):
+        for worker in self.workers:
+            worker.send(("stop",))
+            # Fin du thread d'écriture, une fois "stop" parti
+            worker.outbox.put(None)
+        for worker in self.workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.ring.close()
+        self.workers = []
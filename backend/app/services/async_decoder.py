@@ -0,0 +1,199 @@
+# app/services/async_decoder.py
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from app.services.vosk_service import VoskTranscriber, get_vosk_transcriber, model_loader, MODEL_STATE_FAILED
+from app.services.asr_farm import VOSK_ENGINE, ASRWorkerFarm
+from app.services.recognizer_pool import RecognizerPool, shift_word_times
+from app.services.model_registry import model_registry, ModelEntry
+from app.services.admission import admission_controller
+
+logger = logging.getLogger(__name__)
+
+# Nombre de threads de décodage partagés par toutes les sessions du worker.
+# Kaldi relâche le GIL pendant AcceptWaveform : plusieurs sessions décodent en parallèle.
+DECODER_THREADS = int(os.environ.get("VOSK_DECODER_THREADS", os.cpu_count() or 4))
+
+
+class DecoderSession:
+    """
+    Session de décodage liée à un recognizer.
+    Les appels passent par un verrou asyncio (FIFO) : les chunks d'une même session
+    sont décodés dans l'ordre d'arrivée et jamais en parallèle sur le même recognizer.
+    """
+
+    def __init__(self, decoder: "AsyncVoskDecoder", recognizer, transcriber: VoskTranscriber,
+                 model: ModelEntry, sample_rate: int, partial_words: bool = True, clock_base: int = 0):
+        self.decoder = decoder
+        self.recognizer = recognizer
+        # Échantillons décodés par le recognizer avant cette session (recyclé par le pool)
+        self.clock_base = clock_base
+        self.samples = 0
+        self.transcriber = transcriber
+        self.model = model
+        self.sample_rate = sample_rate
+        self.partial_words = partial_words
+        # True si l'ouverture a dû charger le modèle (mesures mémoire non représentatives)
+        self.model_loaded = False
+        self._lock = asyncio.Lock()
+
+    async def accept(self, audio_data: bytes, want_partial: bool = True) -> Tuple[str, bool, dict]:
+        """
+        Décoder un chunk hors de la boucle asyncio.
+        Retourne: (texte, is_final, result_json) comme process_audio_chunk
+        """
+        async with self._lock:
+            text, is_final, result = await self.decoder.run(
+                self.transcriber.process_audio_chunk, self.recognizer, audio_data, want_partial
+            )
+            self.samples += len(audio_data) // 2
+            return text, is_final, shift_word_times(result, self.clock_offset)
+
+    async def final_result(self) -> dict:
+        """Vider le recognizer (fin de flux) et retourner le dernier résultat."""
+        async with self._lock:
+            raw = await self.decoder.run(self.recognizer.FinalResult)
+            return shift_word_times(json.loads(raw), self.clock_offset)
+
+    @property
+    def clock_offset(self) -> float:
+        """Secondes à retirer des temps par mot pour repartir du début de la session."""
+        return self.clock_base / self.sample_rate
+
+    def close(self):
+        recognizer, self.recognizer = self.recognizer, None
+        if recognizer is not None:
+            asyncio.ensure_future(self._recycle(recognizer))
+
+    async def _recycle(self, recognizer):
+        # Attendre la fin d'un décodage en cours avant de rendre le recognizer au pool
+        async with self._lock:
+            try:
+                await self.decoder.run(
+                    self.decoder.pool.release, recognizer, self.sample_rate, self.partial_words, self.transcriber,
+                    self.clock_base + self.samples
+                )
+            except Exception as e:
+                logger.debug(f"Recognizer non recyclé: {e}")
+            finally:
+                # Le modèle redevient évinçable une fois son recognizer rendu
+                model_registry.release(self.model)
+
+
+class AsyncVoskDecoder:
+    """
+    Couche asynchrone autour de VoskTranscriber.
+    Tout le travail Kaldi (création du recognizer, décodage) s'exécute sur un
+    ThreadPoolExecutor borné ; la boucle asyncio ne fait qu'attendre les résultats.
+    """
+
+    def __init__(self, transcriber: Optional[VoskTranscriber] = None, max_workers: int = DECODER_THREADS):
+        self._transcriber = transcriber
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pool: Optional[RecognizerPool] = None
+
+    @property
+    def transcriber(self) -> VoskTranscriber:
+        if self._transcriber is None:
+            self._transcriber = get_vosk_transcriber()
+        return self._transcriber
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="vosk-decoder")
+        return self._executor
+
+    @property
+    def pool(self) -> RecognizerPool:
+        if self._pool is None:
+            self._pool = RecognizerPool()
+            model_registry.on_evict(self._pool.drop_model)
+        return self._pool
+
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    @property
+    def sample_rate(self) -> int:
+        """Taux natif du modèle : les sessions lui envoient de l'audio rééchantillonné."""
+        return self.transcriber.sample_rate
+
+    def ensure_ready(self):
+        # Lève une RuntimeError si le modèle par défaut n'a pas pu être chargé
+        # (pendant le chargement, open_session attend le modèle)
+        if model_loader.state == MODEL_STATE_FAILED:
+            raise RuntimeError(f"Modèle Vosk non chargé: {model_loader.error}")
+
+    def start(self):
+        """
+        Charger le modèle en arrière-plan (démarrage du serveur), puis garder
+        des recognizers chauds à son taux natif.
+        """
+        if self._transcriber is None:
+            model_loader.start()
+        model_loader.on_ready(lambda transcriber: self.pool.prefill(transcriber.sample_rate, True, transcriber))
+
+    def preload(self, language: Optional[str] = None):
+        """Charger le modèle d'une langue avant l'arrivée des orateurs (démarrage de réunion)."""
+        model_registry.preload(language)
+
+    def status(self) -> dict:
+        """État du moteur pour /readyz : loading, ready ou failed."""
+        if self._transcriber is not None:
+            return {"state": "ready", "engine": "thread"}
+        return {"engine": "thread", **model_loader.status()}
+
+    async def open_session(self, sample_rate: Optional[int] = None, partial_words: bool = True,
+                           language: Optional[str] = None) -> DecoderSession:
+        """
+        Modèle de la langue (chargé à la demande) puis recognizer chaud du pool,
+        sinon créé dans l'executor (allocation Kaldi non négligeable).
+        sample_rate=None : taux natif du modèle.
+        """
+        model, transcriber, model_loaded = await self.run(model_registry.acquire, language)
+        try:
+            rate = sample_rate or transcriber.sample_rate
+            recognizer, clock_base = await self.run(self.pool.acquire, rate, partial_words, transcriber)
+        except Exception:
+            model_registry.release(model)
+            raise
+        session = DecoderSession(self, recognizer, transcriber, model, rate, partial_words, clock_base)
+        session.model_loaded = model_loaded
+        return session
+
+    async def engine_stats(self) -> dict:
+        return {
+            "recognizer_pool": self._pool.stats() if self._pool is not None else {},
+            "models": model_registry.stats(),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# VOSK_ENGINE=process : décodage réparti sur une ferme de process (voir asr_farm)
+if VOSK_ENGINE == "process":
+    async_decoder = ASRWorkerFarm()
+    # Les recognizers vivent dans les workers : l'admission suit la taille de la ferme
+    admission_controller.set_capacity(async_decoder.capacity)
+else:
+    async_decoder = AsyncVoskDecoder()
+
+
+def get_async_decoder():
+    """
+    Retourne le décodeur partagé (AsyncVoskDecoder ou ASRWorkerFarm).
+    Lève une RuntimeError si aucun moteur n'est disponible, pour échouer
+    avant d'enregistrer la session.
+    """
+    async_decoder.ensure_ready()
+    return async_decoder
@@ -0,0 +1,166 @@
+# app/services/audio_codecs.py
+import time
+from typing import Optional
+
+import numpy as np
+
+ENCODING_PCM = "pcm_s16le"
+ENCODING_MULAW = "mulaw"
+ENCODING_ALAW = "alaw"
+ENCODING_IMA_ADPCM = "ima_adpcm"
+
+# Alias acceptés dans le message init
+_ALIASES = {
+    "pcm": ENCODING_PCM,
+    "s16le": ENCODING_PCM,
+    ENCODING_PCM: ENCODING_PCM,
+    "mulaw": ENCODING_MULAW,
+    "ulaw": ENCODING_MULAW,
+    "pcmu": ENCODING_MULAW,
+    "alaw": ENCODING_ALAW,
+    "pcma": ENCODING_ALAW,
+    "ima_adpcm": ENCODING_IMA_ADPCM,
+    "adpcm": ENCODING_IMA_ADPCM,
+}
+
+
+def _build_mulaw_table() -> np.ndarray:
+    u = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (u >> 4) & 0x07
+    mantissa = u & 0x0F
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    return np.where(u & 0x80, -magnitude, magnitude).astype("<i2")
+
+
+def _build_alaw_table() -> np.ndarray:
+    a = np.arange(256, dtype=np.int32) ^ 0x55
+    segment = (a & 0x70) >> 4
+    t = (a & 0x0F) << 4
+    t = np.where(segment == 0, t + 8, (t + 0x108) << np.maximum(segment - 1, 0))
+    return np.where(a & 0x80, t, -t).astype("<i2")
+
+
+# G.711 : décodage = simple indexation dans une table de 256 valeurs
+MULAW_TABLE = _build_mulaw_table()
+ALAW_TABLE = _build_alaw_table()
+
+IMA_INDEX_TABLE = [-1, -1, -1, -1, 2, 4, 6, 8, -1, -1, -1, -1, 2, 4, 6, 8]
+IMA_STEP_TABLE = np.array([
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+    50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230,
+    253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724, 796, 876, 963,
+    1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327,
+    3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442,
+    11487, 12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794,
+    32767,
+], dtype=np.int32)
+# Table de transition (index courant, nibble) -> index suivant
+_IMA_NEXT_INDEX = [
+    [min(88, max(0, index + IMA_INDEX_TABLE[nibble])) for nibble in range(16)]
+    for index in range(89)
+]
+
+
+def normalize_encoding(encoding: Optional[str]) -> str:
+    if encoding is None:
+        return ENCODING_PCM
+    try:
+        return _ALIASES[str(encoding).lower()]
+    except KeyError:
+        raise ValueError(f"Encodage audio non supporté: {encoding}")
+
+
+def decode_ima_adpcm_block(block: bytes) -> np.ndarray:
+    """
+    Décoder un bloc IMA-ADPCM mono (format WAV/DVI) :
+    en-tête de 4 octets (int16 prédicteur, u8 index de pas, u8 réservé)
+    suivi des nibbles, poids faible en premier. Le prédicteur initial est
+    le premier échantillon.
+    """
+    if len(block) < 4:
+        return np.zeros(0, dtype="<i2")
+    predictor = int(np.frombuffer(block, dtype="<i2", count=1)[0])
+    index = min(88, block[2])
+    packed = np.frombuffer(block, dtype=np.uint8, offset=4)
+    nibbles = np.empty(packed.size * 2, dtype=np.int32)
+    nibbles[0::2] = packed & 0x0F
+    nibbles[1::2] = packed >> 4
+
+    # Seule la suite des index de pas est intrinsèquement séquentielle (bornée 0..88)
+    indices = np.empty(nibbles.size, dtype=np.int32)
+    next_index = _IMA_NEXT_INDEX
+    for i, nibble in enumerate(nibbles.tolist()):
+        indices[i] = index
+        index = next_index[index][nibble]
+
+    # Le reste est vectorisé : différences puis somme cumulée
+    step = IMA_STEP_TABLE[indices]
+    diff = step >> 3
+    diff = diff + np.where(nibbles & 4, step, 0)
+    diff = diff + np.where(nibbles & 2, step >> 1, 0)
+    diff = diff + np.where(nibbles & 1, step >> 2, 0)
+    diff = np.where(nibbles & 8, -diff, diff)
+    samples = predictor + np.cumsum(diff)
+    if samples.size and (samples.max() > 32767 or samples.min() < -32768):
+        # Saturation : le prédicteur doit être borné à chaque pas, repli séquentiel
+        value = predictor
+        out = np.empty_like(samples)
+        for i, d in enumerate(diff.tolist()):
+            value = min(32767, max(-32768, value + d))
+            out[i] = value
+        samples = out
+    return np.concatenate(([predictor], samples)).astype("<i2")
+
+
+class AudioDecoder:
+    """
+    Décodage par session de l'audio compressé reçu sur /ws/transcribe vers du PCM s16le.
+    Pour IMA-ADPCM, chaque message binaire est un bloc autonome (en-tête inclus).
+    """
+
+    def __init__(self, encoding: Optional[str] = None):
+        self.encoding = normalize_encoding(encoding)
+        self.encoded_bytes = 0
+        self.decoded_bytes = 0
+        self.decode_seconds = 0.0
+
+    @property
+    def passthrough(self) -> bool:
+        return self.encoding == ENCODING_PCM
+
+    def decode(self, data: bytes) -> bytes:
+        if self.passthrough:
+            self.encoded_bytes += len(data)
+            self.decoded_bytes += len(data)
+            return data
+        started = time.perf_counter()
+        codes = np.frombuffer(data, dtype=np.uint8)
+        if self.encoding == ENCODING_MULAW:
+            pcm = MULAW_TABLE[codes]
+        elif self.encoding == ENCODING_ALAW:
+            pcm = ALAW_TABLE[codes]
+        else:
+            pcm = decode_ima_adpcm_block(data)
+        out = pcm.tobytes()
+        self.decode_seconds += time.perf_counter() - started
+        self.encoded_bytes += len(data)
+        self.decoded_bytes += len(out)
+        return out
+
+    def encoded_size(self, pcm_bytes: int) -> int:
+        """Taille d'un chunk encodé équivalent à pcm_bytes de PCM (chunk conseillé au client)."""
+        samples = pcm_bytes // 2
+        if self.encoding in (ENCODING_MULAW, ENCODING_ALAW):
+            return samples
+        if self.encoding == ENCODING_IMA_ADPCM:
+            return 4 + samples // 2
+        return pcm_bytes
+
+    def stats(self) -> dict:
+        return {
+            "encoding": self.encoding,
+            "compression_ratio": round(self.decoded_bytes / self.encoded_bytes, 2) if self.encoded_bytes else None,
+            "decode_ms": round(self.decode_seconds * 1000, 1),
+            "decode_us_per_kb": round(self.decode_seconds * 1e6 / (self.encoded_bytes / 1024), 1)
+            if self.encoded_bytes and not self.passthrough else 0.0,
+        }
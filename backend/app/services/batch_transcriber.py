@@ -0,0 +1,338 @@
+# app/services/batch_transcriber.py
+import json
+import logging
+import mmap
+import multiprocessing as mp
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.services.vad import VAD_FRAME_MS, VAD_MIN_DBFS, VAD_THRESHOLD_DB
+
+logger = logging.getLogger(__name__)
+
+# Process de décodage pour les transcriptions de fichiers (rattrapage d'archives)
+BATCH_WORKERS = int(os.environ.get("BATCH_TRANSCRIBE_WORKERS", os.cpu_count() or 2))
+# Longueur visée d'un segment ; la coupe se fait dans le silence le plus proche
+BATCH_SEGMENT_SECONDS = float(os.environ.get("BATCH_SEGMENT_SECONDS", 30))
+# Au-delà, coupe forcée sur la trame la plus calme de la fenêtre
+BATCH_MAX_SEGMENT_SECONDS = float(os.environ.get("BATCH_MAX_SEGMENT_SECONDS", 60))
+# Silence minimal pour qu'une pause soit un point de coupe (pas de mot coupé en deux)
+BATCH_MIN_SILENCE_MS = int(os.environ.get("BATCH_MIN_SILENCE_MS", 300))
+# Audio passé au recognizer par appel (en secondes)
+BATCH_CHUNK_SECONDS = float(os.environ.get("BATCH_CHUNK_SECONDS", 0.5))
+
+# Trames analysées par bloc lors du balayage (mémoire bornée même sur un fichier de plusieurs heures)
+_SCAN_BLOCK_FRAMES = 16384
+
+
+class WavLayout(NamedTuple):
+    sample_rate: int
+    channels: int
+    data_offset: int
+    data_bytes: int
+
+    @property
+    def frames(self) -> int:
+        return self.data_bytes // (2 * self.channels)
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate
+
+
+def read_wav_layout(path: str) -> WavLayout:
+    """
+    Position et format du PCM d'un WAV (s16le uniquement). La taille du chunk
+    data est bornée par celle du fichier : un enregistrement interrompu avant
+    son dernier point de reprise reste lisible jusqu'au bout.
+    """
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError(f"{path}: pas un fichier WAV")
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path}: chunk data introuvable")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", f.read(16))
+                f.seek(size - 16 + (size & 1), 1)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError(f"{path}: chunk fmt manquant")
+                audio_format, channels, sample_rate, _, _, bits = fmt
+                # 1 = PCM, 0xFFFE = WAVE_FORMAT_EXTENSIBLE (PCM 16 bits en pratique)
+                if audio_format not in (1, 0xFFFE) or bits != 16:
+                    raise ValueError(f"{path}: format non supporté (format={audio_format}, {bits} bits)")
+                offset = f.tell()
+                available = file_size - offset
+                if size == 0 or size > available:
+                    size = available
+                return WavLayout(sample_rate, channels, offset, size - size % (2 * channels))
+            else:
+                f.seek(size + (size & 1), 1)
+
+
+class MappedWav:
+    """
+    PCM d'un WAV projeté en mémoire (mmap) : vue numpy (frames, canaux) sans
+    copie du fichier ; le noyau ne charge que les pages réellement lues.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.layout = read_wav_layout(path)
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.samples = np.frombuffer(
+            self._mmap, dtype="<i2", count=self.layout.frames * self.layout.channels, offset=self.layout.data_offset
+        ).reshape(-1, self.layout.channels)
+
+    def pcm(self, start: int, end: int) -> bytes:
+        """PCM s16le mono des frames [start, end) (moyenne des canaux si besoin)."""
+        frames = self.samples[start:end]
+        if self.layout.channels > 1:
+            frames = frames.mean(axis=1).astype("<i2")
+        return frames.tobytes()
+
+    def close(self):
+        self.samples = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Une vue numpy est encore référencée : le mmap sera libéré avec elle
+            pass
+        self._file.close()
+
+
+def frame_energy_db(samples: np.ndarray, frame_len: int) -> np.ndarray:
+    """Énergie (dBFS) de chaque trame de frame_len frames, tous canaux confondus, calculée par blocs."""
+    n_frames = samples.shape[0] // frame_len
+    energy = np.empty(n_frames, dtype=np.float32)
+    width = frame_len * samples.shape[1]
+    for first in range(0, n_frames, _SCAN_BLOCK_FRAMES):
+        last = min(n_frames, first + _SCAN_BLOCK_FRAMES)
+        block = samples[first * frame_len:last * frame_len].reshape(last - first, width).astype(np.float32)
+        energy[first:last] = np.einsum("ij,ij->i", block, block) / width
+    return 10.0 * np.log10(energy / (32768.0 * 32768.0) + 1e-12)
+
+
+def find_segments(energy_db: np.ndarray, frame_len: int, total_frames: int,
+                  target_seconds: float, max_seconds: float, min_silence_ms: int,
+                  sample_rate: int) -> List[Tuple[int, int, bool]]:
+    """
+    Découper aux silences : (début, fin, contient de la parole) en frames audio.
+    Le seuil de silence suit le bruit de fond du fichier comme la VAD temps réel,
+    borné sous le niveau de parole (fichiers presque sans pause) ; chaque coupe
+    tombe au milieu de la pause la plus proche de la longueur visée, sans
+    dépasser max_seconds.
+    """
+    if energy_db.size == 0:
+        return [(0, total_frames, False)] if total_frames else []
+    frame_s = frame_len / sample_rate
+    floor, speech_level = np.percentile(energy_db, [10, 90])
+    threshold = min(floor + VAD_THRESHOLD_DB, speech_level - VAD_THRESHOLD_DB)
+    silent = energy_db < max(threshold, VAD_MIN_DBFS)
+
+    # Pauses : plages de trames silencieuses assez longues, repérées par différences
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+    long_enough = (run_ends - run_starts) * frame_s * 1000 >= min_silence_ms
+    cuts = (run_starts[long_enough] + run_ends[long_enough]) // 2
+
+    n_frames = energy_db.size
+    target = max(1, int(target_seconds / frame_s))
+    longest = max(target, int(max_seconds / frame_s))
+    boundaries = [0]
+    position = 0
+    while n_frames - position > longest:
+        low, high = position + target // 2, position + longest
+        i, j = np.searchsorted(cuts, [low, high])
+        if i < j:
+            window = cuts[i:j]
+            cut = int(window[np.argmin(np.abs(window - (position + target)))])
+        else:
+            # Pas de pause : la trame la plus calme de la fenêtre
+            cut = low + int(np.argmin(energy_db[low:high]))
+        boundaries.append(cut)
+        position = cut
+    boundaries.append(n_frames)
+
+    segments = []
+    for first, last in zip(boundaries[:-1], boundaries[1:]):
+        end = total_frames if last == n_frames else last * frame_len
+        segments.append((first * frame_len, end, not bool(silent[first:last].all())))
+    return segments
+
+
+# --- Côté worker (process du pool) ---
+
+_worker_transcriber = None
+_worker_wav: Optional[MappedWav] = None
+
+
+def _init_worker(model_path: Optional[str]):
+    global _worker_transcriber
+    from app.services.vosk_service import VoskTranscriber
+    _worker_transcriber = VoskTranscriber(model_path=model_path)
+
+
+def _mapped(path: str) -> MappedWav:
+    """Le fichier en cours reste projeté d'un segment à l'autre dans le worker."""
+    global _worker_wav
+    if _worker_wav is None or _worker_wav.path != path:
+        if _worker_wav is not None:
+            _worker_wav.close()
+        _worker_wav = MappedWav(path)
+    return _worker_wav
+
+
+def _decode_segment(path: str, index: int, start: int, end: int) -> dict:
+    wav = _mapped(path)
+    rate = wav.layout.sample_rate
+    recognizer = _worker_transcriber.create_recognizer(rate, partial_words=False)
+    chunk = max(1, int(rate * BATCH_CHUNK_SECONDS))
+    offset = start / rate
+    texts, words = [], []
+
+    def collect(result: dict):
+        if result.get("text"):
+            texts.append(result["text"])
+        for word in result.get("result", []):
+            word = dict(word)
+            word["start"] = round(word["start"] + offset, 3)
+            word["end"] = round(word["end"] + offset, 3)
+            words.append(word)
+
+    started = time.perf_counter()
+    for position in range(start, end, chunk):
+        if recognizer.AcceptWaveform(wav.pcm(position, min(end, position + chunk))):
+            collect(json.loads(recognizer.Result()))
+    collect(json.loads(recognizer.FinalResult()))
+    return {
+        "index": index,
+        "start": round(offset, 3),
+        "end": round(end / rate, 3),
+        "text": " ".join(texts),
+        "words": words,
+        "decode_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+# --- Côté appelant ---
+
+class BatchTranscriber:
+    """
+    Transcription de fichiers WAV longs en parallèle : le fichier est projeté en
+    mémoire, découpé aux silences par un balayage d'énergie vectorisé, et les
+    segments sont décodés sur un pool de process (un modèle chargé par process,
+    gardé d'un fichier à l'autre). Les timestamps des mots sont recalés sur le
+    fichier complet. Le débit croît avec le nombre de cœurs.
+    """
+
+    def __init__(self, model_path: Optional[str] = None, workers: int = BATCH_WORKERS):
+        self.model_path = model_path
+        self.workers = max(1, workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=mp.get_context("spawn"),
+                initializer=_init_worker, initargs=(self.model_path,),
+            )
+        return self._executor
+
+    def plan(self, path: str) -> Tuple[WavLayout, List[Tuple[int, int, bool]]]:
+        wav = MappedWav(path)
+        try:
+            layout = wav.layout
+            frame_len = max(1, layout.sample_rate * VAD_FRAME_MS // 1000)
+            energy = frame_energy_db(wav.samples, frame_len)
+            segments = find_segments(
+                energy, frame_len, layout.frames, BATCH_SEGMENT_SECONDS, BATCH_MAX_SEGMENT_SECONDS,
+                BATCH_MIN_SILENCE_MS, layout.sample_rate,
+            )
+        finally:
+            wav.close()
+        return layout, segments
+
+    def transcribe(self, path: str, on_progress: Optional[Callable[[float, float], None]] = None) -> dict:
+        """
+        Même résultat que VoskTranscriber.transcribe_wav_file (text, words, confidence),
+        plus la durée et le détail des segments. on_progress(secondes décodées, durée totale).
+        """
+        started = time.perf_counter()
+        layout, segments = self.plan(path)
+        duration = layout.duration
+        futures = {
+            self.executor.submit(_decode_segment, path, index, start, end): (end - start) / layout.sample_rate
+            for index, (start, end, speech) in enumerate(segments) if speech
+        }
+        # Segments entièrement silencieux : ni décodage ni texte, mais comptés dans la progression
+        done_seconds = sum((end - start) / layout.sample_rate for start, end, speech in segments if not speech)
+        results: Dict[int, dict] = {}
+        try:
+            for future in as_completed(futures):
+                result = future.result()
+                results[result["index"]] = result
+                done_seconds += futures[future]
+                if on_progress is not None:
+                    on_progress(done_seconds, duration)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+        ordered = [results[index] for index in sorted(results)]
+        words = [word for result in ordered for word in result["words"]]
+        confidences = [word["conf"] for word in words if "conf" in word]
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"📼 {os.path.basename(path)}: {duration:.0f}s transcrits en {elapsed:.1f}s "
+            f"({len(segments)} segments, {self.workers} process)"
+        )
+        return {
+            "text": " ".join(result["text"] for result in ordered if result["text"]).strip(),
+            "words": words,
+            "confidence": float(np.mean(confidences)) if confidences else 0,
+            "duration": round(duration, 3),
+            "segments": [
+                {key: result[key] for key in ("start", "end", "text", "decode_seconds")} for result in ordered
+            ],
+            "elapsed_seconds": round(elapsed, 3),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+_batch_transcribers: Dict[str, BatchTranscriber] = {}
+
+
+def get_batch_transcriber(language: Optional[str] = None) -> BatchTranscriber:
+    """Pool de transcription de fichiers pour le modèle de la langue (créé au premier usage)."""
+    from app.services.model_registry import model_registry
+    entry = model_registry.resolve(language)
+    transcriber = _batch_transcribers.get(entry.key)
+    if transcriber is None:
+        transcriber = _batch_transcribers[entry.key] = BatchTranscriber(entry.path)
+    return transcriber
+
+
+def shutdown_batch_transcribers():
+    for transcriber in _batch_transcribers.values():
+        transcriber.shutdown()
+    _batch_transcribers.clear()
@@ -0,0 +1,252 @@
+# app/services/broadcaster.py
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from typing import Callable, Dict, List, Optional, Set
+
+from fastapi import WebSocket
+
+from app.services.caption_codec import CaptionCodec, FORMAT_BINARY, FORMAT_JSON
+
+logger = logging.getLogger(__name__)
+
+# Au-delà de SOFT_QUEUE messages en attente, on jette les partiels les plus anciens
+SOFT_QUEUE = int(os.environ.get("BROADCAST_SOFT_QUEUE", 32))
+# Au-delà de EVICT_QUEUE messages (finals inclus), le client est considéré mort et évincé
+EVICT_QUEUE = int(os.environ.get("BROADCAST_EVICT_QUEUE", 256))
+# Un envoi bloqué plus longtemps que SEND_TIMEOUT (secondes) évince aussi le client
+SEND_TIMEOUT = float(os.environ.get("BROADCAST_SEND_TIMEOUT", 10))
+
+
+def serialize_payload(payload: dict) -> str:
+    """Même encodage que WebSocket.send_json, mais fait une seule fois par message."""
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+class Subscriber:
+    """
+    Abonné d'une réunion : file sortante bornée + tâche d'envoi dédiée.
+    Un client lent ne retarde que sa propre file.
+    """
+
+    def __init__(self, fanout: "MeetingFanout", ws: WebSocket, fmt: str = FORMAT_JSON):
+        self.fanout = fanout
+        self.ws = ws
+        self.format = fmt
+        # éléments : (is_partial, speaker, data)
+        self.queue = deque()
+        self.wakeup = asyncio.Event()
+        self.dropped_partials = 0
+        self.closed = False
+        self.task = asyncio.create_task(self._sender())
+
+    def enqueue(self, is_partial: bool, speaker, data) -> bool:
+        """Ajouter un message. Retourne False si l'abonné doit être évincé."""
+        if is_partial:
+            # Un nouveau partiel rend obsolètes les partiels du même orateur encore en file
+            before = len(self.queue)
+            self.queue = deque(m for m in self.queue if not (m[0] and m[1] == speaker))
+            self.dropped_partials += before - len(self.queue)
+        self.queue.append((is_partial, speaker, data))
+
+        if len(self.queue) > SOFT_QUEUE:
+            # Client en retard : on ne garde que les finals
+            before = len(self.queue)
+            self.queue = deque(m for m in self.queue if not m[0])
+            self.dropped_partials += before - len(self.queue)
+        if len(self.queue) > EVICT_QUEUE:
+            return False
+        self.wakeup.set()
+        return True
+
+    async def _sender(self):
+        try:
+            while not self.closed:
+                if not self.queue:
+                    self.wakeup.clear()
+                    await self.wakeup.wait()
+                    continue
+                item = self.queue.popleft()
+                ws, data = self.ws, item[2]
+                send = ws.send_bytes if isinstance(data, bytes) else ws.send_text
+                try:
+                    await asyncio.wait_for(send(data), timeout=SEND_TIMEOUT)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    if self.ws is not ws:
+                        # Socket remplacée pendant l'envoi (session reprise/parquée) : on renvoie
+                        self.queue.appendleft(item)
+                        continue
+                    # Socket cassée ou bloquée : on retire l'abonné au lieu d'ignorer l'erreur
+                    logger.info(f"Abonné évincé de la réunion {self.fanout.meeting_id}: {e!r}")
+                    self.fanout.evict(ws)
+                    return
+        except asyncio.CancelledError:
+            pass
+
+    def close(self):
+        self.closed = True
+        self.queue.clear()
+        if self.task is not asyncio.current_task():
+            self.task.cancel()
+
+
+class MeetingFanout:
+    """
+    Diffusion d'une réunion : chaque payload est sérialisé une fois par format
+    (JSON et/ou binaire compact) puis mis en file par abonné.
+    """
+
+    def __init__(self, meeting_id):
+        self.meeting_id = meeting_id
+        self.subscribers: Dict[WebSocket, Subscriber] = {}
+        self.evictions = 0
+        self.codec = CaptionCodec()
+
+    def __len__(self):
+        return len(self.subscribers)
+
+    def __contains__(self, ws):
+        return ws in self.subscribers
+
+    def add(self, ws: WebSocket, fmt: str = FORMAT_JSON):
+        if ws not in self.subscribers:
+            sub = self.subscribers[ws] = Subscriber(self, ws, fmt)
+            if fmt == FORMAT_BINARY:
+                # Table d'internement courante avant toute trame binaire
+                sub.enqueue(False, None, serialize_payload(self.codec.dictionary()))
+            # État courant de la réunion pour un abonné qui arrive en cours de route
+            for provider in snapshot_providers:
+                try:
+                    payload = provider(self.meeting_id)
+                except Exception as e:
+                    logger.error(f"Instantané en erreur pour la réunion {self.meeting_id}: {e}")
+                    continue
+                if payload is not None:
+                    sub.enqueue(False, None, serialize_payload(payload))
+
+    def remove(self, ws: WebSocket):
+        sub = self.subscribers.pop(ws, None)
+        if sub is not None:
+            sub.close()
+        if not self.subscribers and meeting_connections.get(self.meeting_id) is self:
+            del meeting_connections[self.meeting_id]
+            _notify(self.meeting_id, False)
+
+    def replace(self, old_ws, new_ws) -> bool:
+        """Transférer l'abonné (et sa file non envoyée) vers une autre socket."""
+        sub = self.subscribers.pop(old_ws, None)
+        if sub is None:
+            return False
+        if new_ws in self.subscribers:
+            sub.close()
+            return True
+        sub.ws = new_ws
+        self.subscribers[new_ws] = sub
+        sub.wakeup.set()
+        return True
+
+    def evict(self, ws: WebSocket):
+        if ws not in self.subscribers:
+            return
+        self.evictions += 1
+        self.remove(ws)
+        if ws in audio_sockets:
+            # Socket d'un orateur : on coupe ses sous-titres, jamais sa transcription
+            asyncio.ensure_future(_send_lag_notice(ws, self.meeting_id))
+        else:
+            asyncio.ensure_future(_close_quietly(ws))
+
+    def publish(self, payload: dict, json_data: Optional[str] = None):
+        subscribers = list(self.subscribers.items())
+        formats = {sub.format for _, sub in subscribers}
+        if json_data is None and FORMAT_JSON in formats:
+            json_data = serialize_payload(payload)
+        binary_data = dictionary = None
+        if FORMAT_BINARY in formats:
+            binary_data, new_entries = self.codec.encode(payload)
+            if binary_data is None:
+                # Pas d'équivalent binaire (status, événements...) : JSON pour tout le monde
+                json_data = json_data or serialize_payload(payload)
+            elif new_entries:
+                dictionary = serialize_payload(self.codec.dictionary(new_entries))
+
+        is_partial = bool(payload.get("is_partial"))
+        speaker = payload.get("user_id")
+        for ws, sub in subscribers:
+            if sub.format == FORMAT_BINARY and binary_data is not None:
+                if dictionary is not None:
+                    sub.enqueue(False, None, dictionary)
+                data = binary_data
+            else:
+                data = json_data
+            if not sub.enqueue(is_partial, speaker, data):
+                logger.info(f"Abonné trop lent évincé de la réunion {self.meeting_id}")
+                self.evict(ws)
+
+
+async def _close_quietly(ws: WebSocket):
+    try:
+        # 1013 : "try again later"
+        await ws.close(code=1013)
+    except Exception:
+        pass
+
+
+async def _send_lag_notice(ws: WebSocket, meeting_id):
+    try:
+        await asyncio.wait_for(ws.send_text(serialize_payload({
+            "type": "status",
+            "status": "captions_dropped",
+            "message": "Connexion trop lente : sous-titres interrompus, la transcription continue",
+            "meeting_id": meeting_id,
+        })), timeout=SEND_TIMEOUT)
+    except Exception:
+        pass
+
+
+# meeting_id -> MeetingFanout
+meeting_connections: Dict[int, MeetingFanout] = {}
+# Rappels (meeting_id, ouverte) quand une réunion gagne son premier abonné local
+# ou perd le dernier (utilisé par le backend pub/sub pour ses canaux)
+meeting_listeners: List[Callable] = []
+# Sockets qui portent aussi l'audio d'une session de transcription (tenu à jour par main)
+audio_sockets: Set[WebSocket] = set()
+# provider(meeting_id) -> payload ou None, envoyé à chaque nouvel abonné
+snapshot_providers: List[Callable] = []
+
+
+def _notify(meeting_id, opened: bool):
+    for listener in list(meeting_listeners):
+        try:
+            listener(meeting_id, opened)
+        except Exception as e:
+            logger.error(f"Rappel d'abonnement en erreur pour la réunion {meeting_id}: {e}")
+
+
+def subscribe(meeting_id, ws: WebSocket, fmt: str = FORMAT_JSON) -> MeetingFanout:
+    fanout = meeting_connections.get(meeting_id)
+    if fanout is None:
+        fanout = meeting_connections[meeting_id] = MeetingFanout(meeting_id)
+        _notify(meeting_id, True)
+    fanout.add(ws, fmt)
+    return fanout
+
+
+def unsubscribe(meeting_id, ws: WebSocket):
+    fanout: Optional[MeetingFanout] = meeting_connections.get(meeting_id)
+    if fanout is not None:
+        fanout.remove(ws)
+
+
+def publish(meeting_id, payload: dict, json_data: Optional[str] = None):
+    """
+    Non bloquant : met le message en file pour chaque abonné local de la réunion.
+    json_data : payload déjà sérialisé (message reçu d'un autre worker).
+    """
+    fanout = meeting_connections.get(meeting_id)
+    if fanout is not None:
+        fanout.publish(payload, json_data)
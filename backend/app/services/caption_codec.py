@@ -0,0 +1,198 @@
+# app/services/caption_codec.py
+import struct
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+FORMAT_JSON = "json"
+FORMAT_BINARY = "binary"
+CAPTION_FORMATS = (FORMAT_JSON, FORMAT_BINARY)
+
+MAGIC = 0xCA
+VERSION = 1
+
+FLAG_FINAL = 0x01
+FLAG_PARTIAL = 0x02
+FLAG_DELTA = 0x04
+
+# magic, version, flags, réservé, meeting idx, speaker idx, offset ms depuis epoch
+HEADER = struct.Struct("<BBBBHHI")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+
+# Identifiants internés (réunion, orateur) : entiers tels quels, autres valeurs
+# converties en str et tronquées à MAX_ID_CHARS caractères
+MAX_ID_CHARS = 64
+# Entrées de la table d'internement (index u16)
+MAX_INTERNED = 0xFFFF
+
+
+def negotiate_format(requested) -> str:
+    """Format retenu pour un client ; JSON par défaut."""
+    return requested if requested in CAPTION_FORMATS else FORMAT_JSON
+
+
+def _pack_str(value: str) -> bytes:
+    raw = (value or "").encode("utf-8")
+    # struct.error au-delà de 65535 octets : la trame repart en JSON
+    return _U16.pack(len(raw)) + raw
+
+
+def intern_key(value):
+    """Clé d'internement d'un identifiant fourni par le client (toujours hachable et bornée)."""
+    if value is None or (isinstance(value, int) and not isinstance(value, bool)):
+        return value
+    return str(value)[:MAX_ID_CHARS]
+
+
+def _unpack_str(data: bytes, pos: int) -> Tuple[str, int]:
+    (size,) = _U16.unpack_from(data, pos)
+    pos += _U16.size
+    return data[pos:pos + size].decode("utf-8"), pos + size
+
+
+class CaptionCodec:
+    """
+    Encodeur binaire des sous-titres d'une réunion.
+    Les identifiants (réunion, orateur) sont internés en u16 (voir intern_key) ; la table
+    est partagée par tous les abonnés binaires de la réunion, donc chaque trame n'est
+    encodée qu'une fois. Un payload qui ne tient pas dans la trame (texte de plus de
+    65535 octets, temps négatif...) n'est pas encodé et part en JSON.
+    Trame :
+      en-tête HEADER
+      texte (u16 longueur + utf-8) ; en mode delta : u16 stable_offset, stable, tail
+      finals : u16 n, n x u32 début ms, n x u32 fin ms, n x u8 confiance (0-255),
+               mots joints par "\\n" (u32 longueur + utf-8)
+    """
+
+    def __init__(self):
+        self.epoch = datetime.utcnow()
+        self.ids: Dict = {}
+        self.values: List = []
+
+    def dictionary(self, entries: Optional[List] = None) -> dict:
+        """Message JSON (texte) décrivant la table d'internement, envoyé avant usage."""
+        if entries is None:
+            entries = list(enumerate(self.values))
+        return {
+            "type": "caption_dictionary",
+            "version": VERSION,
+            "epoch_ms": int(self.epoch.replace(tzinfo=timezone.utc).timestamp() * 1000),
+            "ids": [[index, value] for index, value in entries],
+        }
+
+    def _intern(self, value, new_entries: List) -> int:
+        value = intern_key(value)
+        index = self.ids.get(value)
+        if index is None:
+            if len(self.values) >= MAX_INTERNED:
+                raise OverflowError("Table d'internement pleine")
+            index = self.ids[value] = len(self.values)
+            self.values.append(value)
+            new_entries.append((index, value))
+        return index
+
+    def _forget(self, new_entries: List):
+        # Trame abandonnée : ses entrées ne doivent pas rester dans la table sans avoir été envoyées
+        for index, value in reversed(new_entries):
+            del self.ids[value]
+            self.values.pop()
+
+    def _offset_ms(self, payload: dict) -> int:
+        # Les timestamps du pipeline sont en UTC naïf (datetime.utcnow().isoformat())
+        try:
+            moment = datetime.fromisoformat(payload["timestamp"])
+        except (KeyError, TypeError, ValueError):
+            moment = datetime.utcnow()
+        return max(0, int((moment - self.epoch).total_seconds() * 1000))
+
+    def encode(self, payload: dict) -> Tuple[Optional[bytes], List]:
+        """
+        Encoder un payload "transcription". Retourne (trame, nouvelles entrées de la table),
+        ou (None, []) si le payload n'a pas d'équivalent binaire ou ne tient pas dans la trame
+        (il reste en JSON).
+        """
+        if payload.get("type") != "transcription":
+            return None, []
+        new_entries: List = []
+        try:
+            return self._encode(payload, new_entries), new_entries
+        except (struct.error, OverflowError, TypeError, ValueError, AttributeError):
+            self._forget(new_entries)
+            return None, []
+
+    def _encode(self, payload: dict, new_entries: List) -> bytes:
+        meeting_idx = self._intern(payload.get("meeting_id"), new_entries)
+        speaker_idx = self._intern(payload.get("user_id"), new_entries)
+
+        flags = 0
+        if payload.get("final"):
+            flags |= FLAG_FINAL
+        if payload.get("is_partial"):
+            flags |= FLAG_PARTIAL
+        if payload.get("delta"):
+            flags |= FLAG_DELTA
+
+        parts = [HEADER.pack(MAGIC, VERSION, flags, 0, meeting_idx, speaker_idx, self._offset_ms(payload))]
+        if flags & FLAG_DELTA:
+            parts.append(_U16.pack(payload.get("stable_offset", 0)))
+            parts.append(_pack_str(payload.get("stable", "")))
+            parts.append(_pack_str(payload.get("tail", "")))
+        else:
+            parts.append(_pack_str(payload.get("text", "")))
+
+        if flags & FLAG_FINAL:
+            words = payload.get("words") or []
+            n = len(words)
+            parts.append(_U16.pack(n))
+            if n:
+                parts.append(struct.pack(f"<{n}I", *(int(w.get("start", 0) * 1000) for w in words)))
+                parts.append(struct.pack(f"<{n}I", *(int(w.get("end", 0) * 1000) for w in words)))
+                parts.append(bytes(min(255, max(0, int(w.get("conf", 0) * 255))) for w in words))
+                raw = "\n".join(w.get("word", "") for w in words).encode("utf-8")
+                parts.append(_U32.pack(len(raw)) + raw)
+        return b"".join(parts)
+
+
+def decode_frame(data: bytes, values: List, epoch_ms: int = 0) -> dict:
+    """Décodage de référence (tests, clients Python)."""
+    magic, version, flags, _, meeting_idx, speaker_idx, offset_ms = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Trame de sous-titre inconnue")
+    pos = HEADER.size
+    payload = {
+        "type": "transcription",
+        "meeting_id": values[meeting_idx],
+        "user_id": values[speaker_idx],
+        "final": bool(flags & FLAG_FINAL),
+        "timestamp_ms": epoch_ms + offset_ms,
+    }
+    if flags & FLAG_PARTIAL:
+        payload["is_partial"] = True
+    if flags & FLAG_DELTA:
+        (payload["stable_offset"],) = _U16.unpack_from(data, pos)
+        payload["delta"] = True
+        payload["stable"], pos = _unpack_str(data, pos + _U16.size)
+        payload["tail"], pos = _unpack_str(data, pos)
+    else:
+        payload["text"], pos = _unpack_str(data, pos)
+
+    if flags & FLAG_FINAL:
+        (n,) = _U16.unpack_from(data, pos)
+        pos += _U16.size
+        words = []
+        if n:
+            starts = struct.unpack_from(f"<{n}I", data, pos)
+            pos += 4 * n
+            ends = struct.unpack_from(f"<{n}I", data, pos)
+            pos += 4 * n
+            confs = data[pos:pos + n]
+            pos += n
+            (size,) = _U32.unpack_from(data, pos)
+            pos += _U32.size
+            texts = data[pos:pos + size].decode("utf-8").split("\n")
+            words = [
+                {"word": t, "start": s / 1000, "end": e / 1000, "conf": c / 255}
+                for t, s, e, c in zip(texts, starts, ends, confs)
+            ]
+        payload["words"] = words
+    return payload
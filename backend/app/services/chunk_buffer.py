@@ -0,0 +1,124 @@
+# app/services/chunk_buffer.py
+import os
+import time
+from typing import List, Optional
+
+# Durée d'une trame envoyée au recognizer : moins d'appels Python -> C et de résultats à parser
+COALESCE_FRAME_MS = int(os.environ.get("COALESCE_FRAME_MS", 200))
+# Au plus tard après ce délai, l'audio en attente est décodé même si la trame est incomplète
+COALESCE_MAX_LATENCY_MS = int(os.environ.get("COALESCE_MAX_LATENCY_MS", 250))
+
+
+class PcmRingBuffer:
+    """
+    Tampon circulaire pré-alloué (bytearray + memoryview).
+    Les chunks entrants y sont copiés une fois ; aucune concaténation de bytes.
+    """
+
+    def __init__(self, capacity: int):
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buf)
+
+    def _grow(self, needed: int):
+        # Rare : un client envoie un chunk plus gros que la capacité restante
+        capacity = self.capacity
+        while capacity - self._size < needed:
+            capacity *= 2
+        data = self.read(self._size)
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._view[:len(data)] = data
+        self._start = 0
+        self._size = len(data)
+
+    def write(self, data):
+        n = len(data)
+        if n > self.capacity - self._size:
+            self._grow(n)
+        src = memoryview(data)
+        end = (self._start + self._size) % self.capacity
+        first = min(n, self.capacity - end)
+        self._view[end:end + first] = src[:first]
+        if first < n:
+            self._view[:n - first] = src[first:]
+        self._size += n
+
+    def read(self, n: int) -> bytes:
+        """Extraire n octets (une seule copie, deux si la zone fait le tour du tampon)."""
+        n = min(n, self._size)
+        first = min(n, self.capacity - self._start)
+        if first == n:
+            data = bytes(self._view[self._start:self._start + n])
+        else:
+            data = b"".join((self._view[self._start:], self._view[:n - first]))
+        self._start = (self._start + n) % self.capacity
+        self._size -= n
+        return data
+
+
+class ChunkCoalescer:
+    """
+    Regroupe les chunks PCM d'une session en trames de durée fixe avant décodage.
+    timeout() indique au plus tard quand flush() doit être appelé pour qu'un
+    orateur discret ne reste pas bloqué dans le tampon.
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = COALESCE_FRAME_MS,
+                 max_latency_ms: int = COALESCE_MAX_LATENCY_MS):
+        self.frame_ms = frame_ms
+        self.frame_bytes = max(2, sample_rate * frame_ms // 1000 * 2)
+        self.max_latency = max_latency_ms / 1000.0
+        self.ring = PcmRingBuffer(self.frame_bytes * 4)
+        self._oldest: Optional[float] = None
+
+        self.chunks_in = 0
+        self.frames_out = 0
+
+    def push(self, data, now: Optional[float] = None) -> List[bytes]:
+        """Ajouter un chunk ; retourne les trames complètes prêtes à décoder."""
+        if not data:
+            return []
+        self.chunks_in += 1
+        if self._oldest is None:
+            self._oldest = time.monotonic() if now is None else now
+        self.ring.write(data)
+        frames = []
+        while len(self.ring) >= self.frame_bytes:
+            frames.append(self.ring.read(self.frame_bytes))
+        self.frames_out += len(frames)
+        if frames:
+            # Le reste (s'il existe) est arrivé avec le dernier chunk
+            self._oldest = (time.monotonic() if now is None else now) if len(self.ring) else None
+        return frames
+
+    def flush(self) -> Optional[bytes]:
+        """Vider l'audio en attente (trame incomplète), aligné sur l'échantillon."""
+        self._oldest = None
+        pending = len(self.ring) - len(self.ring) % 2
+        if not pending:
+            return None
+        self.frames_out += 1
+        return self.ring.read(pending)
+
+    def timeout(self, now: Optional[float] = None) -> Optional[float]:
+        """Secondes avant le flush forcé, ou None si rien n'est en attente."""
+        if self._oldest is None:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._oldest + self.max_latency - now)
+
+    def stats(self) -> dict:
+        return {
+            "chunks_in": self.chunks_in,
+            "frames_out": self.frames_out,
+            "frame_ms": self.frame_ms,
+        }
@@ -0,0 +1,192 @@
+# app/services/meeting_events.py
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional, Set
+
+from app.services import pubsub
+
+logger = logging.getLogger(__name__)
+
+MEETING_STARTED = "meeting_started"
+MEETING_ENDED = "meeting_ended"
+TRANSCRIPTION_STARTED = "transcription_started"
+TRANSCRIPTION_STOPPED = "transcription_stopped"
+
+EVENT_TYPES = (MEETING_STARTED, MEETING_ENDED, TRANSCRIPTION_STARTED, TRANSCRIPTION_STOPPED)
+
+
+class MeetingEvent:
+    def __init__(self, event: str, meeting_id, data: Optional[dict] = None, timestamp: Optional[str] = None):
+        self.event = event
+        self.meeting_id = meeting_id
+        self.data = data or {}
+        self.timestamp = timestamp or datetime.utcnow().isoformat()
+
+    def to_payload(self) -> dict:
+        return {
+            "type": "meeting_event",
+            "event": self.event,
+            "meeting_id": self.meeting_id,
+            "timestamp": self.timestamp,
+            **self.data,
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "MeetingEvent":
+        data = {k: v for k, v in payload.items() if k not in ("type", "event", "meeting_id", "timestamp")}
+        return cls(payload["event"], payload["meeting_id"], data, payload.get("timestamp"))
+
+
+class EventWatch:
+    """Événements d'une réunion reçus par une connexion (file locale, lue dans la boucle asyncio)."""
+
+    def __init__(self, bus: "MeetingEventBus", meeting_id):
+        self.bus = bus
+        self.meeting_id = meeting_id
+        self._events: Deque[MeetingEvent] = deque()
+        self._ready = asyncio.Event()
+
+    def _deliver(self, event: MeetingEvent):
+        self._events.append(event)
+        self._ready.set()
+
+    async def get(self) -> MeetingEvent:
+        while not self._events:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._events.popleft()
+
+    def close(self):
+        self.bus._remove(self)
+
+
+class MessageSource:
+    """
+    Messages de la socket et événements de la réunion d'une connexion, le premier arrivé.
+    Les attentes (réception, événement) sont longues : elles survivent aux timeouts et
+    à la victoire de l'autre côté, et ne sont remplacées qu'une fois consommées. Rien
+    n'est annulé sur le chemin audio : une seule tâche de réception par message entrant.
+    """
+
+    def __init__(self, websocket, watch: EventWatch):
+        self.websocket = websocket
+        self.watch = watch
+        self._receive: Optional[asyncio.Future] = None
+        self._event: Optional[asyncio.Future] = None
+
+    async def next(self, timeout: Optional[float] = None):
+        """Retourne ("message", msg), ("event", MeetingEvent) ou ("timeout", None)."""
+        if self._receive is None:
+            self._receive = asyncio.ensure_future(self.websocket.receive())
+        if self._event is None:
+            self._event = asyncio.ensure_future(self.watch.get())
+        if not self._receive.done() and not self._event.done():
+            await asyncio.wait({self._receive, self._event}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        # Message d'abord si les deux sont prêts : l'événement reste en attente pour l'appel suivant
+        if self._receive.done():
+            receive, self._receive = self._receive, None
+            return "message", receive.result()
+        if self._event.done():
+            event, self._event = self._event, None
+            return "event", event.result()
+        return "timeout", None
+
+    def close(self):
+        for task in (self._receive, self._event):
+            if task is not None:
+                task.cancel()
+        self._receive = self._event = None
+
+
+async def wait_for_transcription(source: MessageSource) -> bool:
+    """
+    Garder un client en attente jusqu'au démarrage de la transcription par l'organisateur.
+    Audio et messages de contrôle sont ignorés entre-temps. Retourne False si le client
+    est parti ou si la réunion est terminée.
+    """
+    while True:
+        kind, item = await source.next()
+        if kind == "message":
+            if item is None or item.get("type") == "websocket.disconnect":
+                return False
+        elif kind == "event":
+            if item.event == TRANSCRIPTION_STARTED:
+                return True
+            if item.event == MEETING_ENDED:
+                return False
+
+
+class MeetingEventBus:
+    """
+    Bus des événements de cycle de vie des réunions (démarrage, fin, transcription
+    activée/désactivée). Les routers publient depuis leurs threads ; la livraison
+    se fait toujours dans la boucle asyncio : aux connexions WebSocket qui
+    surveillent la réunion, aux handlers enregistrés, et aux abonnés de la
+    réunion (et aux autres workers) via le backend de diffusion.
+    """
+
+    def __init__(self):
+        self._watches: Dict[object, Set[EventWatch]] = {}
+        self._handlers: Dict[str, List[Callable]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published = 0
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def watch(self, meeting_id) -> EventWatch:
+        watch = EventWatch(self, meeting_id)
+        self._watches.setdefault(meeting_id, set()).add(watch)
+        return watch
+
+    def _remove(self, watch: EventWatch):
+        watches = self._watches.get(watch.meeting_id)
+        if watches is not None:
+            watches.discard(watch)
+            if not watches:
+                del self._watches[watch.meeting_id]
+
+    def on(self, event: str, handler: Callable):
+        """handler(event: MeetingEvent), fonction ou coroutine, appelé dans la boucle asyncio."""
+        self._handlers.setdefault(event, []).append(handler)
+
+    def publish(self, event: str, meeting_id, **data):
+        """Publier un événement ; utilisable depuis un endpoint synchrone (threadpool)."""
+        item = MeetingEvent(event, meeting_id, data)
+        self.published += 1
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            logger.debug(f"Bus d'événements non démarré, {event} ignoré pour la réunion {meeting_id}")
+            return
+        try:
+            in_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            in_loop = False
+        if in_loop:
+            self._dispatch(item, True)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, item, True)
+
+    def dispatch_remote(self, meeting_id, payload: dict):
+        """Événement publié par un autre worker (reçu via le broker de diffusion)."""
+        if payload.get("type") == "meeting_event" and payload.get("event") in EVENT_TYPES:
+            self._dispatch(MeetingEvent.from_payload(payload), False)
+
+    def _dispatch(self, event: MeetingEvent, propagate: bool):
+        for watch in list(self._watches.get(event.meeting_id, ())):
+            watch._deliver(event)
+        for handler in self._handlers.get(event.event, ()):
+            try:
+                result = handler(event)
+                if asyncio.iscoroutine(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                logger.error(f"Handler {event.event} en erreur pour la réunion {event.meeting_id}: {e}", exc_info=True)
+        if propagate:
+            asyncio.ensure_future(pubsub.broadcast_backend.publish(event.meeting_id, event.to_payload()))
+
+
+meeting_events = MeetingEventBus()
+pubsub.remote_listeners.append(meeting_events.dispatch_remote)
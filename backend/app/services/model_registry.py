@@ -0,0 +1,289 @@
+# app/services/model_registry.py
+import logging
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.services.vosk_service import (
+    ModelLoader, VoskTranscriber, model_loader,
+    MODEL_STATE_IDLE, MODEL_STATE_READY,
+)
+
+logger = logging.getLogger(__name__)
+
+# Modèles explicites : "fr=models/vosk-model-small-fr-0.22,en=...,fr:large=models/vosk-model-fr-0.22"
+VOSK_MODELS = os.environ.get("VOSK_MODELS", "")
+# Dossier parcouru pour découvrir les modèles (vosk-model-[small-]<langue>-...)
+VOSK_MODELS_DIR = os.environ.get("VOSK_MODELS_DIR", "models")
+DEFAULT_LANGUAGE = os.environ.get("VOSK_DEFAULT_LANGUAGE", "fr")
+# Taille préférée quand la réunion n'en demande pas : "small" (chargement rapide) ou "large"
+DEFAULT_TIER = os.environ.get("VOSK_DEFAULT_TIER", "small")
+# Mémoire résidente totale des modèles (Mo, 0 = pas de limite) ; au-delà, éviction LRU des modèles inutilisés
+MODEL_MEMORY_BUDGET_MB = float(os.environ.get("VOSK_MODEL_MEMORY_BUDGET_MB", 0))
+
+TIER_SMALL = "small"
+TIER_LARGE = "large"
+
+_MODEL_DIR_RE = re.compile(r"^vosk-model-(?:(small)-)?([a-z]{2,3})(?:-[a-z]{2})?(?:-|$)")
+
+
+def normalize_language(language: Optional[str]) -> str:
+    """"fr-FR", "fr_FR", "FR" -> "fr"."""
+    if not language:
+        return DEFAULT_LANGUAGE
+    return re.split(r"[-_]", str(language).strip().lower(), 1)[0] or DEFAULT_LANGUAGE
+
+
+def parse_model_dir(name: str):
+    """(langue, taille) d'après le nom d'un dossier de modèle Vosk, ou None."""
+    match = _MODEL_DIR_RE.match(os.path.basename(os.path.normpath(name)))
+    if not match:
+        return None
+    return match.group(2), TIER_SMALL if match.group(1) else TIER_LARGE
+
+
+def directory_bytes(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class ModelEntry:
+    def __init__(self, language: str, tier: str, path: Optional[str], loader: Optional[ModelLoader] = None):
+        self.language = language
+        self.tier = tier
+        self.path = path
+        self.loader = loader or ModelLoader(model_path=path)
+        self._disk_bytes: Optional[int] = None
+        self.users = 0
+        self.last_used = 0.0
+        self.loads = 0
+        self.evictions = 0
+        self.pinned = False
+
+    @property
+    def key(self) -> str:
+        return f"{self.language}:{self.tier}"
+
+    @property
+    def state(self) -> str:
+        return self.loader.state
+
+    @property
+    def resident_bytes(self) -> int:
+        """Mémoire résidente du modèle chargé (mesurée au chargement, sinon taille sur disque)."""
+        if self.state != MODEL_STATE_READY:
+            return 0
+        return self.loader.resident_bytes or self.disk_bytes()
+
+    def disk_bytes(self) -> int:
+        if self._disk_bytes is None:
+            self._disk_bytes = directory_bytes(self.path) if self.path and os.path.isdir(self.path) else 0
+        return self._disk_bytes
+
+    def estimated_bytes(self) -> int:
+        """Coût attendu d'un (re)chargement : dernière mesure, sinon taille sur disque."""
+        return self.loader.resident_bytes or self.disk_bytes()
+
+    def stats(self) -> dict:
+        return {
+            "language": self.language,
+            "tier": self.tier,
+            "path": self.path or getattr(self.loader.transcriber, "model_path", None),
+            "state": self.state,
+            "resident_mb": round(self.resident_bytes / (1024 * 1024), 1),
+            "users": self.users,
+            "idle_seconds": round(time.monotonic() - self.last_used, 1) if self.last_used and not self.users else None,
+            "pinned": self.pinned,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "timings": self.loader.timings,
+        }
+
+
+class ModelRegistry:
+    """
+    Modèles Vosk disponibles par langue (et taille), chargés à la demande.
+    Le modèle de la langue par défaut est celui de vosk_service.model_loader,
+    épinglé (jamais évincé). Les autres sont libérés du moins récemment utilisé
+    au plus récent, s'ils n'ont plus de session, quand un chargement ferait
+    dépasser MODEL_MEMORY_BUDGET_MB. Thread-safe ; un chargement à la fois
+    pour que la mesure de mémoire résidente reste attribuable.
+    """
+
+    def __init__(self, budget_mb: float = MODEL_MEMORY_BUDGET_MB):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.entries: Dict[str, ModelEntry] = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._evict_listeners: List[Callable[[VoskTranscriber], None]] = []
+        self._discover()
+
+    # --- Configuration ---
+
+    def _add(self, language: str, tier: str, path: Optional[str]):
+        key = f"{language}:{tier}"
+        if key not in self.entries:
+            self.entries[key] = ModelEntry(language, tier, path)
+
+    def _discover(self):
+        for item in filter(None, (part.strip() for part in VOSK_MODELS.split(","))):
+            spec, _, path = item.partition("=")
+            language, _, tier = spec.partition(":")
+            parsed = parse_model_dir(path)
+            self._add(normalize_language(language), tier or (parsed[1] if parsed else DEFAULT_TIER), path)
+        if os.path.isdir(VOSK_MODELS_DIR):
+            for name in sorted(os.listdir(VOSK_MODELS_DIR)):
+                path = os.path.join(VOSK_MODELS_DIR, name)
+                parsed = parse_model_dir(name)
+                if parsed and os.path.isdir(path):
+                    self._add(parsed[0], parsed[1], path)
+
+        # Modèle par défaut : le chargeur historique (VOSK_MODEL_PATH ou chemins connus)
+        default_path = model_loader.model_path
+        parsed = parse_model_dir(default_path) if default_path else None
+        if default_path and parsed and parsed[0] == DEFAULT_LANGUAGE:
+            default = self.entries.get(f"{parsed[0]}:{parsed[1]}")
+        else:
+            default = self._pick(DEFAULT_LANGUAGE, None)
+        if default is None:
+            tier = parsed[1] if parsed else DEFAULT_TIER
+            default = self.entries[f"{DEFAULT_LANGUAGE}:{tier}"] = ModelEntry(DEFAULT_LANGUAGE, tier, default_path)
+        if model_loader.model_path is None:
+            model_loader.model_path = default.path
+        else:
+            default.path = model_loader.model_path
+        default.loader = model_loader
+        default.pinned = True
+        self.default = default
+
+    def _pick(self, language: str, tier: Optional[str]) -> Optional[ModelEntry]:
+        candidates = [e for e in self.entries.values() if e.language == language]
+        if tier:
+            candidates = [e for e in candidates if e.tier == tier] or candidates
+        if not candidates:
+            return None
+        # Déjà chargé d'abord, puis la taille préférée
+        return min(candidates, key=lambda e: (e.state != MODEL_STATE_READY, e.tier != DEFAULT_TIER))
+
+    def resolve(self, language: Optional[str] = None, tier: Optional[str] = None) -> ModelEntry:
+        """Modèle pour une langue ; repli sur le modèle par défaut si la langue n'est pas installée."""
+        return self._pick(normalize_language(language), tier) or self.default
+
+    def on_evict(self, listener: Callable[[VoskTranscriber], None]):
+        """listener(transcriber) avant la libération d'un modèle (vider les pools de recognizers)."""
+        self._evict_listeners.append(listener)
+
+    # --- Chargement / éviction ---
+
+    def loaded_bytes(self) -> int:
+        return sum(e.resident_bytes for e in self.entries.values())
+
+    def _evict_for(self, incoming: ModelEntry):
+        if not self.budget_bytes:
+            return
+        needed = incoming.estimated_bytes()
+        with self._lock:
+            idle = sorted(
+                (e for e in self.entries.values()
+                 if e is not incoming and not e.pinned and not e.users and e.state == MODEL_STATE_READY),
+                key=lambda e: e.last_used,
+            )
+        for entry in idle:
+            if self.loaded_bytes() + needed <= self.budget_bytes:
+                break
+            self.evict(entry)
+        if self.loaded_bytes() + needed > self.budget_bytes:
+            logger.warning(
+                f"Budget mémoire des modèles dépassé pour charger {incoming.key} "
+                f"({(self.loaded_bytes() + needed) // (1024 * 1024)} Mo > {self.budget_bytes // (1024 * 1024)} Mo)"
+            )
+
+    def evict(self, entry: ModelEntry) -> bool:
+        with self._lock:
+            if entry.users or entry.pinned:
+                return False
+            transcriber = entry.loader.transcriber
+            if transcriber is None or not entry.loader.unload():
+                return False
+            entry.evictions += 1
+            freed = entry.estimated_bytes()
+        for listener in self._evict_listeners:
+            try:
+                listener(transcriber)
+            except Exception as e:
+                logger.error(f"Éviction de {entry.key}: listener en erreur: {e}")
+        logger.info(f"♻️ Modèle {entry.key} libéré ({freed // (1024 * 1024)} Mo)")
+        return True
+
+    def load(self, entry: ModelEntry) -> VoskTranscriber:
+        """Chargement synchrone (thread de l'executor ou worker ASR). Lève RuntimeError en cas d'échec."""
+        return self._load(entry)[0]
+
+    def _load(self, entry: ModelEntry) -> Tuple[VoskTranscriber, bool]:
+        """(transcriber, True si c'est cet appel qui a chargé le modèle)."""
+        loaded = False
+        if entry.state != MODEL_STATE_READY:
+            with self._load_lock:
+                if entry.state != MODEL_STATE_READY:
+                    self._evict_for(entry)
+                    entry.loader.load()
+                    if entry.state == MODEL_STATE_READY:
+                        entry.loads += 1
+                        loaded = True
+        transcriber = entry.loader.transcriber
+        if transcriber is None:
+            raise RuntimeError(f"Modèle Vosk {entry.key} non chargé ({entry.loader.error})")
+        return transcriber, loaded
+
+    def preload(self, language: Optional[str] = None, tier: Optional[str] = None):
+        """Charger en arrière-plan (démarrage d'une réunion) sans bloquer l'appelant."""
+        entry = self.resolve(language, tier)
+        if entry.state == MODEL_STATE_IDLE:
+            threading.Thread(target=self._preload, args=(entry,), name=f"vosk-preload-{entry.key}", daemon=True).start()
+
+    def _preload(self, entry: ModelEntry):
+        try:
+            self.load(entry)
+        except Exception as e:
+            logger.error(f"Préchargement du modèle {entry.key} impossible: {e}")
+
+    # --- Sessions ---
+
+    def acquire(self, language: Optional[str] = None, tier: Optional[str] = None):
+        """
+        (entry, transcriber, loaded) pour une nouvelle session ; charge le modèle si besoin.
+        loaded : True si cette session a payé le chargement (mesures mémoire faussées).
+        """
+        entry = self.resolve(language, tier)
+        with self._lock:
+            entry.users += 1
+        try:
+            transcriber, loaded = self._load(entry)
+        except Exception:
+            self.release(entry)
+            raise
+        return entry, transcriber, loaded
+
+    def release(self, entry: ModelEntry):
+        with self._lock:
+            entry.users = max(0, entry.users - 1)
+            entry.last_used = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "default": self.default.key,
+            "budget_mb": self.budget_bytes // (1024 * 1024) or None,
+            "resident_mb": round(self.loaded_bytes() / (1024 * 1024), 1),
+            "models": {key: entry.stats() for key, entry in sorted(self.entries.items())},
+        }
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,133 @@
+# app/services/partial_policy.py
+import os
+import time
+from typing import List, Optional
+
+# Valeurs par défaut, surchargeables par réunion via /meetings/{id}/caption-settings
+DEFAULT_PARTIAL_MAX_RATE = float(os.environ.get("PARTIAL_MAX_RATE", 5))  # partiels / seconde / session
+DEFAULT_PARTIAL_MODE = os.environ.get("PARTIAL_MODE", "full")  # "full" | "delta"
+
+PARTIAL_MODES = ("full", "delta")
+
+
+class PartialPolicy:
+    """Politique d'émission des résultats partiels d'une réunion."""
+
+    def __init__(
+        self,
+        max_rate: float = DEFAULT_PARTIAL_MAX_RATE,
+        skip_unchanged: bool = True,
+        mode: str = DEFAULT_PARTIAL_MODE,
+        partial_words: bool = True,
+        enabled: bool = True,
+    ):
+        if mode not in PARTIAL_MODES:
+            raise ValueError(f"Mode de partiels inconnu: {mode}")
+        self.max_rate = max_rate
+        self.skip_unchanged = skip_unchanged
+        self.mode = mode
+        # SetPartialWords : timings par mot dans les partiels (coûteux, rarement utile en direct)
+        self.partial_words = partial_words
+        self.enabled = enabled
+
+    def to_dict(self) -> dict:
+        return {
+            "max_rate": self.max_rate,
+            "skip_unchanged": self.skip_unchanged,
+            "mode": self.mode,
+            "partial_words": self.partial_words,
+            "enabled": self.enabled,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PartialPolicy":
+        """Réglages enregistrés par to_dict() ; les champs absents gardent leur valeur par défaut."""
+        fields = ("max_rate", "skip_unchanged", "mode", "partial_words", "enabled")
+        return cls(**{k: data[k] for k in fields if k in data})
+
+
+def get_partial_policy(meeting) -> PartialPolicy:
+    """
+    Politique de la réunion : les réglages posés par l'organisateur sont enregistrés
+    sur la ligne Meeting, donc vus par tous les workers.
+    """
+    settings = getattr(meeting, "caption_settings", None)
+    return PartialPolicy.from_dict(settings) if settings else PartialPolicy()
+
+
+def set_partial_policy(meeting, policy: PartialPolicy):
+    """Enregistrer les réglages sur la réunion (dans la transaction de l'appelant, qui commit)."""
+    meeting.caption_settings = policy.to_dict()
+
+
+def _common_prefix_len(a: List[str], b: List[str]) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class PartialThrottle:
+    """
+    État par session : limite de débit, suppression des doublons et mode delta.
+    due() est consulté AVANT le décodage pour éviter d'appeler PartialResult()
+    quand aucun partiel ne sera émis.
+    """
+
+    def __init__(self, policy: PartialPolicy):
+        self.policy = policy
+        self.min_interval = 1.0 / policy.max_rate if policy.max_rate > 0 else 0.0
+        self.last_emit = 0.0
+        self.last_text = None
+        self.prev_tokens: List[str] = []
+        self.committed = 0
+        self.emitted = 0
+        self.skipped = 0
+
+    def due(self, now: Optional[float] = None) -> bool:
+        if not self.policy.enabled:
+            return False
+        now = time.monotonic() if now is None else now
+        if now - self.last_emit >= self.min_interval:
+            return True
+        self.skipped += 1
+        return False
+
+    def reset(self):
+        """Appelé à chaque résultat final : l'énoncé suivant repart de zéro."""
+        self.last_text = None
+        self.prev_tokens = []
+        self.committed = 0
+
+    def partial_fields(self, text: str, now: Optional[float] = None) -> Optional[dict]:
+        """
+        Champs du payload partiel à diffuser, ou None s'il n'y a rien à envoyer.
+        En mode delta : les mots identiques dans deux partiels consécutifs sont
+        considérés stables ; on n'envoie que les nouveaux mots stables (à placer
+        à stable_offset) et la queue instable.
+        """
+        if not text:
+            return None
+        if self.policy.skip_unchanged and text == self.last_text:
+            self.skipped += 1
+            return None
+        self.last_text = text
+        self.last_emit = time.monotonic() if now is None else now
+        self.emitted += 1
+
+        if self.policy.mode != "delta":
+            return {"text": text}
+
+        tokens = text.split()
+        stable = _common_prefix_len(self.prev_tokens, tokens)
+        offset = min(self.committed, stable)
+        fields = {
+            "delta": True,
+            "stable_offset": offset,
+            "stable": " ".join(tokens[offset:stable]),
+            "tail": " ".join(tokens[stable:]),
+        }
+        self.prev_tokens = tokens
+        self.committed = stable
+        return fields
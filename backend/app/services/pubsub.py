@@ -0,0 +1,272 @@
+# app/services/pubsub.py
+import abc
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections import defaultdict
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+from app.services import broadcaster
+from app.services.broadcaster import serialize_payload
+
+logger = logging.getLogger(__name__)
+
+# "inprocess" (défaut, un seul worker), "redis" (plusieurs workers / hôtes), "memory" (tests)
+BROADCAST_BACKEND = os.environ.get("BROADCAST_BACKEND", "inprocess")
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+# Regroupement des publications vers le broker
+PUBSUB_BATCH_MS = int(os.environ.get("PUBSUB_BATCH_MS", 5))
+PUBSUB_BATCH_SIZE = int(os.environ.get("PUBSUB_BATCH_SIZE", 100))
+PUBSUB_CHANNEL_PREFIX = os.environ.get("PUBSUB_CHANNEL_PREFIX", "meeting:")
+
+# Rappels (meeting_id, payload) pour les messages reçus d'un autre worker
+remote_listeners: List[Callable] = []
+
+
+class BroadcastBackend(abc.ABC):
+    """Diffusion des sous-titres d'une réunion (interface)."""
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    @abc.abstractmethod
+    async def publish(self, meeting_id, payload: dict):
+        """Livrer le payload aux abonnés de la réunion (locaux et, selon le backend, distants)."""
+
+    async def publish_internal(self, meeting_id, payload: dict):
+        """
+        Message entre workers (remote_listeners des autres process), jamais livré aux
+        abonnés. Un seul process : rien à transmettre.
+        """
+
+
+class InProcessBackend(BroadcastBackend):
+    """Comportement historique : seuls les abonnés de ce process reçoivent les messages."""
+
+    async def publish(self, meeting_id, payload: dict):
+        broadcaster.publish(meeting_id, payload)
+
+
+# ---------------- Brokers ----------------
+
+class BrokerConnection(abc.ABC):
+    """Connexion à un broker pub/sub (interface minimale utilisée par BrokerBackend)."""
+
+    @abc.abstractmethod
+    async def publish_many(self, messages: List[Tuple[str, str]]):
+        """Publier des (canal, données) en un aller-retour."""
+
+    @abc.abstractmethod
+    async def subscribe(self, channel: str):
+        """Recevoir les messages du canal dans listen()."""
+
+    @abc.abstractmethod
+    async def unsubscribe(self, channel: str):
+        """Ne plus recevoir les messages du canal."""
+
+    @abc.abstractmethod
+    def listen(self) -> AsyncIterator[Tuple[str, str]]:
+        """Itérateur asynchrone des (canal, données) reçus."""
+
+    async def close(self):
+        pass
+
+
+class MemoryBroker:
+    """
+    Broker en mémoire, pour les tests : plusieurs BrokerBackend connectés au même
+    MemoryBroker se comportent comme des workers distincts derrière Redis.
+    """
+
+    def __init__(self):
+        self.channels: Dict[str, Set["MemoryBrokerConnection"]] = defaultdict(set)
+
+    def connect(self) -> "MemoryBrokerConnection":
+        return MemoryBrokerConnection(self)
+
+
+class MemoryBrokerConnection(BrokerConnection):
+    def __init__(self, broker: MemoryBroker):
+        self.broker = broker
+        self.inbox: asyncio.Queue = asyncio.Queue()
+
+    async def publish_many(self, messages: List[Tuple[str, str]]):
+        for channel, data in messages:
+            for conn in list(self.broker.channels.get(channel, ())):
+                conn.inbox.put_nowait((channel, data))
+
+    async def subscribe(self, channel: str):
+        self.broker.channels[channel].add(self)
+
+    async def unsubscribe(self, channel: str):
+        self.broker.channels.get(channel, set()).discard(self)
+
+    async def listen(self):
+        while True:
+            yield await self.inbox.get()
+
+    async def close(self):
+        for conns in self.broker.channels.values():
+            conns.discard(self)
+
+
+class RedisBrokerConnection(BrokerConnection):
+    """Redis PUBLISH/SUBSCRIBE (paquet redis>=4.2, pour redis.asyncio)."""
+
+    def __init__(self, url: str = REDIS_URL):
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError("BROADCAST_BACKEND=redis nécessite le paquet 'redis>=4.2' (pip install -r requirements.txt)") from e
+        self.client = redis_asyncio.from_url(url)
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+
+    async def publish_many(self, messages: List[Tuple[str, str]]):
+        async with self.client.pipeline(transaction=False) as pipe:
+            for channel, data in messages:
+                pipe.publish(channel, data)
+            await pipe.execute()
+
+    async def subscribe(self, channel: str):
+        await self.pubsub.subscribe(channel)
+
+    async def unsubscribe(self, channel: str):
+        await self.pubsub.unsubscribe(channel)
+
+    async def listen(self):
+        while True:
+            if not self.pubsub.subscribed:
+                # get_message() échoue tant qu'aucun canal n'est souscrit
+                await asyncio.sleep(0.05)
+                continue
+            message = await self.pubsub.get_message(timeout=1.0)
+            if message is None:
+                continue
+            channel, data = message["channel"], message["data"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            if isinstance(data, bytes):
+                data = data.decode("utf-8")
+            yield channel, data
+
+    async def close(self):
+        await self.pubsub.close()
+        await self.client.close()
+
+
+# ---------------- Backend broker ----------------
+
+class BrokerBackend(BroadcastBackend):
+    """
+    Diffusion inter-workers via un broker pub/sub.
+    - publication : livraison locale immédiate, puis envoi groupé au broker
+      (un lot toutes les PUBSUB_BATCH_MS ms ou PUBSUB_BATCH_SIZE messages) ;
+    - réception : un canal par réunion, souscrit tant que ce worker a au moins
+      un abonné local ; les messages émis par ce worker sont ignorés au retour.
+    Enveloppe : "<origine>\\n<payload JSON>", le JSON est réutilisé tel quel par le fan-out.
+    """
+
+    def __init__(self, connection: BrokerConnection):
+        self.connection = connection
+        self.origin = uuid.uuid4().hex[:12]
+        self._batch: List[Tuple[str, str]] = []
+        self._flush_wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self.published = 0
+        self.received = 0
+
+    @staticmethod
+    def channel(meeting_id) -> str:
+        return f"{PUBSUB_CHANNEL_PREFIX}{meeting_id}"
+
+    async def start(self):
+        self._flush_wakeup = asyncio.Event()
+        broadcaster.meeting_listeners.append(self._on_local_meeting)
+        # Réunions déjà ouvertes localement
+        for meeting_id in list(broadcaster.meeting_connections):
+            await self.connection.subscribe(self.channel(meeting_id))
+        self._tasks = [asyncio.create_task(self._flusher()), asyncio.create_task(self._listener())]
+
+    async def stop(self):
+        if self._on_local_meeting in broadcaster.meeting_listeners:
+            broadcaster.meeting_listeners.remove(self._on_local_meeting)
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        await self._flush()
+        await self.connection.close()
+
+    def _on_local_meeting(self, meeting_id, opened: bool):
+        channel = self.channel(meeting_id)
+        action = self.connection.subscribe if opened else self.connection.unsubscribe
+        asyncio.ensure_future(action(channel))
+
+    async def publish(self, meeting_id, payload: dict):
+        data = serialize_payload(payload)
+        broadcaster.publish(meeting_id, payload, json_data=data)
+        self._enqueue(meeting_id, data)
+
+    async def publish_internal(self, meeting_id, payload: dict):
+        self._enqueue(meeting_id, serialize_payload({**payload, "internal": True}))
+
+    def _enqueue(self, meeting_id, data: str):
+        self._batch.append((self.channel(meeting_id), f"{self.origin}\n{data}"))
+        if len(self._batch) >= PUBSUB_BATCH_SIZE and self._flush_wakeup is not None:
+            self._flush_wakeup.set()
+
+    async def _flush(self):
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        try:
+            await self.connection.publish_many(batch)
+            self.published += len(batch)
+        except Exception as e:
+            logger.error(f"Publication pub/sub échouée ({len(batch)} messages): {e}")
+
+    async def _flusher(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_wakeup.wait(), timeout=PUBSUB_BATCH_MS / 1000.0)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_wakeup.clear()
+            await self._flush()
+
+    async def _listener(self):
+        prefix = PUBSUB_CHANNEL_PREFIX
+        while True:
+            try:
+                async for channel, message in self.connection.listen():
+                    origin, _, data = message.partition("\n")
+                    if origin == self.origin or not channel.startswith(prefix):
+                        continue
+                    meeting_id = channel[len(prefix):]
+                    meeting_id = int(meeting_id) if meeting_id.isdigit() else meeting_id
+                    self.received += 1
+                    payload = json.loads(data)
+                    if not payload.get("internal"):
+                        broadcaster.publish(meeting_id, payload, json_data=data)
+                    for listener in remote_listeners:
+                        listener(meeting_id, payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Réception pub/sub interrompue: {e}; nouvelle tentative")
+                await asyncio.sleep(1.0)
+
+
+def create_broadcast_backend(kind: str = BROADCAST_BACKEND, memory_broker: Optional[MemoryBroker] = None) -> BroadcastBackend:
+    if kind == "redis":
+        return BrokerBackend(RedisBrokerConnection(REDIS_URL))
+    if kind == "memory":
+        return BrokerBackend((memory_broker or MemoryBroker()).connect())
+    return InProcessBackend()
+
+
+broadcast_backend = create_broadcast_backend()
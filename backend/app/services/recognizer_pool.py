@@ -0,0 +1,171 @@
+# app/services/recognizer_pool.py
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Reconnaisseurs prêts à l'emploi visés par clé (modèle, taux, options)
+RECOGNIZER_POOL_SIZE = int(os.environ.get("VOSK_RECOGNIZER_POOL_SIZE", 4))
+# Reconnaisseurs inactifs gardés au plus par clé (au-delà, ceux rendus sont libérés)
+RECOGNIZER_POOL_MAX_IDLE = int(os.environ.get("VOSK_RECOGNIZER_POOL_MAX_IDLE", 16))
+
+PoolKey = Tuple[str, int, bool]
+
+
+def shift_word_times(result: Optional[dict], seconds: float) -> Optional[dict]:
+    """
+    Ramener les temps par mot d'un résultat Vosk au début de la session.
+    Reset() ne remet pas à zéro l'horloge du recognizer : un recognizer recyclé
+    compte aussi l'audio décodé par les sessions précédentes.
+    """
+    if not seconds or not result:
+        return result
+    for key in ("result", "partial_result"):
+        for word in result.get(key) or ():
+            for field in ("start", "end"):
+                if field in word:
+                    word[field] = max(0.0, word[field] - seconds)
+    return result
+
+
+class RecognizerPool:
+    """
+    Réserve de KaldiRecognizer par (modèle, taux, partial_words).
+    acquire() sert un reconnaisseur chaud si possible ; release() le remet à zéro
+    (Reset) et le garde pour la session suivante, avec le nombre d'échantillons
+    qu'il a déjà décodés (base de son horloge, voir shift_word_times). Un thread de fond recrée les
+    instances consommées pour rester à la taille visée. Thread-safe : appelé
+    depuis l'executor de décodage ou depuis la boucle d'un worker ASR.
+    Sans transcriber explicite, les appels portent sur le modèle par défaut.
+    """
+
+    def __init__(self, transcriber=None, target: int = RECOGNIZER_POOL_SIZE, max_idle: int = RECOGNIZER_POOL_MAX_IDLE):
+        self.transcriber = transcriber
+        self.target = max(0, target)
+        self.max_idle = max(self.target, max_idle)
+        # Reconnaisseurs inactifs : (recognizer, échantillons déjà décodés)
+        self._idle: Dict[PoolKey, List[Tuple[object, int]]] = {}
+        self._keys: Set[PoolKey] = set()
+        # model_path -> VoskTranscriber, pour recréer les instances en arrière-plan
+        self._models: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+        self.recycled = 0
+        self.discarded = 0
+
+    def _key(self, transcriber, sample_rate: int, partial_words: bool) -> PoolKey:
+        transcriber = transcriber or self.transcriber
+        with self._lock:
+            self._models.setdefault(transcriber.model_path, transcriber)
+        return (transcriber.model_path, int(sample_rate), bool(partial_words))
+
+    def _create(self, key: PoolKey):
+        recognizer = self._models[key[0]].create_recognizer(key[1], key[2])
+        with self._lock:
+            self.created += 1
+        return recognizer
+
+    def acquire(self, sample_rate: int, partial_words: bool = True, transcriber=None) -> Tuple[object, int]:
+        """(recognizer, échantillons déjà décodés) : soustraire cette base des temps par mot."""
+        key = self._key(transcriber, sample_rate, partial_words)
+        with self._lock:
+            self._keys.add(key)
+            idle = self._idle.get(key)
+            item = idle.pop() if idle else None
+            if item is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        # Recompléter la réserve en arrière-plan
+        self.start()
+        self._wakeup.set()
+        return item if item is not None else (self._create(key), 0)
+
+    def release(self, recognizer, sample_rate: int, partial_words: bool = True, transcriber=None,
+                consumed: int = 0):
+        """
+        Rendre un reconnaisseur dont plus aucune session ne se sert.
+        consumed : échantillons décodés depuis sa création (base reçue à l'acquire incluse).
+        """
+        key = self._key(transcriber, sample_rate, partial_words)
+        with self._lock:
+            # Modèle évincé entre-temps : on ne garde rien qui le retienne en mémoire
+            full = key not in self._keys or len(self._idle.get(key, ())) >= self.max_idle
+        if not full:
+            try:
+                recognizer.Reset()
+            except Exception:
+                # vosk trop ancien (pas de Reset) : l'état ne peut pas être remis à zéro
+                full = True
+        with self._lock:
+            if full or key not in self._keys:
+                self.discarded += 1
+                return
+            self._idle.setdefault(key, []).append((recognizer, consumed))
+            self.recycled += 1
+
+    def prefill(self, sample_rate: int, partial_words: bool = True, transcriber=None):
+        """Déclarer une clé à garder chaude (au démarrage, clé par défaut du modèle)."""
+        key = self._key(transcriber, sample_rate, partial_words)
+        with self._lock:
+            self._keys.add(key)
+        self.start()
+        self._wakeup.set()
+
+    def drop_model(self, transcriber):
+        """Oublier les recognizers d'un modèle évincé du registre."""
+        with self._lock:
+            for key in [k for k in self._keys | set(self._idle) if k[0] == transcriber.model_path]:
+                self._keys.discard(key)
+                self.discarded += len(self._idle.pop(key, ()))
+            if self._models.get(transcriber.model_path) is transcriber:
+                del self._models[transcriber.model_path]
+
+    def _missing(self) -> List[PoolKey]:
+        with self._lock:
+            return [k for k in self._keys if len(self._idle.get(k, ())) < self.target]
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            for key in self._missing():
+                try:
+                    recognizer = self._create(key)
+                except Exception as e:
+                    logger.error(f"Pré-création de reconnaisseur impossible pour {key}: {e}")
+                    continue
+                with self._lock:
+                    if key in self._keys:
+                        self._idle.setdefault(key, []).append((recognizer, 0))
+                # Une instance à la fois : on repasse par la boucle pour laisser la main
+                self._wakeup.set()
+                break
+
+    def start(self):
+        if self.target and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._run, name="vosk-recognizer-pool", daemon=True)
+            self._thread.start()
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "target": self.target,
+                "idle": {
+                    f"{os.path.basename(k[0])}@{k[1]}Hz{'' if k[2] else '/nopw'}": len(v)
+                    for k, v in self._idle.items()
+                },
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / requests, 3) if requests else None,
+                "created": self.created,
+                "recycled": self.recycled,
+                "discarded": self.discarded,
+            }
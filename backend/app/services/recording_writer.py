@@ -0,0 +1,237 @@
+# app/services/recording_writer.py
+import asyncio
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.database import SessionLocal
+from app.models.recording import AudioRecording
+from app.services.meeting_events import meeting_events, MEETING_ENDED
+
+logger = logging.getLogger(__name__)
+
+RECORDINGS_DIR = os.environ.get("RECORDINGS_DIR", "recordings")
+# Tampon d'écriture du fichier (écritures disque regroupées)
+RECORDING_BUFFER_BYTES = int(os.environ.get("RECORDING_BUFFER_BYTES", 256 * 1024))
+# Intervalle des points de reprise : en-tête WAV à jour + fsync
+RECORDING_CHECKPOINT_SECONDS = float(os.environ.get("RECORDING_CHECKPOINT_SECONDS", 5))
+# Audio en attente d'écriture au-delà duquel on jette plutôt que de bloquer le décodage
+RECORDING_MAX_PENDING_BYTES = int(os.environ.get("RECORDING_MAX_PENDING_BYTES", 64 * 1024 * 1024))
+# Fin de réunion : délai laissé aux sessions pour écrire leur dernier audio et fermer leur piste
+RECORDING_FINALIZE_GRACE_SECONDS = float(os.environ.get("RECORDING_FINALIZE_GRACE_SECONDS", 2))
+
+WAV_HEADER_SIZE = 44
+
+
+def wav_header(sample_rate: int, data_bytes: int, channels: int = 1, sample_width: int = 2) -> bytes:
+    byte_rate = sample_rate * channels * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_bytes, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, byte_rate, channels * sample_width, sample_width * 8,
+        b"data", data_bytes,
+    )
+
+
+class RecordingTrack:
+    """Piste WAV d'une session d'orateur (PCM mono au taux du modèle)."""
+
+    def __init__(self, meeting_id, session_id: str, sample_rate: int, path: str):
+        self.meeting_id = meeting_id
+        self.session_id = session_id
+        self.sample_rate = sample_rate
+        self.path = path
+        self.data_bytes = 0
+        self.dropped_bytes = 0
+        self.file = None
+        self.dirty = False
+        self.last_checkpoint = time.monotonic()
+        self.closed = threading.Event()
+
+    @property
+    def file_size(self) -> int:
+        return WAV_HEADER_SIZE + self.data_bytes
+
+    @property
+    def duration(self) -> float:
+        return self.data_bytes / 2 / self.sample_rate
+
+
+class RecordingManager:
+    """
+    Enregistrement des réunions sur disque. Le pipeline temps réel ne fait que
+    déposer le PCM dans une file ; un thread dédié écrit en ajout seul, avec un
+    tampon, et remet l'en-tête WAV à jour à chaque point de reprise (8 octets
+    réécrits) pour qu'un fichier reste lisible après un crash.
+    """
+
+    def __init__(self, base_dir: str = RECORDINGS_DIR):
+        self.base_dir = base_dir
+        self._queue: "queue.Queue" = queue.Queue()
+        self._pending_bytes = 0
+        self._pending_lock = threading.Lock()
+        self._tracks: Dict[object, List[RecordingTrack]] = {}
+        self._tracks_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="recording-writer", daemon=True)
+            self._thread.start()
+
+    # --- API appelée depuis la boucle asyncio / les routers (jamais bloquante sur le disque) ---
+
+    def open_track(self, meeting_id, session_id: str, sample_rate: int) -> RecordingTrack:
+        directory = os.path.join(self.base_dir, str(meeting_id))
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        path = os.path.join(directory, f"{stamp}_{session_id}.wav")
+        track = RecordingTrack(meeting_id, session_id, sample_rate, path)
+        with self._tracks_lock:
+            self._tracks.setdefault(meeting_id, []).append(track)
+        self._ensure_thread()
+        self._queue.put(("open", track, None))
+        return track
+
+    def write(self, track: RecordingTrack, pcm: bytes):
+        if not pcm:
+            return
+        with self._pending_lock:
+            if self._pending_bytes + len(pcm) > RECORDING_MAX_PENDING_BYTES:
+                # Disque saturé : on perd de l'audio enregistré, jamais de temps réel
+                track.dropped_bytes += len(pcm)
+                return
+            self._pending_bytes += len(pcm)
+        self._queue.put(("write", track, pcm))
+
+    def close_track(self, track: RecordingTrack):
+        self._queue.put(("close", track, None))
+
+    def finalize_meeting(self, meeting_id, timeout: float = 10.0) -> List[RecordingTrack]:
+        """
+        Fermer toutes les pistes de la réunion tenues par ce process et attendre
+        leur écriture complète. Les sessions ont RECORDING_FINALIZE_GRACE_SECONDS
+        pour fermer elles-mêmes leur piste (dernier audio compris).
+        Retourne les pistes finalisées (pour créer les AudioRecording).
+        """
+        with self._tracks_lock:
+            tracks = self._tracks.pop(meeting_id, [])
+        deadline = time.monotonic() + min(timeout, RECORDING_FINALIZE_GRACE_SECONDS)
+        for track in tracks:
+            if not track.closed.wait(max(0.0, deadline - time.monotonic())):
+                self.close_track(track)
+        deadline = time.monotonic() + timeout
+        for track in tracks:
+            if not track.closed.wait(max(0.0, deadline - time.monotonic())):
+                logger.warning(f"Piste {track.path} non finalisée dans le délai")
+        return [t for t in tracks if t.closed.is_set() and t.data_bytes]
+
+    # --- Thread d'écriture ---
+
+    def _checkpoint(self, track: RecordingTrack):
+        f = track.file
+        f.flush()
+        os.pwrite(f.fileno(), struct.pack("<I", 36 + track.data_bytes), 4)
+        os.pwrite(f.fileno(), struct.pack("<I", track.data_bytes), 40)
+        os.fsync(f.fileno())
+        track.dirty = False
+        track.last_checkpoint = time.monotonic()
+
+    def _checkpoint_dirty(self):
+        # Pistes restées silencieuses comprises : l'en-tête suit l'audio déjà écrit
+        with self._tracks_lock:
+            tracks = [t for ts in self._tracks.values() for t in ts]
+        for track in tracks:
+            if track.dirty and track.file is not None:
+                try:
+                    self._checkpoint(track)
+                except Exception as e:
+                    logger.error(f"Point de reprise échoué pour {track.path}: {e}")
+
+    def _handle(self, op: str, track: RecordingTrack, pcm: Optional[bytes]):
+        if op == "open":
+            os.makedirs(os.path.dirname(track.path), exist_ok=True)
+            track.file = open(track.path, "wb", buffering=RECORDING_BUFFER_BYTES)
+            track.file.write(wav_header(track.sample_rate, 0))
+        elif op == "write":
+            with self._pending_lock:
+                self._pending_bytes -= len(pcm)
+            if track.file is None:
+                return
+            track.file.write(pcm)
+            track.data_bytes += len(pcm)
+            track.dirty = True
+        elif op == "close":
+            if track.file is not None:
+                self._checkpoint(track)
+                track.file.close()
+                track.file = None
+            track.closed.set()
+
+    def _run(self):
+        # Points de reprise sur minuterie, que la file soit active ou non
+        next_checkpoint = time.monotonic() + RECORDING_CHECKPOINT_SECONDS
+        while True:
+            try:
+                op, track, pcm = self._queue.get(timeout=max(0.0, next_checkpoint - time.monotonic()))
+            except queue.Empty:
+                op = None
+            if op is not None:
+                try:
+                    self._handle(op, track, pcm)
+                except Exception as e:
+                    logger.error(f"Erreur d'enregistrement ({op}) pour {track.path}: {e}", exc_info=True)
+                    if op == "close":
+                        track.closed.set()
+            if time.monotonic() >= next_checkpoint:
+                self._checkpoint_dirty()
+                next_checkpoint = time.monotonic() + RECORDING_CHECKPOINT_SECONDS
+
+
+recording_manager = RecordingManager()
+
+
+def store_meeting_recordings(meeting_id) -> int:
+    """
+    Finaliser les pistes de la réunion tenues par ce process et les enregistrer
+    comme AudioRecording. Appelé dans chaque worker à la fin de la réunion.
+    """
+    tracks = recording_manager.finalize_meeting(meeting_id)
+    if not tracks:
+        return 0
+    db = SessionLocal()
+    try:
+        for track in tracks:
+            db.add(AudioRecording(
+                meeting_id=meeting_id,
+                file_path=track.path,
+                file_name=os.path.basename(track.path),
+                file_size=track.file_size,
+                duration=track.duration,
+                sample_rate=track.sample_rate,
+                channels=1,
+                format="wav",
+                is_processed=True,
+                processing_status="completed",
+                processed_at=datetime.utcnow()
+            ))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Enregistrements de la réunion {meeting_id} non enregistrés en base: {e}", exc_info=True)
+        return 0
+    finally:
+        db.close()
+    return len(tracks)
+
+
+async def _on_meeting_ended(event):
+    # Attente des pistes et écriture en base hors de la boucle asyncio
+    await asyncio.get_running_loop().run_in_executor(None, store_meeting_recordings, event.meeting_id)
+
+
+meeting_events.on(MEETING_ENDED, _on_meeting_ended)
@@ -0,0 +1,103 @@
+# app/services/resampler.py
+from math import gcd
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Nombre de passages par zéro du sinc de chaque côté (qualité / coût du filtre)
+ZERO_CROSSINGS = 8
+# Coupure à 90 % de la fréquence de Nyquist cible (bande de transition)
+ROLLOFF = 0.9
+
+
+def design_polyphase_filter(up: int, down: int, zero_crossings: int = ZERO_CROSSINGS) -> np.ndarray:
+    """
+    Filtre passe-bas sinc fenêtré (Kaiser) pour un facteur up/down,
+    découpé en `up` phases. Retourne un tableau (up, taps) dont chaque ligne
+    est inversée, prête pour un produit scalaire avec une fenêtre d'entrée.
+    """
+    cutoff = ROLLOFF * 0.5 / max(up, down)  # en cycles par échantillon sur-échantillonné
+    taps = 2 * zero_crossings * int(np.ceil(max(1.0, down / up)))
+    length = taps * up
+    n = np.arange(length) - (length - 1) / 2.0
+    prototype = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(length, 8.0)
+    prototype *= up / prototype.sum()  # gain unitaire : chaque phase somme à ~1
+    phases = prototype.reshape(taps, up).T
+    return np.ascontiguousarray(phases[:, ::-1], dtype=np.float32)
+
+
+class StreamingResampler:
+    """
+    Rééchantillonneur polyphase en flux (PCM s16le entrelacé -> mono au taux cible).
+    L'historique du filtre et la phase sont conservés d'un chunk à l'autre :
+    pas de discontinuité aux frontières de blocs.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int, channels: int = 1):
+        if in_rate <= 0 or out_rate <= 0 or channels <= 0:
+            raise ValueError("Paramètres audio invalides")
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.channels = channels
+        g = gcd(in_rate, out_rate)
+        self.up = out_rate // g
+        self.down = in_rate // g
+        self.frame_bytes = 2 * channels
+        self._remainder = b""
+        if self.passthrough:
+            return
+        self.phases = design_polyphase_filter(self.up, self.down)
+        self.taps = self.phases.shape[1]
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        # Position (en échantillons sur-échantillonnés) de la prochaine sortie,
+        # relative au premier échantillon du prochain chunk
+        self._next = 0
+
+    @property
+    def passthrough(self) -> bool:
+        return self.in_rate == self.out_rate and self.channels == 1
+
+    def _to_mono(self, data: bytes) -> Optional[np.ndarray]:
+        data = self._remainder + data if self._remainder else data
+        usable = len(data) - len(data) % self.frame_bytes
+        self._remainder = data[usable:]
+        if not usable:
+            return None
+        samples = np.frombuffer(data, dtype="<i2", count=usable // 2)
+        if self.channels == 1:
+            return samples.astype(np.float32)
+        return samples.reshape(-1, self.channels).mean(axis=1, dtype=np.float32)
+
+    def process(self, data: bytes) -> bytes:
+        if self.passthrough:
+            return data
+        mono = self._to_mono(data)
+        if mono is None:
+            return b""
+        if self.up == self.down:
+            # Simple mixage stéréo -> mono
+            return np.clip(np.rint(mono), -32768, 32767).astype("<i2").tobytes()
+
+        span = mono.size * self.up
+        if self._next >= span:
+            self._next -= span
+            self._history = np.concatenate((self._history, mono))[-(self.taps - 1):]
+            return b""
+        count = (span - self._next + self.down - 1) // self.down
+        positions = self._next + self.down * np.arange(count)
+        base = positions // self.up
+        phase = positions % self.up
+
+        buf = np.concatenate((self._history, mono))
+        # Fenêtre k : buf[base : base + taps] couvre x[base - taps + 1 .. base]
+        windows = sliding_window_view(buf, self.taps)[base]
+        out = np.einsum("nk,nk->n", windows, self.phases[phase])
+
+        self._next = int(positions[-1]) + self.down - span
+        self._history = buf[-(self.taps - 1):]
+        return np.clip(np.rint(out), -32768, 32767).astype("<i2").tobytes()
+
+    def input_bytes_for(self, output_bytes: int) -> int:
+        """Taille d'entrée (PCM client) correspondant à output_bytes de sortie."""
+        return int(output_bytes * self.in_rate / self.out_rate) * self.channels
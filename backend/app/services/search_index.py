@@ -0,0 +1,207 @@
+# app/services/search_index.py
+import heapq
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.database import SessionLocal
+from app.models.transcript import Transcript
+from app.services.text_normalize import normalize_word, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Intervalle de rattrapage des nouvelles transcriptions (tous process confondus)
+SEARCH_REFRESH_SECONDS = float(os.environ.get("SEARCH_REFRESH_SECONDS", 5))
+# Lignes lues par requête de rattrapage
+SEARCH_BATCH_ROWS = int(os.environ.get("SEARCH_BATCH_ROWS", 5000))
+# Ids relus à chaque rattrapage : les lots d'autres process peuvent être commités dans le désordre
+SEARCH_ID_OVERLAP = int(os.environ.get("SEARCH_ID_OVERLAP", 2000))
+
+# BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+class SearchIndex:
+    """
+    Index inversé en mémoire sur Transcript.text : terme normalisé (sans accents,
+    sans mots vides, pluriels réduits) -> réunion -> {transcript_id: rangs des mots}.
+    Le regroupement par réunion borne une recherche aux réunions accessibles à
+    l'utilisateur, quel que soit le nombre total de réunions indexées.
+    Maintenu par rattrapage incrémental sur les ids (les écritures de tous les
+    process passent par la table), classement BM25. Les rangs sont des indices
+    dans raw_data["words"], d'où les timestamps des occurrences.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, Dict[int, Tuple[int, ...]]]] = {}
+        # terme -> nombre de transcriptions qui le contiennent (idf)
+        self.doc_freq: Dict[str, int] = {}
+        # transcript_id -> (meeting_id, nombre de termes)
+        self.docs: Dict[int, Tuple[int, int]] = {}
+        self.total_terms = 0
+        self.last_id = 0
+        self.ready = False
+        self._lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.searches = 0
+
+    # --- Maintenance ---
+
+    def add(self, transcript_id: int, meeting_id: int, text: str):
+        positions: Dict[str, List[int]] = defaultdict(list)
+        length = 0
+        for term, offset in tokenize(text or ""):
+            positions[term].append(offset)
+            length += 1
+        with self._lock:
+            if transcript_id in self.docs:
+                self._remove(transcript_id)
+            self.docs[transcript_id] = (meeting_id, length)
+            self.total_terms += length
+            for term, offsets in positions.items():
+                self.postings.setdefault(term, {}).setdefault(meeting_id, {})[transcript_id] = tuple(offsets)
+                self.doc_freq[term] = self.doc_freq.get(term, 0) + 1
+            self.last_id = max(self.last_id, transcript_id)
+
+    def remove(self, transcript_id: int):
+        with self._lock:
+            if transcript_id in self.docs:
+                self._remove(transcript_id)
+
+    def _remove(self, transcript_id: int):
+        # Pas d'index inverse doc -> termes : on parcourt les postings (suppressions rares)
+        meeting_id, length = self.docs.pop(transcript_id)
+        self.total_terms -= length
+        for term, meetings in list(self.postings.items()):
+            docs = meetings.get(meeting_id)
+            if docs is None or transcript_id not in docs:
+                continue
+            del docs[transcript_id]
+            if not docs:
+                del meetings[meeting_id]
+            self.doc_freq[term] -= 1
+            if not meetings:
+                del self.postings[term]
+                del self.doc_freq[term]
+
+    def catch_up(self) -> int:
+        """Indexer les transcriptions écrites depuis le dernier passage ; retourne le nombre ajouté."""
+        added = 0
+        db = SessionLocal()
+        try:
+            cursor = max(0, self.last_id - SEARCH_ID_OVERLAP)
+            while True:
+                rows = db.query(Transcript.id, Transcript.meeting_id, Transcript.text).filter(
+                    Transcript.id > cursor
+                ).order_by(Transcript.id).limit(SEARCH_BATCH_ROWS).all()
+                for transcript_id, meeting_id, text in rows:
+                    if transcript_id not in self.docs:
+                        self.add(transcript_id, meeting_id, text)
+                        added += 1
+                if len(rows) < SEARCH_BATCH_ROWS:
+                    break
+                cursor = rows[-1][0]
+        finally:
+            db.close()
+        return added
+
+    def _run(self):
+        started = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                added = self.catch_up()
+                if not self.ready:
+                    self.ready = True
+                    logger.info(
+                        f"🔎 Index de recherche construit: {len(self.docs)} transcriptions, "
+                        f"{len(self.postings)} termes en {time.perf_counter() - started:.1f}s"
+                    )
+                elif added:
+                    logger.debug(f"Index de recherche: {added} transcriptions ajoutées")
+            except Exception as e:
+                logger.error(f"Rattrapage de l'index de recherche impossible: {e}")
+            self._stop.wait(SEARCH_REFRESH_SECONDS)
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="search-index", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    # --- Recherche ---
+
+    def search(self, query: str, meeting_ids: Optional[Set[int]] = None,
+               limit: int = 20) -> Tuple[List[Tuple[int, float, Tuple[int, ...]]], int]:
+        """
+        Les limit meilleurs (transcript_id, score BM25, rangs des mots trouvés)
+        parmi les réunions meeting_ids (None = toutes), et le nombre total de résultats.
+        """
+        query_terms = list(dict.fromkeys(term for word in query.split() for term in normalize_word(word)))
+        self.searches += 1
+        if not query_terms:
+            return [], 0
+        scores: Dict[int, float] = defaultdict(float)
+        matched: Dict[int, List[int]] = defaultdict(list)
+        with self._lock:
+            n_docs = len(self.docs) or 1
+            average_length = self.total_terms / n_docs or 1.0
+            for term in query_terms:
+                meetings = self.postings.get(term)
+                if not meetings:
+                    continue
+                df = self.doc_freq[term]
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                if meeting_ids is None:
+                    groups = meetings.values()
+                elif len(meeting_ids) < len(meetings):
+                    groups = [meetings[m] for m in meeting_ids if m in meetings]
+                else:
+                    groups = [docs for m, docs in meetings.items() if m in meeting_ids]
+                for docs in groups:
+                    for transcript_id, offsets in docs.items():
+                        tf = len(offsets)
+                        length = self.docs[transcript_id][1]
+                        scores[transcript_id] += idf * tf * (BM25_K1 + 1) / (
+                            tf + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                        )
+                        matched[transcript_id].extend(offsets)
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(tid, score, tuple(sorted(set(matched[tid])))) for tid, score in top], len(scores)
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "documents": len(self.docs),
+            "terms": len(self.postings),
+            "last_id": self.last_id,
+            "searches": self.searches,
+        }
+
+
+search_index = SearchIndex()
+
+
+def hit_matches(raw_data: Optional[dict], text: str, offsets: Iterable[int]) -> List[dict]:
+    """Mots trouvés avec leurs timestamps (raw_data Vosk), pour aller au moment exact."""
+    words = (raw_data or {}).get("words") or []
+    plain = text.split()
+    matches = []
+    for offset in offsets:
+        word = words[offset] if offset < len(words) else {}
+        matches.append({
+            "offset": offset,
+            "word": word.get("word") or (plain[offset] if offset < len(plain) else None),
+            "start": word.get("start"),
+            "end": word.get("end"),
+        })
+    return matches
@@ -0,0 +1,133 @@
+# app/services/session_resume.py
+import asyncio
+import logging
+import os
+import secrets
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.services.meeting_events import meeting_events, MEETING_ENDED, TRANSCRIPTION_STOPPED
+
+logger = logging.getLogger(__name__)
+
+# Durée pendant laquelle une session interrompue garde son reconnaisseur (0 = pas de reprise)
+RESUME_GRACE_SECONDS = float(os.environ.get("RESUME_GRACE_SECONDS", 30))
+# Messages conservés pour le client pendant la coupure
+RESUME_BUFFER_MESSAGES = int(os.environ.get("RESUME_BUFFER_MESSAGES", 500))
+
+
+class ReplayBuffer:
+    """
+    Remplaçant de la socket d'une session parquée dans le fan-out : l'abonné
+    continue de se vider normalement, les messages sont gardés pour la reprise.
+    """
+
+    def __init__(self, limit: int = RESUME_BUFFER_MESSAGES):
+        self.messages = deque(maxlen=limit)
+
+    async def send_text(self, data: str):
+        self.messages.append(data)
+
+    async def send_bytes(self, data: bytes):
+        self.messages.append(data)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+class ParkedSession:
+    def __init__(self, session: dict, on_expire: Callable[[dict], Awaitable], handle: asyncio.TimerHandle):
+        self.session = session
+        self.on_expire = on_expire
+        self.handle = handle
+        self.parked_at = time.monotonic()
+
+
+class ResumeRegistry:
+    """
+    Sessions de transcription dont la socket est tombée, gardées vivantes
+    (reconnaisseur, énoncé en cours, place d'admission) pendant RESUME_GRACE_SECONDS.
+    Un client qui se reconnecte avec le jeton de reprise reprend la session ;
+    sinon on_expire() la termine (résultat final, fermeture).
+    Les jetons sont locaux au worker : la reprise suppose un routage collant.
+    """
+
+    def __init__(self, grace_seconds: float = RESUME_GRACE_SECONDS):
+        self.grace_seconds = grace_seconds
+        self._parked: Dict[str, ParkedSession] = {}
+        self.parked = 0
+        self.resumed = 0
+        self.expired = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.grace_seconds > 0
+
+    @staticmethod
+    def new_token() -> str:
+        return secrets.token_urlsafe(24)
+
+    def park(self, session: dict, on_expire: Callable[[dict], Awaitable]):
+        token = session["resume_token"]
+        loop = asyncio.get_running_loop()
+        handle = loop.call_later(self.grace_seconds, self._expire, token)
+        self._parked[token] = ParkedSession(session, on_expire, handle)
+        self.parked += 1
+
+    def claim(self, token: Optional[str], meeting_id, user_id=None) -> Optional[dict]:
+        """Reprendre une session parquée ; le jeton n'est valable qu'une fois."""
+        parked = self._parked.get(token) if token else None
+        if parked is None:
+            return None
+        session = parked.session
+        if session["meeting_id"] != meeting_id or (user_id is not None and session["user_id"] != user_id):
+            return None
+        del self._parked[token]
+        parked.handle.cancel()
+        self.resumed += 1
+        session["resumed_after"] = round(time.monotonic() - parked.parked_at, 3)
+        return session
+
+    def _expire(self, token: str):
+        parked = self._parked.pop(token, None)
+        if parked is None:
+            return
+        parked.handle.cancel()
+        self.expired += 1
+        asyncio.ensure_future(self._finish(parked))
+
+    async def _finish(self, parked: ParkedSession):
+        try:
+            await parked.on_expire(parked.session)
+        except Exception as e:
+            logger.error(f"Fin de session parquée {parked.session.get('session_id')} en erreur: {e}", exc_info=True)
+
+    def expire_meeting(self, meeting_id):
+        for token, parked in list(self._parked.items()):
+            if parked.session["meeting_id"] == meeting_id:
+                self._expire(token)
+
+    async def expire_all(self):
+        """Arrêt du serveur : terminer tout de suite les sessions parquées."""
+        parked = list(self._parked.values())
+        self._parked.clear()
+        for item in parked:
+            item.handle.cancel()
+        await asyncio.gather(*(self._finish(item) for item in parked))
+
+    def stats(self) -> dict:
+        return {
+            "grace_seconds": self.grace_seconds,
+            "parked_now": len(self._parked),
+            "parked": self.parked,
+            "resumed": self.resumed,
+            "expired": self.expired,
+        }
+
+
+resume_registry = ResumeRegistry()
+
+# Plus de transcription : inutile de garder les reconnaisseurs des sessions interrompues
+meeting_events.on(TRANSCRIPTION_STOPPED, lambda event: resume_registry.expire_meeting(event.meeting_id))
+meeting_events.on(MEETING_ENDED, lambda event: resume_registry.expire_meeting(event.meeting_id))
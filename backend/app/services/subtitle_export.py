@@ -0,0 +1,191 @@
+# app/services/subtitle_export.py
+import logging
+import os
+import textwrap
+import uuid
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+from app.services.recording_writer import RECORDINGS_DIR
+
+logger = logging.getLogger(__name__)
+
+# Longueur d'une ligne de sous-titre et lignes par cue (usage courant : 2 x 42)
+CUE_LINE_CHARS = int(os.environ.get("SUBTITLE_LINE_CHARS", 42))
+CUE_MAX_LINES = int(os.environ.get("SUBTITLE_MAX_LINES", 2))
+# Durée maximale d'une cue, et pause entre deux mots qui ouvre une nouvelle cue
+CUE_MAX_SECONDS = float(os.environ.get("SUBTITLE_MAX_SECONDS", 6))
+CUE_GAP_SECONDS = float(os.environ.get("SUBTITLE_GAP_SECONDS", 0.8))
+# Durée d'affichage minimale (cues d'un seul mot court)
+CUE_MIN_SECONDS = 0.7
+# Exports des réunions terminées
+EXPORT_CACHE_DIR = os.environ.get("EXPORT_CACHE_DIR", os.path.join(RECORDINGS_DIR, "exports"))
+
+FORMAT_SRT = "srt"
+FORMAT_VTT = "vtt"
+FORMAT_TEXT = "txt"
+
+MEDIA_TYPES = {
+    FORMAT_SRT: "application/x-subrip",
+    FORMAT_VTT: "text/vtt",
+    FORMAT_TEXT: "text/plain",
+}
+
+
+class Cue(NamedTuple):
+    start: float
+    end: float
+    text: str
+    speaker: Optional[str]
+
+
+def _cue(words: List[str], start: float, end: float, speaker: Optional[str]) -> Cue:
+    return Cue(start, max(end, start + CUE_MIN_SECONDS), " ".join(words), speaker)
+
+
+def _fits(words: List[str]) -> bool:
+    return len(textwrap.wrap(" ".join(words), CUE_LINE_CHARS)) <= CUE_MAX_LINES
+
+
+def split_cues(transcript) -> Iterator[Cue]:
+    """
+    Cues d'une transcription. Avec les timings par mot (raw_data["words"]), on coupe
+    sur la longueur affichable, la durée maximale et les pauses ; sinon le texte est
+    réparti sur [start_time, end_time] au prorata des caractères.
+    """
+    speaker = transcript.speaker
+    words = [w for w in ((transcript.raw_data or {}).get("words") or []) if w.get("word")]
+    if words:
+        current: List[str] = []
+        start = end = 0.0
+        for word in words:
+            w_start, w_end = float(word.get("start", end)), float(word.get("end", end))
+            if current and (
+                not _fits(current + [word["word"]])
+                or w_end - start > CUE_MAX_SECONDS
+                or w_start - end > CUE_GAP_SECONDS
+            ):
+                yield _cue(current, start, end, speaker)
+                current = []
+            if not current:
+                start = w_start
+            current.append(word["word"])
+            end = w_end
+        if current:
+            yield _cue(current, start, end, speaker)
+        return
+
+    text = (transcript.text or "").strip()
+    if not text:
+        return
+    start = float(transcript.start_time or 0.0)
+    end = float(transcript.end_time if transcript.end_time is not None else start)
+    lines = textwrap.wrap(text, CUE_LINE_CHARS)
+    chunks = [" ".join(lines[i:i + CUE_MAX_LINES]) for i in range(0, len(lines), CUE_MAX_LINES)]
+    total = sum(len(c) for c in chunks) or 1
+    position = start
+    for chunk in chunks:
+        chunk_end = position + (end - start) * len(chunk) / total
+        yield _cue([chunk], position, chunk_end, speaker)
+        position = chunk_end
+
+
+def _timestamp(seconds: float, separator: str) -> str:
+    millis = int(round(max(0.0, seconds) * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def _lines(text: str) -> str:
+    return "\n".join(textwrap.wrap(text, CUE_LINE_CHARS)) or text
+
+
+def render_srt(transcripts: Iterable) -> Iterator[str]:
+    index = 0
+    for transcript in transcripts:
+        for cue in split_cues(transcript):
+            index += 1
+            yield (
+                f"{index}\n{_timestamp(cue.start, ',')} --> {_timestamp(cue.end, ',')}\n"
+                f"{_lines(cue.text)}\n\n"
+            )
+
+
+def render_vtt(transcripts: Iterable) -> Iterator[str]:
+    yield "WEBVTT\n\n"
+    for transcript in transcripts:
+        for cue in split_cues(transcript):
+            # Balise de voix WebVTT : le lecteur peut afficher l'orateur
+            text = _lines(cue.text).replace("&", "&amp;").replace("<", "&lt;")
+            if cue.speaker:
+                text = f"<v {cue.speaker.replace('>', '')}>{text}"
+            yield f"{_timestamp(cue.start, '.')} --> {_timestamp(cue.end, '.')}\n{text}\n\n"
+
+
+def render_text(transcripts: Iterable) -> Iterator[str]:
+    for transcript in transcripts:
+        text = (transcript.text or "").strip()
+        if not text:
+            continue
+        stamp = _timestamp(transcript.start_time or 0.0, ",")[:8]
+        speaker = f"{transcript.speaker}: " if transcript.speaker else ""
+        yield f"[{stamp}] {speaker}{text}\n"
+
+
+RENDERERS = {
+    FORMAT_SRT: render_srt,
+    FORMAT_VTT: render_vtt,
+    FORMAT_TEXT: render_text,
+}
+
+
+# --- Cache des réunions terminées ---
+
+def cache_path(meeting_id: int, fmt: str, fingerprint: str) -> str:
+    """fingerprint : état des transcriptions (nombre, dernier id), un import tardif invalide le cache."""
+    return os.path.join(EXPORT_CACHE_DIR, f"meeting_{meeting_id}_{fingerprint}.{fmt}")
+
+
+def cached_export(meeting_id: int, fmt: str, fingerprint: str) -> Optional[str]:
+    path = cache_path(meeting_id, fmt, fingerprint)
+    return path if os.path.isfile(path) else None
+
+
+def write_through(chunks: Iterable[str], meeting_id: int, fmt: str, fingerprint: str) -> Iterator[str]:
+    """
+    Envoyer l'export en flux tout en l'écrivant dans le cache ; le fichier n'est
+    publié (rename atomique) que si l'export est allé au bout.
+    """
+    path = cache_path(meeting_id, fmt, fingerprint)
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+        out = open(tmp, "w", encoding="utf-8")
+    except OSError as e:
+        logger.warning(f"Cache d'export indisponible: {e}")
+        yield from chunks
+        return
+    complete = False
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+            yield chunk
+        complete = True
+    finally:
+        out.close()
+        if complete:
+            os.replace(tmp, path)
+            # Les exports des états précédents de la réunion ne servent plus
+            prefix = f"meeting_{meeting_id}_"
+            for name in os.listdir(EXPORT_CACHE_DIR):
+                if name.startswith(prefix) and name.endswith(f".{fmt}") and name != os.path.basename(path):
+                    try:
+                        os.remove(os.path.join(EXPORT_CACHE_DIR, name))
+                    except OSError:
+                        pass
+        else:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
@@ -0,0 +1,335 @@
+# app/services/summarizer.py
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+
+from app.database import SessionLocal
+from app.models.meeting import Meeting
+from app.models.summary import MeetingSummary
+from app.models.transcript import Transcript
+from app.services.meeting_events import meeting_events, MEETING_STARTED
+from app.services.text_normalize import fold_accents, terms
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_MODEL = "textrank-tfidf-v1"
+# Phrases retenues dans le résumé (au plus), et part de la réunion
+SUMMARY_MAX_SENTENCES = int(os.environ.get("SUMMARY_MAX_SENTENCES", 7))
+SUMMARY_RATIO = float(os.environ.get("SUMMARY_RATIO", 0.1))
+# Attente après end_meeting : derniers finals des sessions fermées et du tampon d'écriture
+SUMMARY_SETTLE_SECONDS = float(os.environ.get("SUMMARY_SETTLE_SECONDS", 3))
+# Réunions suivies en mémoire (les plus anciennes sont oubliées, le résumé repartira de la base)
+SUMMARY_MAX_MEETINGS = int(os.environ.get("SUMMARY_MAX_MEETINGS", 500))
+# Réunions résumées mémorisées (finals tardifs ignorés, un nouveau résumé repart de la base)
+SUMMARY_FINALIZED_MEMORY = 1000
+# Vocabulaire de la matrice TF-IDF (termes les plus fréquents, présents dans 2 phrases au moins)
+SUMMARY_MAX_VOCABULARY = 4000
+# Énoncés plus longs découpés en phrases (Vosk ne ponctue pas)
+SENTENCE_MAX_WORDS = 30
+# Phrases classées au plus (matrice de similarité n x n) : les plus riches en termes
+SUMMARY_MAX_CANDIDATES = int(os.environ.get("SUMMARY_MAX_CANDIDATES", 2500))
+# Phrases trop pauvres pour être représentatives (termes pleins)
+SENTENCE_MIN_TERMS = 4
+# Actions gardées au plus (les premières de la réunion)
+SUMMARY_MAX_ACTIONS = int(os.environ.get("SUMMARY_MAX_ACTIONS", 50))
+# Similarité au-delà de laquelle une phrase est redondante avec une phrase déjà retenue
+REDUNDANCY_THRESHOLD = 0.6
+TEXTRANK_DAMPING = 0.85
+
+# Indices d'actions à mener (texte sans accents, en minuscules)
+_ACTION_CUES = re.compile(
+    r"\b(?:il faut(?:drait)?|on doit|nous devons|vous devez|tu dois|je dois|"
+    r"(?:je|on|nous) (?:vais|va|allons) (?!parler|voir si|dire)\w+|"
+    r"(?:tu peux|vous pouvez|pourrais[- ]tu|pourriez[- ]vous|peux[- ]tu|pouvez[- ]vous)|"
+    r"(?:je|il|elle) s'en (?:charge|occupe)|je m'en (?:charge|occupe)|se charger de|"
+    r"a faire|action|prochaine etape|n'oublie(?:z)? pas|pense(?:z)? a|"
+    r"relancer|envoyer|preparer|planifier|prevoir|valider|deadline|echeance)\b"
+)
+_DUE_RE = re.compile(
+    r"\b(?:d'ici|avant|pour|au plus tard)\s+(?:le\s+|la\s+|l')?"
+    r"((?:demain|lundi|mardi|mercredi|jeudi|vendredi|samedi|dimanche|ce soir|"
+    r"(?:la )?semaine prochaine|(?:le )?mois prochain|(?:la )?fin (?:de la semaine|du mois))"
+    r"|\d{1,2}(?: \w+)?)"
+)
+
+
+class Sentence:
+    __slots__ = ("text", "start", "end", "speaker", "terms")
+
+    def __init__(self, text: str, start: Optional[float], end: Optional[float], speaker: Optional[str], counts: Counter):
+        self.text = text
+        self.start = start
+        self.end = end
+        self.speaker = speaker
+        self.terms = counts
+
+
+class MeetingDigest:
+    """
+    État incrémental du résumé d'une réunion : chaque final est découpé en
+    phrases, tokenisé une fois (termes normalisés) et compté dans les fréquences
+    de documents ; les actions sont repérées au fil de l'eau. Le classement
+    (TF-IDF + TextRank) ne fait plus que l'algèbre sur ces comptes.
+    """
+
+    def __init__(self, meeting_id: int):
+        self.meeting_id = meeting_id
+        self.sentences: List[Sentence] = []
+        self.doc_freq: Counter = Counter()
+        self.action_items: List[dict] = []
+        self._action_texts = set()
+        self.speakers = set()
+        self.rows = 0
+        self.total_words = 0
+        self.first_start: Optional[float] = None
+        self.last_end: Optional[float] = None
+
+    def add(self, text: str, start: Optional[float] = None, end: Optional[float] = None,
+            speaker: Optional[str] = None):
+        self.rows += 1
+        words = (text or "").split()
+        if not words:
+            return
+        self.total_words += len(words)
+        if speaker is not None:
+            self.speakers.add(speaker)
+        if start is not None and (self.first_start is None or start < self.first_start):
+            self.first_start = start
+        if end is not None and (self.last_end is None or end > self.last_end):
+            self.last_end = end
+
+        # Découpage en phrases de longueur égale, temps répartis au prorata
+        parts = max(1, math.ceil(len(words) / SENTENCE_MAX_WORDS))
+        size = math.ceil(len(words) / parts)
+        for index in range(parts):
+            chunk = " ".join(words[index * size:(index + 1) * size])
+            if not chunk:
+                continue
+            if start is not None and end is not None:
+                s_start = start + (end - start) * index / parts
+                s_end = start + (end - start) * (index + 1) / parts
+            else:
+                s_start, s_end = start, end
+            counts = Counter(terms(chunk))
+            self.sentences.append(Sentence(chunk, s_start, s_end, speaker, counts))
+            self.doc_freq.update(counts.keys())
+            self._detect_action(chunk, s_start, speaker)
+
+    def _detect_action(self, text: str, start: Optional[float], speaker: Optional[str]):
+        if len(self.action_items) >= SUMMARY_MAX_ACTIONS:
+            return
+        folded = fold_accents(text)
+        cue = _ACTION_CUES.search(folded)
+        # Une même consigne répétée n'est comptée qu'une fois
+        if cue is None or folded in self._action_texts:
+            return
+        self._action_texts.add(folded)
+        due = _DUE_RE.search(folded)
+        self.action_items.append({
+            "text": text,
+            "speaker": speaker,
+            "start_time": round(start, 3) if start is not None else None,
+            "cue": cue.group(0),
+            "due": due.group(1) if due else None,
+        })
+
+    # --- Classement ---
+
+    def _matrix(self, candidates: List[Sentence]) -> np.ndarray:
+        """TF-IDF (log tf) des phrases candidates, lignes normalisées L2."""
+        vocabulary = [t for t, df in self.doc_freq.most_common(SUMMARY_MAX_VOCABULARY) if df >= 2]
+        if not vocabulary:
+            vocabulary = [t for t, _ in self.doc_freq.most_common(SUMMARY_MAX_VOCABULARY)]
+        column = {t: i for i, t in enumerate(vocabulary)}
+        n = len(self.sentences)
+        idf = np.array([math.log((1 + n) / (1 + self.doc_freq[t])) + 1 for t in vocabulary], dtype=np.float32)
+        matrix = np.zeros((len(candidates), len(vocabulary)), dtype=np.float32)
+        for row, sentence in enumerate(candidates):
+            for term, count in sentence.terms.items():
+                col = column.get(term)
+                if col is not None:
+                    matrix[row, col] = 1 + math.log(count)
+        matrix *= idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-9)
+
+    @staticmethod
+    def textrank(similarity: np.ndarray, iterations: int = 50, tolerance: float = 1e-6) -> np.ndarray:
+        n = similarity.shape[0]
+        weights = similarity.copy()
+        np.fill_diagonal(weights, 0.0)
+        totals = weights.sum(axis=1, keepdims=True)
+        # Phrase isolée (aucune similarité) : distribution uniforme
+        transition = np.where(totals > 0, weights / np.maximum(totals, 1e-9), 1.0 / n)
+        scores = np.full(n, 1.0 / n, dtype=np.float32)
+        for _ in range(iterations):
+            updated = (1 - TEXTRANK_DAMPING) / n + TEXTRANK_DAMPING * (transition.T @ scores)
+            if np.abs(updated - scores).sum() < tolerance:
+                return updated
+            scores = updated
+        return scores
+
+    def summarize(self) -> dict:
+        candidates = [s for s in self.sentences if sum(s.terms.values()) >= SENTENCE_MIN_TERMS] or self.sentences
+        if len(candidates) > SUMMARY_MAX_CANDIDATES:
+            richest = sorted(range(len(candidates)), key=lambda i: -len(candidates[i].terms))[:SUMMARY_MAX_CANDIDATES]
+            candidates = [candidates[i] for i in sorted(richest)]
+        selected: List[Sentence] = []
+        if candidates:
+            matrix = self._matrix(candidates)
+            similarity = matrix @ matrix.T
+            scores = self.textrank(similarity)
+            wanted = max(1, min(SUMMARY_MAX_SENTENCES, math.ceil(len(self.sentences) * SUMMARY_RATIO)))
+            chosen: List[int] = []
+            for index in np.argsort(-scores):
+                if all(similarity[index, other] < REDUNDANCY_THRESHOLD for other in chosen):
+                    chosen.append(int(index))
+                    if len(chosen) >= wanted:
+                        break
+            key_points = [
+                {
+                    "text": candidates[i].text,
+                    "speaker": candidates[i].speaker,
+                    "start_time": round(candidates[i].start, 3) if candidates[i].start is not None else None,
+                    "score": round(float(scores[i]), 5),
+                }
+                for i in chosen
+            ]
+            # Le résumé se lit dans l'ordre de la réunion
+            selected = [candidates[i] for i in sorted(chosen)]
+        else:
+            key_points = []
+        summary_text = " ".join(_sentence_case(s.text) for s in selected)
+        return {
+            "summary_text": summary_text,
+            "key_points": key_points,
+            "action_items": self.action_items,
+            "word_count": len(summary_text.split()),
+            "total_words": self.total_words,
+            "total_speakers": len(self.speakers),
+            "duration": (
+                round(self.last_end - self.first_start, 3)
+                if self.first_start is not None and self.last_end is not None else None
+            ),
+        }
+
+
+def _sentence_case(text: str) -> str:
+    text = text.strip()
+    return (text[:1].upper() + text[1:] + ("" if text.endswith((".", "?", "!")) else ".")) if text else text
+
+
+class SummaryEngine:
+    """
+    Résumés extractifs locaux (aucun appel réseau). Les finals alimentent
+    MeetingDigest au fil de la réunion ; à la fin, le classement tourne sur l'état
+    déjà tokenisé et la ligne MeetingSummary est créée ou rafraîchie. Si ce process
+    n'a pas vu tous les finals (autres workers, imports), l'état est reconstruit
+    depuis la table transcripts.
+    """
+
+    def __init__(self, max_meetings: int = SUMMARY_MAX_MEETINGS):
+        self.max_meetings = max_meetings
+        self._digests: "OrderedDict[int, MeetingDigest]" = OrderedDict()
+        self.finalized: "OrderedDict[int, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.generated = 0
+        self.rebuilt = 0
+
+    def add(self, row: dict):
+        """Un final (même dict que les lignes Transcript du tampon d'écriture)."""
+        meeting_id = row["meeting_id"]
+        with self._lock:
+            if meeting_id in self.finalized:
+                return
+            digest = self._digests.get(meeting_id)
+            if digest is None:
+                digest = self._digests[meeting_id] = MeetingDigest(meeting_id)
+                while len(self._digests) > self.max_meetings:
+                    self._digests.popitem(last=False)
+            else:
+                self._digests.move_to_end(meeting_id)
+            digest.add(row.get("text"), row.get("start_time"), row.get("end_time"), row.get("speaker"))
+
+    def _digest_for(self, db, meeting_id: int) -> MeetingDigest:
+        with self._lock:
+            digest = self._digests.pop(meeting_id, None)
+            self.finalized[meeting_id] = None
+            self.finalized.move_to_end(meeting_id)
+            while len(self.finalized) > SUMMARY_FINALIZED_MEMORY:
+                self.finalized.popitem(last=False)
+        stored = db.query(Transcript).filter(Transcript.meeting_id == meeting_id).count()
+        if digest is not None and digest.rows == stored:
+            return digest
+        self.rebuilt += 1
+        digest = MeetingDigest(meeting_id)
+        query = db.query(
+            Transcript.text, Transcript.start_time, Transcript.end_time, Transcript.speaker
+        ).filter(Transcript.meeting_id == meeting_id).order_by(Transcript.start_time, Transcript.id)
+        for text, start, end, speaker in query.execution_options(stream_results=True).yield_per(1000):
+            digest.add(text, start, end, speaker)
+        return digest
+
+    def reopen(self, meeting_id: int):
+        """Réunion (re)démarrée : ses finals alimentent de nouveau un digest."""
+        with self._lock:
+            self.finalized.pop(meeting_id, None)
+
+    def finalize(self, meeting_id: int) -> Optional[int]:
+        """Calculer et enregistrer le résumé ; retourne l'id de la ligne MeetingSummary."""
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            meeting = db.query(Meeting).filter(Meeting.id == meeting_id).first()
+            if meeting is None:
+                return None
+            digest = self._digest_for(db, meeting_id)
+            if not digest.sentences:
+                logger.info(f"Réunion {meeting_id}: aucune transcription, pas de résumé")
+                return None
+            result = digest.summarize()
+            summary = db.query(MeetingSummary).filter(
+                MeetingSummary.meeting_id == meeting_id,
+                MeetingSummary.model_used == SUMMARY_MODEL,
+            ).first()
+            if summary is None:
+                summary = MeetingSummary(meeting_id=meeting_id, model_used=SUMMARY_MODEL, is_auto_generated=True)
+                db.add(summary)
+            for field, value in result.items():
+                setattr(summary, field, value)
+            summary.language = meeting.language
+            summary.updated_at = datetime.utcnow()
+            db.commit()
+            self.generated += 1
+            logger.info(
+                f"📝 Résumé de la réunion {meeting_id}: {len(digest.sentences)} phrases, "
+                f"{len(result['action_items'])} actions en {time.perf_counter() - started:.2f}s"
+            )
+            return summary.id
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Résumé de la réunion {meeting_id} impossible: {e}", exc_info=True)
+            return None
+        finally:
+            db.close()
+
+    def schedule(self, meeting_id: int, delay: float = SUMMARY_SETTLE_SECONDS):
+        """Résumé en arrière-plan, une fois les derniers finals écrits (appelé par end_meeting)."""
+        timer = threading.Timer(delay, self.finalize, args=(meeting_id,))
+        timer.daemon = True
+        timer.start()
+
+    def stats(self) -> dict:
+        return {"tracked_meetings": len(self._digests), "generated": self.generated, "rebuilt": self.rebuilt}
+
+
+summary_engine = SummaryEngine()
+meeting_events.on(MEETING_STARTED, lambda event: summary_engine.reopen(event.meeting_id))
@@ -0,0 +1,62 @@
+# app/services/text_normalize.py
+import re
+import unicodedata
+from typing import Iterator, List, Tuple
+
+# Mots vides français (déjà sans accents) : ni indexés ni comptés comme mots-clés
+FRENCH_STOPWORDS = frozenset("""
+a ai aie aient aies ait alors as au aucun aura aurai auraient aurais aurait auras aurez auriez aurions aurons
+auront aussi autre aux avaient avais avait avant avec avez aviez avions avoir avons ayant ayez ayons bah ben bon
+c ca car ce ceci cela celle celles celui cependant certes ces cet cette ceux chacun chez ci comme comment d dans
+de des deja donc dont du elle elles en encore enfin entre es est et etaient etais etait etant ete etes etiez
+etions etre eu eue eues eumes eurent eus eusse eussent eusses eussiez eussions eut eutes euh eux fait faut fois
+fut furent fus fusse fussent fusses fussiez fussions fut hein hum ici il ils j je jusqu l la le les leur leurs
+lors lui m ma mais me meme memes mes moi mon n ne ni non nos notre nous o oh ok on ont ou oui par parce pas
+peu peut plus pour pourquoi puis qu quand que quel quelle quelles quels qui quoi s sa sans se sera serai
+seraient serais serait seras serez seriez serions serons seront ses si sien soi soient sois soit sommes son
+sont sous suis sur t ta tandis te tes toi ton tous tout toute toutes tres tu un une unes uns va vais voila vont
+vos votre vous vu y
+""".split())
+
+# Élisions : "l'équipe" -> "equipe", "qu'il" -> "il", "aujourd'hui" reste entier
+_ELISION_RE = re.compile(r"^(?:l|d|j|m|n|s|t|c|qu|jusqu|lorsqu|puisqu|quoiqu)['’]")
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:['’][a-z0-9]+)*")
+_LIGATURES = str.maketrans({"œ": "oe", "Œ": "oe", "æ": "ae", "Æ": "ae", "’": "'", "ß": "ss"})
+
+
+def fold_accents(text: str) -> str:
+    """Minuscules sans diacritiques ni ligatures : "Été, cœur" -> "ete, coeur"."""
+    decomposed = unicodedata.normalize("NFKD", text.translate(_LIGATURES).lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def stem(term: str) -> str:
+    """Racinisation légère : pluriels réguliers (réunions -> reunion, travaux -> travau)."""
+    if len(term) > 3 and term[-1] in "sx" and term[-2] not in "su":
+        return term[:-1]
+    return term
+
+
+def normalize_word(word: str) -> List[str]:
+    """Termes d'un mot de la transcription (0, 1 ou plusieurs : "l'équipe-projet" -> equipe, projet)."""
+    terms = []
+    for token in _TOKEN_RE.findall(fold_accents(word).replace("-", " ")):
+        token = _ELISION_RE.sub("", token).replace("'", "")
+        if token and token not in FRENCH_STOPWORDS:
+            terms.append(stem(token))
+    return terms
+
+
+def tokenize(text: str) -> Iterator[Tuple[str, int]]:
+    """
+    (terme, rang du mot) pour chaque terme du texte. Le rang est l'indice du mot
+    dans le texte découpé aux espaces, c'est-à-dire dans raw_data["words"] de Vosk
+    (le texte d'un résultat est la suite de ses mots).
+    """
+    for offset, word in enumerate(text.split()):
+        for term in normalize_word(word):
+            yield term, offset
+
+
+def terms(text: str) -> List[str]:
+    return [term for term, _ in tokenize(text)]
@@ -0,0 +1,270 @@
+# app/services/topic_stream.py
+import asyncio
+import heapq
+import logging
+import math
+import os
+import time
+from collections import Counter, OrderedDict, deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.services import broadcaster, pubsub
+from app.services.meeting_events import meeting_events, MEETING_ENDED, MEETING_STARTED
+from app.services.search_index import search_index
+from app.services.text_normalize import normalize_word
+
+logger = logging.getLogger(__name__)
+
+TOPICS_ENABLED = os.environ.get("TOPICS_ENABLED", "1") not in ("0", "false", "False")
+# Fenêtre glissante des finals pris en compte (secondes de réunion)
+TOPICS_WINDOW_SECONDS = float(os.environ.get("TOPICS_WINDOW_SECONDS", 300))
+# Au plus un événement "topics" par réunion et par intervalle
+TOPICS_INTERVAL_SECONDS = float(os.environ.get("TOPICS_INTERVAL_SECONDS", 10))
+TOPICS_TOP_K = int(os.environ.get("TOPICS_TOP_K", 8))
+# Occurrences minimales dans la fenêtre pour qu'un terme soit un sujet
+TOPICS_MIN_COUNT = 2
+# Termes transmis aux autres workers pour le classement fusionné
+TOPICS_CANDIDATES = TOPICS_TOP_K * 4
+# Un couple de termes consécutifs ("base donnees") pèse plus qu'un terme seul
+BIGRAM_BOOST = 1.5
+# Réunions terminées mémorisées (finals tardifs ignorés)
+TOPICS_ENDED_MEMORY = 1000
+
+
+def corpus_idf(term: str) -> float:
+    """IDF d'un terme (ou de son premier mot) d'après l'index de recherche de tous les transcripts."""
+    documents = len(search_index.docs)
+    if not documents:
+        return 1.0
+    df = search_index.doc_freq.get(term.split(" ", 1)[0], 0)
+    return math.log((documents + 1) / (df + 1)) + 1
+
+
+class TopicWindow:
+    """
+    Statistiques de termes sur les TOPICS_WINDOW_SECONDS dernières secondes d'une
+    réunion : chaque final ajoute ses termes (et couples de termes) aux compteurs,
+    les finals sortis de la fenêtre les retirent. Coût constant par énoncé quelle
+    que soit la durée de la réunion ; seul le classement parcourt la fenêtre.
+    """
+
+    def __init__(self, meeting_id, window_seconds: float = TOPICS_WINDOW_SECONDS):
+        self.meeting_id = meeting_id
+        self.window_seconds = window_seconds
+        self.entries: Deque[Tuple[float, Counter]] = deque()
+        self.counts: Counter = Counter()
+        # terme -> forme affichée (dernier mot entendu)
+        self.surface: Dict[str, str] = {}
+        self.latest = 0.0
+        self.last_emit = 0.0
+        self.last_topics: List[str] = []
+        self.last_candidates: List[list] = []
+        self.pending: Optional[asyncio.TimerHandle] = None
+
+    def add(self, text: str, at: float):
+        counts: Counter = Counter()
+        previous = None
+        for word in (text or "").split():
+            normalized = normalize_word(word)
+            for term in normalized:
+                counts[term] += 1
+                self.surface[term] = word.lower().strip(".,;:!?")
+                if previous is not None:
+                    bigram = f"{previous} {term}"
+                    counts[bigram] += 1
+                    self.surface[bigram] = f"{self.surface[previous]} {self.surface[term]}"
+                previous = term
+            if not normalized:
+                # Un mot vide coupe les couples ("budget de la migration" -> pas de "budget migration")
+                previous = None
+        if not counts:
+            return
+        self.latest = max(self.latest, at)
+        self.entries.append((at, counts))
+        self.counts.update(counts)
+        self._expire()
+
+    def _expire(self):
+        horizon = self.latest - self.window_seconds
+        while self.entries and self.entries[0][0] < horizon:
+            _, counts = self.entries.popleft()
+            self.counts.subtract(counts)
+            for term in counts:
+                if self.counts[term] <= 0:
+                    del self.counts[term]
+                    self.surface.pop(term, None)
+
+    def top(self, k: int = TOPICS_TOP_K) -> List[dict]:
+        return rank_topics(self.counts, self.surface, k)
+
+    def candidates(self, k: int = TOPICS_CANDIDATES) -> List[list]:
+        """[terme, occurrences, forme affichée] des k meilleurs termes, partagés avec les autres workers."""
+        best = heapq.nlargest(k, ((score_term(term, count), term, count) for term, count in self.counts.items()))
+        return [[term, count, self.surface.get(term, term)] for _, term, count in best]
+
+
+def score_term(term: str, count: int) -> float:
+    return count * corpus_idf(term) * (BIGRAM_BOOST if " " in term else 1.0)
+
+
+def rank_topics(counts: Counter, surface: Dict[str, str], k: int = TOPICS_TOP_K) -> List[dict]:
+    scored = [(score_term(term, count), term, count) for term, count in counts.items() if count >= TOPICS_MIN_COUNT]
+    best = heapq.nlargest(k * 2, scored)
+    topics, covered = [], set()
+    for score, term, count in best:
+        # Un couple retenu couvre ses deux termes (pas "base", "donnees" et "base donnees")
+        parts = term.split(" ")
+        if all(part in covered for part in parts):
+            continue
+        covered.update(parts)
+        topics.append({"term": surface.get(term, term), "score": round(score, 3), "count": count})
+        if len(topics) >= k:
+            break
+    return topics
+
+
+class TopicStreams:
+    """
+    Sujets en cours par réunion, poussés aux abonnés (événement "topics") au plus
+    une fois par TOPICS_INTERVAL_SECONDS et seulement s'ils ont changé. Le dernier
+    événement est envoyé à chaque nouvel abonné : un participant en retard voit
+    tout de suite de quoi on parle.
+    Avec plusieurs workers, chacun diffuse ses meilleurs termes (message interne
+    "topic_counts") ; chaque worker classe la somme des compteurs de tous et
+    pousse le résultat à ses propres abonnés, qui voient donc tous la même liste.
+    Les compteurs d'un worker sans nouvelles depuis TOPICS_WINDOW_SECONDS sont oubliés.
+    Une réunion terminée n'accepte plus rien : les derniers finals des sessions
+    fermées après MEETING_ENDED ne recréent pas de fenêtre (ni de minuterie).
+    """
+
+    def __init__(self, origin: Optional[str] = None):
+        self._origin = origin
+        self.windows: Dict[object, TopicWindow] = {}
+        # Compteurs des autres workers : meeting_id -> origine -> (reçu à, candidats)
+        self.remote: Dict[object, Dict[str, Tuple[float, List[list]]]] = {}
+        # Dernier payload par réunion
+        self.latest: Dict[object, dict] = {}
+        self.ended: "OrderedDict[object, None]" = OrderedDict()
+        self.published = 0
+
+    @property
+    def origin(self) -> str:
+        return self._origin or getattr(pubsub.broadcast_backend, "origin", "local")
+
+    def _window(self, meeting_id) -> TopicWindow:
+        window = self.windows.get(meeting_id)
+        if window is None:
+            window = self.windows[meeting_id] = TopicWindow(meeting_id)
+        return window
+
+    def add(self, row: dict):
+        """Un final (ligne Transcript), appelé dans la boucle asyncio."""
+        if not TOPICS_ENABLED:
+            return
+        at = row.get("end_time")
+        if at is None:
+            # La fenêtre est indexée sur le temps de réunion : pas d'horloge de repli
+            return
+        if row["meeting_id"] in self.ended:
+            return
+        window = self._window(row["meeting_id"])
+        window.add(row.get("text"), at)
+        self._schedule(window)
+
+    def _schedule(self, window: TopicWindow):
+        if window.pending is not None:
+            return
+        delay = window.last_emit + TOPICS_INTERVAL_SECONDS - time.monotonic()
+        if delay <= 0:
+            self._emit(window)
+        else:
+            # Fin de l'intervalle : un seul envoi pour tous les finals arrivés entre-temps
+            window.pending = asyncio.get_running_loop().call_later(delay, self._emit, window)
+
+    def _emit(self, window: TopicWindow):
+        window.pending = None
+        meeting_id = window.meeting_id
+        if self.windows.get(meeting_id) is not window:
+            return
+        candidates = window.candidates()
+        if candidates != window.last_candidates:
+            window.last_candidates = candidates
+            window.last_emit = time.monotonic()
+            asyncio.ensure_future(pubsub.broadcast_backend.publish_internal(meeting_id, {
+                "type": "topic_counts",
+                "meeting_id": meeting_id,
+                "origin": self.origin,
+                "candidates": candidates,
+            }))
+        topics = self.merged_topics(window)
+        terms = [t["term"] for t in topics]
+        if terms == window.last_topics:
+            return
+        window.last_topics = terms
+        window.last_emit = time.monotonic()
+        payload = {
+            "type": "topics",
+            "meeting_id": meeting_id,
+            "window_seconds": window.window_seconds,
+            "topics": topics,
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+        self.latest[meeting_id] = payload
+        self.published += 1
+        # Abonnés de ce worker seulement : les autres classent les mêmes compteurs
+        broadcaster.publish(meeting_id, payload)
+
+    def merged_topics(self, window: TopicWindow) -> List[dict]:
+        """Classement sur les compteurs de ce worker et ceux, encore frais, des autres."""
+        remote = self.remote.get(window.meeting_id)
+        if not remote:
+            return window.top()
+        counts, surface = Counter(window.counts), dict(window.surface)
+        horizon = time.monotonic() - window.window_seconds
+        for origin, (received, candidates) in list(remote.items()):
+            if received < horizon:
+                del remote[origin]
+                continue
+            for term, count, form in candidates:
+                counts[term] += count
+                surface.setdefault(term, form)
+        return rank_topics(counts, surface)
+
+    def snapshot(self, meeting_id) -> Optional[dict]:
+        return self.latest.get(meeting_id)
+
+    def remember_remote(self, meeting_id, payload: dict):
+        """Compteurs publiés par un autre worker (reçus via le broker de diffusion)."""
+        if not TOPICS_ENABLED or payload.get("type") != "topic_counts" or payload.get("origin") == self.origin:
+            return
+        if meeting_id in self.ended:
+            return
+        self.remote.setdefault(meeting_id, {})[payload["origin"]] = (time.monotonic(), payload.get("candidates") or [])
+        self._schedule(self._window(meeting_id))
+
+    def drop(self, meeting_id):
+        """Fin de réunion : libérer son état et ignorer ce qui arrive ensuite."""
+        self.ended[meeting_id] = None
+        self.ended.move_to_end(meeting_id)
+        while len(self.ended) > TOPICS_ENDED_MEMORY:
+            self.ended.popitem(last=False)
+        window = self.windows.pop(meeting_id, None)
+        if window is not None and window.pending is not None:
+            window.pending.cancel()
+        self.remote.pop(meeting_id, None)
+        self.latest.pop(meeting_id, None)
+
+    def reopen(self, meeting_id):
+        """Réunion (re)démarrée : ses finals comptent de nouveau."""
+        self.ended.pop(meeting_id, None)
+
+    def stats(self) -> dict:
+        return {"meetings": len(self.windows), "published": self.published}
+
+
+topic_streams = TopicStreams()
+broadcaster.snapshot_providers.append(topic_streams.snapshot)
+pubsub.remote_listeners.append(topic_streams.remember_remote)
+meeting_events.on(MEETING_ENDED, lambda event: topic_streams.drop(event.meeting_id))
+meeting_events.on(MEETING_STARTED, lambda event: topic_streams.reopen(event.meeting_id))
@@ -0,0 +1,186 @@
+# app/services/transcript_writer.py
+import asyncio
+import logging
+import os
+import threading
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from app.database import SessionLocal
+from app.models.transcript import Transcript
+
+logger = logging.getLogger(__name__)
+
+# Écriture groupée : au plus tous les TRANSCRIPT_BATCH_SIZE finals ou TRANSCRIPT_FLUSH_MS millisecondes
+TRANSCRIPT_BATCH_SIZE = int(os.environ.get("TRANSCRIPT_BATCH_SIZE", 50))
+TRANSCRIPT_FLUSH_MS = int(os.environ.get("TRANSCRIPT_FLUSH_MS", 1000))
+# Lignes conservées en mémoire si la base est indisponible (au-delà, les plus anciennes sont perdues)
+TRANSCRIPT_MAX_PENDING = int(os.environ.get("TRANSCRIPT_MAX_PENDING", 10000))
+# Texte d'un final tronqué à cette longueur (colonne TEXT MySQL : 64 Ko, jusqu'à 4 octets par caractère)
+TRANSCRIPT_MAX_TEXT_CHARS = int(os.environ.get("TRANSCRIPT_MAX_TEXT_CHARS", 16000))
+# Lignes refusées par la base gardées pour inspection (stats, logs)
+TRANSCRIPT_DEAD_LETTERS = int(os.environ.get("TRANSCRIPT_DEAD_LETTERS", 100))
+
+# Longueurs des colonnes String du modèle (speaker, language)
+_COLUMN_LENGTHS = {
+    name: Transcript.__table__.c[name].type.length for name in ("speaker", "language")
+}
+
+
+def clean_row(row: dict) -> Optional[dict]:
+    """
+    Ramener une ligne aux contraintes de la table : speaker (identifiant fourni
+    par le client) et language tronqués à la longueur de leur colonne, texte
+    borné. None si la ligne ne peut pas être écrite (texte vide).
+    """
+    text = row.get("text")
+    if not text:
+        return None
+    row = dict(row, text=str(text)[:TRANSCRIPT_MAX_TEXT_CHARS])
+    for name, length in _COLUMN_LENGTHS.items():
+        value = row.get(name)
+        if value is not None:
+            row[name] = str(value)[:length]
+    return row
+
+
+def is_transient(error: Exception) -> bool:
+    """Base injoignable ou connexion perdue : le lot sera réessayé tel quel."""
+    return isinstance(error, (OperationalError, InterfaceError))
+
+
+class TranscriptWriteBehind:
+    """
+    Tampon d'écriture différée des transcriptions finales du WebSocket.
+    add() ne fait qu'ajouter un dict en mémoire ; une tâche de fond insère les
+    lignes en masse (un seul commit par lot) dans un thread de l'executor.
+    Si la base est indisponible, le lot est remis en tête de file ; si elle
+    refuse des lignes (contrainte, donnée invalide), le lot est coupé en deux
+    jusqu'à isoler les lignes fautives, écartées dans dead_letters.
+    """
+
+    def __init__(self, batch_size: int = TRANSCRIPT_BATCH_SIZE, flush_ms: int = TRANSCRIPT_FLUSH_MS):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_ms / 1000.0
+        self._rows: List[dict] = []
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.rows_written = 0
+        self.batches_written = 0
+        self.rows_dropped = 0
+        self.dead_letters: Deque[Tuple[dict, str]] = deque(maxlen=TRANSCRIPT_DEAD_LETTERS)
+        self.rows_rejected = 0
+
+    def add(self, row: dict):
+        row = clean_row(row)
+        if row is None:
+            return
+        with self._lock:
+            self._rows.append(row)
+            self._trim()
+            full = len(self._rows) >= self.batch_size
+        if full and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _trim(self):
+        # Sous self._lock : au-delà de TRANSCRIPT_MAX_PENDING, les lignes les plus anciennes sont perdues
+        excess = len(self._rows) - TRANSCRIPT_MAX_PENDING
+        if excess > 0:
+            del self._rows[:excess]
+            self.rows_dropped += excess
+            logger.error(f"File des transcriptions pleine : {excess} ligne(s) les plus anciennes perdues")
+
+    def _take(self) -> List[dict]:
+        with self._lock:
+            rows, self._rows = self._rows, []
+        return rows
+
+    def _restore(self, rows: List[dict]):
+        with self._lock:
+            self._rows = rows + self._rows
+            self._trim()
+
+    def _insert(self, rows: List[dict]):
+        db = SessionLocal()
+        try:
+            db.bulk_insert_mappings(Transcript, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _write(self, rows: List[dict]) -> Tuple[List[Tuple[dict, Exception]], List[dict]]:
+        """
+        Insérer un lot ; s'il est refusé, bisection pour écrire les lignes valides.
+        Retourne (lignes refusées une à une, lignes non écrites faute de base).
+        """
+        try:
+            self._insert(rows)
+            self.rows_written += len(rows)
+            self.batches_written += 1
+            return [], []
+        except Exception as e:
+            if is_transient(e):
+                return [], rows
+            if len(rows) == 1:
+                return [(rows[0], e)], []
+        middle = len(rows) // 2
+        rejected, pending = self._write(rows[:middle])
+        if pending:
+            return rejected, pending + rows[middle:]
+        more_rejected, pending = self._write(rows[middle:])
+        return rejected + more_rejected, pending
+
+    def _dead_letter(self, failed: List[Tuple[dict, Exception]]):
+        for row, error in failed:
+            self.rows_rejected += 1
+            self.dead_letters.append((row, str(error)))
+            logger.error(
+                f"Transcription écartée (réunion {row.get('meeting_id')}, "
+                f"session {(row.get('raw_data') or {}).get('session_id')}): {error}"
+            )
+
+    async def flush(self):
+        rows = self._take()
+        if not rows:
+            return
+        loop = asyncio.get_running_loop()
+        rejected, pending = await loop.run_in_executor(None, self._write, rows)
+        self._dead_letter(rejected)
+        if pending:
+            # Base indisponible : on garde les lignes pour le prochain lot plutôt que de les perdre
+            logger.error(f"Écriture des transcriptions échouée, {len(pending)} ligne(s) remises en file")
+            self._restore(pending)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Arrêter la tâche de fond et écrire ce qui reste (arrêt du serveur)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+transcript_writer = TranscriptWriteBehind()
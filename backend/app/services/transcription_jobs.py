@@ -0,0 +1,367 @@
+# app/services/transcription_jobs.py
+import asyncio
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator, List, Optional, Tuple
+
+from app.database import SessionLocal
+from app.models.meeting import Meeting, MeetingStatus
+from app.models.recording import AudioRecording
+from app.models.transcript import Transcript
+from app.models.transcription_job import TranscriptionJob
+from app.services.batch_transcriber import WavLayout, get_batch_transcriber, read_wav_layout, shutdown_batch_transcribers
+from app.services.recording_writer import RECORDINGS_DIR
+from app.services.summarizer import summary_engine
+
+logger = logging.getLogger(__name__)
+
+# Jobs exécutés en parallèle par ce process (0 = ce process ne traite pas la file)
+JOB_WORKERS = int(os.environ.get("TRANSCRIPTION_JOB_WORKERS", 1))
+# Attente entre deux recherches de job quand la file est vide
+JOB_POLL_SECONDS = float(os.environ.get("TRANSCRIPTION_JOB_POLL_SECONDS", 2))
+JOB_MAX_ATTEMPTS = int(os.environ.get("TRANSCRIPTION_JOB_MAX_ATTEMPTS", 3))
+# Report avant une nouvelle tentative : base * 2^(tentative - 1)
+JOB_RETRY_BASE_SECONDS = float(os.environ.get("TRANSCRIPTION_JOB_RETRY_SECONDS", 30))
+# Job "running" sans signe de vie depuis ce délai : son worker est mort, il repart en file
+JOB_STALE_SECONDS = float(os.environ.get("TRANSCRIPTION_JOB_STALE_SECONDS", 600))
+# Intervalle minimal entre deux écritures de progression
+JOB_PROGRESS_SECONDS = float(os.environ.get("TRANSCRIPTION_JOB_PROGRESS_SECONDS", 2))
+
+# Fichiers importés par l'API
+UPLOADS_DIR = os.environ.get("UPLOADS_DIR", os.path.join(RECORDINGS_DIR, "uploads"))
+UPLOAD_MAX_BYTES = int(os.environ.get("UPLOAD_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+
+class UploadRejected(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+async def store_upload(chunks: AsyncIterator[bytes], meeting_id: int, file_name: Optional[str]) -> Tuple[str, int, WavLayout]:
+    """
+    Copier le corps d'une requête sur disque au fil de sa réception (jamais entier
+    en mémoire) et vérifier que c'est un WAV PCM 16 bits lisible par BatchTranscriber.
+    Les écritures, regroupées par UPLOAD_CHUNK_BYTES, passent par l'executor par défaut.
+    """
+    os.makedirs(UPLOADS_DIR, exist_ok=True)
+    base = os.path.basename(file_name or "recording.wav")
+    path = os.path.join(UPLOADS_DIR, f"meeting_{meeting_id}_{datetime.utcnow():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}_{base}")
+    loop = asyncio.get_running_loop()
+    size = 0
+    pending = bytearray()
+    try:
+        with open(path, "wb") as out:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > UPLOAD_MAX_BYTES:
+                    raise UploadRejected(413, f"Fichier trop volumineux (max {UPLOAD_MAX_BYTES // (1024 * 1024)} Mo)")
+                pending += chunk
+                if len(pending) >= UPLOAD_CHUNK_BYTES:
+                    await loop.run_in_executor(None, out.write, bytes(pending))
+                    pending.clear()
+            if pending:
+                await loop.run_in_executor(None, out.write, bytes(pending))
+        try:
+            layout = await loop.run_in_executor(None, read_wav_layout, path)
+        except (ValueError, struct.error) as e:
+            raise UploadRejected(400, f"Fichier WAV PCM 16 bits attendu: {e}")
+        if not layout.frames:
+            raise UploadRejected(400, "Fichier audio vide")
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, size, layout
+
+
+def enqueue_recording(db, recording: AudioRecording, priority: int = 0, user_id: Optional[int] = None,
+                      offset_seconds: float = 0.0) -> TranscriptionJob:
+    """Ajouter un job pour l'enregistrement (dans la transaction de l'appelant, qui commit)."""
+    job = TranscriptionJob(
+        recording_id=recording.id,
+        meeting_id=recording.meeting_id,
+        created_by=user_id,
+        priority=priority,
+        status=JOB_QUEUED,
+        available_at=datetime.utcnow(),
+        offset_seconds=offset_seconds,
+        max_attempts=JOB_MAX_ATTEMPTS,
+    )
+    db.add(job)
+    recording.processing_status = "pending"
+    return job
+
+
+def segment_rows(recording: AudioRecording, meeting: Meeting, result: dict, offset: float,
+                 speaker: Optional[str]) -> List[dict]:
+    """
+    Une ligne Transcript par segment décodé (coupé aux silences), au même format
+    que les finals du WebSocket : temps en secondes depuis le début de la réunion.
+    """
+    words = [
+        {**w, "start": round(w["start"] + offset, 3), "end": round(w["end"] + offset, 3)}
+        for w in result["words"]
+    ]
+    rows = []
+    position = 0
+    for segment in result["segments"]:
+        segment_words = []
+        while position < len(words) and words[position]["start"] < segment["end"] + offset:
+            segment_words.append(words[position])
+            position += 1
+        if not segment["text"]:
+            continue
+        if segment_words:
+            start_time, end_time = segment_words[0]["start"], segment_words[-1]["end"]
+            confidence = sum(w.get("conf", 0) for w in segment_words) / len(segment_words)
+        else:
+            start_time, end_time = round(segment["start"] + offset, 3), round(segment["end"] + offset, 3)
+            confidence = 0.0
+        rows.append({
+            "meeting_id": recording.meeting_id,
+            "text": segment["text"],
+            "speaker": speaker,
+            "start_time": start_time,
+            "end_time": end_time,
+            "duration": round(end_time - start_time, 3),
+            "confidence": confidence,
+            "language": meeting.language,
+            "is_final": True,
+            "raw_data": {"words": segment_words, "recording_id": recording.id},
+        })
+    return rows
+
+
+class TranscriptionJobQueue:
+    """
+    File de transcription de fichiers persistée en base (table transcription_jobs).
+    Des threads de ce process réservent le prochain job (priorité, puis
+    ancienneté) avec SELECT ... FOR UPDATE SKIP LOCKED, si bien que plusieurs
+    process API ou workers dédiés peuvent se partager la file. Le décodage part
+    sur le pool de BatchTranscriber ; la progression est écrite dans
+    processing_status de l'enregistrement, les segments dans transcripts.
+    Un échec est retenté avec un report exponentiel jusqu'à max_attempts.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = max(0, workers)
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+
+    def start(self):
+        if self._threads or not self.workers:
+            return
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"transcription-job-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"🗂️ File de transcription démarrée ({self.workers} job(s) en parallèle)")
+
+    def stop(self, timeout: Optional[float] = None):
+        """Le job en cours se termine ; s'il dépasse timeout, il sera repris (JOB_STALE_SECONDS)."""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self):
+        """Un job vient d'être ajouté : ne pas attendre la fin de JOB_POLL_SECONDS."""
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                job_id = self._claim()
+            except Exception as e:
+                logger.error(f"Réservation d'un job de transcription impossible: {e}", exc_info=True)
+                job_id = None
+            if job_id is None:
+                self._wakeup.wait(JOB_POLL_SECONDS)
+                self._wakeup.clear()
+                continue
+            self._execute(job_id)
+
+    def _claim(self) -> Optional[int]:
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            # Jobs abandonnés par un worker mort (crash, redémarrage, mémoire épuisée) :
+            # retour en file comme après une erreur, ou échec définitif après max_attempts
+            stale = db.query(TranscriptionJob).filter(
+                TranscriptionJob.status == JOB_RUNNING,
+                TranscriptionJob.heartbeat_at < now - timedelta(seconds=JOB_STALE_SECONDS),
+            ).with_for_update(skip_locked=True).all()
+            for job in stale:
+                self._record_failure(
+                    job, f"Worker {job.worker} sans signe de vie depuis plus de {JOB_STALE_SECONDS:.0f}s"
+                )
+            job = db.query(TranscriptionJob).filter(
+                TranscriptionJob.status == JOB_QUEUED,
+                TranscriptionJob.available_at <= now,
+            ).order_by(
+                TranscriptionJob.priority.desc(), TranscriptionJob.id
+            ).with_for_update(skip_locked=True).first()
+            if job is None:
+                db.commit()
+                return None
+            job.status = JOB_RUNNING
+            job.attempts = (job.attempts or 0) + 1
+            job.worker = self.name
+            job.started_at = job.heartbeat_at = now
+            job.progress = 0.0
+            db.commit()
+            return job.id
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _execute(self, job_id: int):
+        db = SessionLocal()
+        try:
+            job = db.get(TranscriptionJob, job_id)
+            recording = job.recording
+            meeting = db.query(Meeting).filter(Meeting.id == job.meeting_id).first()
+            recording.processing_status = "processing"
+            db.commit()
+
+            last_write = [0.0]
+
+            def on_progress(done: float, total: float):
+                now = time.monotonic()
+                if now - last_write[0] < JOB_PROGRESS_SECONDS:
+                    return
+                last_write[0] = now
+                progress = min(1.0, done / total) if total else 1.0
+                job.progress = round(progress, 3)
+                job.heartbeat_at = datetime.utcnow()
+                recording.processing_status = f"processing:{int(progress * 100)}"
+                db.commit()
+
+            started = time.perf_counter()
+            result = get_batch_transcriber(meeting.language if meeting else None).transcribe(
+                recording.file_path, on_progress
+            )
+            rows = segment_rows(
+                recording, meeting, result, job.offset_seconds or 0.0,
+                str(job.created_by) if job.created_by is not None else None,
+            )
+            db.bulk_insert_mappings(Transcript, rows, return_defaults=True)
+            recording.transcript_id = rows[0].get("id") if rows else None
+            recording.duration = result["duration"]
+            recording.is_processed = True
+            recording.processing_status = "completed"
+            recording.processed_at = datetime.utcnow()
+            job.status = JOB_COMPLETED
+            job.progress = 1.0
+            job.error = None
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            self.completed += 1
+            if meeting is not None and meeting.status == MeetingStatus.COMPLETED:
+                # Réunion déjà terminée : son résumé doit inclure l'enregistrement importé
+                summary_engine.schedule(meeting.id, delay=0)
+            logger.info(
+                f"✅ Job {job_id}: enregistrement {recording.id} transcrit "
+                f"({len(rows)} segments, {time.perf_counter() - started:.1f}s)"
+            )
+        except Exception as e:
+            db.rollback()
+            if self._stop.is_set():
+                # Arrêt du serveur pendant le décodage : le job repart en file sans compter d'échec
+                logger.info(f"Job de transcription {job_id} interrompu par l'arrêt, remis en file")
+                self._requeue(db, job_id)
+            else:
+                logger.error(f"Job de transcription {job_id} en erreur: {e}", exc_info=True)
+                self._fail(db, job_id, str(e))
+        finally:
+            db.close()
+
+    def _requeue(self, db, job_id: int):
+        try:
+            db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).update({
+                "status": JOB_QUEUED,
+                "attempts": TranscriptionJob.attempts - 1,
+                "worker": None,
+                "available_at": datetime.utcnow(),
+            }, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Impossible de remettre le job {job_id} en file: {e}", exc_info=True)
+
+    def _record_failure(self, job: TranscriptionJob, error: str):
+        """Nouvelle tentative avec report exponentiel, ou échec définitif après max_attempts."""
+        job.error = error[:2000]
+        job.worker = None
+        job.finished_at = datetime.utcnow()
+        if (job.attempts or 0) < job.max_attempts:
+            job.status = JOB_QUEUED
+            job.available_at = datetime.utcnow() + timedelta(
+                seconds=JOB_RETRY_BASE_SECONDS * 2 ** max(0, (job.attempts or 0) - 1)
+            )
+            status = "pending"
+            self.retried += 1
+        else:
+            job.status = JOB_FAILED
+            status = "failed"
+            self.failed += 1
+        if job.recording is not None:
+            job.recording.processing_status = status
+
+    def _fail(self, db, job_id: int, error: str):
+        try:
+            job = db.get(TranscriptionJob, job_id)
+            if job is None:
+                return
+            self._record_failure(job, error)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Impossible d'enregistrer l'échec du job {job_id}: {e}", exc_info=True)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "running": sum(thread.is_alive() for thread in self._threads),
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+
+transcription_jobs = TranscriptionJobQueue()
+
+
+if __name__ == "__main__":
+    # Worker dédié, hors des process API : python -m app.services.transcription_jobs
+    logging.basicConfig(level=logging.INFO)
+    queue = TranscriptionJobQueue(max(1, JOB_WORKERS))
+    queue.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        queue.stop()
+        shutdown_batch_transcribers()
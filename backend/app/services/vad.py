@@ -0,0 +1,192 @@
+# app/services/vad.py
+import os
+from bisect import bisect_right
+from collections import deque
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+VAD_ENABLED = os.environ.get("VAD_ENABLED", "1") not in ("0", "false", "False")
+VAD_FRAME_MS = int(os.environ.get("VAD_FRAME_MS", 20))
+# Marge au-dessus du bruit de fond estimé pour déclarer une trame "parole"
+VAD_THRESHOLD_DB = float(os.environ.get("VAD_THRESHOLD_DB", 10))
+# Plancher absolu : en dessous, jamais de parole (silence numérique, micro coupé)
+VAD_MIN_DBFS = float(os.environ.get("VAD_MIN_DBFS", -60))
+# Maintien en état "parole" après la dernière trame active (fin de mots, pauses courtes)
+VAD_HANGOVER_MS = int(os.environ.get("VAD_HANGOVER_MS", 400))
+# Silence conservé et réinjecté au début de la parole pour ne pas couper l'attaque
+VAD_PREROLL_MS = int(os.environ.get("VAD_PREROLL_MS", 200))
+# Remontée maximale du bruit de fond estimé (dB par seconde) ; il redescend immédiatement
+VAD_NOISE_RISE_DB = float(os.environ.get("VAD_NOISE_RISE_DB", 3))
+# Taux de passage par zéro typique des fricatives (s, ch, f) : parole même à faible énergie
+VAD_FRICATIVE_ZCR = float(os.environ.get("VAD_FRICATIVE_ZCR", 0.25))
+
+# Segments retournés par VadGate.process
+SEGMENT_AUDIO = "audio"
+SEGMENT_END = "end"
+
+
+class VadGate:
+    """
+    Détection d'activité vocale (énergie + passages par zéro, lissage par hangover)
+    placée devant le recognizer. Les trames de silence ne sont pas décodées ;
+    une fin de parole produit un segment SEGMENT_END pour forcer le résultat final.
+    Entrée : PCM s16le mono.
+    """
+
+    def __init__(self, sample_rate: int = 16000):
+        self.sample_rate = sample_rate
+        self.frame_len = max(1, sample_rate * VAD_FRAME_MS // 1000)
+        self.hangover_frames = max(1, VAD_HANGOVER_MS // VAD_FRAME_MS)
+        # Bruit de fond : initialisé par la première trame, puis suivi de minimum
+        self.noise_floor: Optional[float] = None
+        self.noise_rise = VAD_NOISE_RISE_DB * VAD_FRAME_MS / 1000.0
+        self.in_speech = False
+        self.frames_since_speech = self.hangover_frames + 1
+        self.preroll = deque(maxlen=max(1, VAD_PREROLL_MS // VAD_FRAME_MS))
+        self._remainder = b""
+        # Échantillons du flux déjà classés (position du début du prochain chunk)
+        self.position = 0
+
+        # Compteurs exposés par session
+        self.decoded_bytes = 0
+        self.gated_bytes = 0
+        self.utterances = 0
+
+    def _classify(self, frames: np.ndarray) -> np.ndarray:
+        """Retourne un booléen par trame : parole (avant hangover)."""
+        power = np.mean(frames * frames, axis=1)
+        energy_db = 10.0 * np.log10(power / (32768.0 * 32768.0) + 1e-12)
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        floor = self._track_floor(energy_db)
+        loud = energy_db > np.maximum(floor + VAD_THRESHOLD_DB, VAD_MIN_DBFS)
+        fricative = (energy_db > np.maximum(floor + VAD_THRESHOLD_DB / 2, VAD_MIN_DBFS)) & (zcr > VAD_FRICATIVE_ZCR)
+        return loud | fricative
+
+    def _track_floor(self, energy_db: np.ndarray) -> np.ndarray:
+        """
+        Bruit de fond par trame, mis à jour sur toutes les trames (parole comprise) :
+        il suit immédiatement une énergie plus basse et ne remonte que de
+        VAD_NOISE_RISE_DB par seconde. Dans une salle bruyante il rejoint donc le
+        niveau ambiant, tandis que les pauses entre les mots le maintiennent sous la parole.
+        Récurrence f[i] = min(e[i], f[i-1] + r), bornée à VAD_MIN_DBFS, déroulée :
+        f[i] = i·r + min(f[-1] + r, min_{j<=i}(e[j] - j·r)), d'où un seul minimum cumulé.
+        Borner les énergies avant (et non le résultat après) donne exactement la récurrence bornée.
+        """
+        energy = np.maximum(energy_db.astype(np.float64), VAD_MIN_DBFS)
+        ramp = np.arange(energy.size) * self.noise_rise
+        lowest = np.minimum.accumulate(energy - ramp)
+        if self.noise_floor is not None:
+            lowest = np.minimum(lowest, self.noise_floor + self.noise_rise)
+        floors = lowest + ramp
+        self.noise_floor = float(floors[-1])
+        return floors
+
+    def process(self, pcm: bytes) -> List[Tuple[str, Optional[bytes], int]]:
+        """
+        Filtrer un chunk PCM. Retourne une liste ordonnée de segments :
+        (SEGMENT_AUDIO, bytes, début en échantillons du flux) à décoder,
+        (SEGMENT_END, None, position) en fin de parole.
+        """
+        data = self._remainder + pcm
+        frame_bytes = self.frame_len * 2
+        n_frames = len(data) // frame_bytes
+        self._remainder = data[n_frames * frame_bytes:]
+        if n_frames == 0:
+            return []
+
+        samples = np.frombuffer(data, dtype="<i2", count=n_frames * self.frame_len).astype(np.float32)
+        speech = self._classify(samples.reshape(n_frames, self.frame_len))
+
+        # Hangover vectorisé : distance (en trames) à la dernière trame de parole,
+        # en reprenant l'état du chunk précédent
+        idx = np.arange(n_frames)
+        last_speech = np.where(speech, idx, -1 - self.frames_since_speech)
+        last_speech = np.maximum.accumulate(last_speech)
+        active = (idx - last_speech) <= self.hangover_frames
+        self.frames_since_speech = int(n_frames - 1 - last_speech[-1])
+        chunk_start = self.position
+        self.position += n_frames * self.frame_len
+
+        # Découpage en segments contigus actifs / inactifs
+        segments: List[Tuple[str, Optional[bytes], int]] = []
+        changes = np.flatnonzero(np.diff(active.astype(np.int8))) + 1
+        bounds = np.concatenate(([0], changes, [n_frames]))
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            chunk = data[start * frame_bytes:end * frame_bytes]
+            stream_start = chunk_start + int(start) * self.frame_len
+            if active[start]:
+                if not self.in_speech:
+                    self.in_speech = True
+                    self.utterances += 1
+                    if self.preroll:
+                        preroll = b"".join(self.preroll)
+                        chunk = preroll + chunk
+                        stream_start -= len(preroll) // 2
+                        self.preroll.clear()
+                        # Comptées comme filtrées à leur arrivée, finalement décodées
+                        self.gated_bytes -= len(preroll)
+                self.decoded_bytes += len(chunk)
+                segments.append((SEGMENT_AUDIO, chunk, stream_start))
+            else:
+                if self.in_speech:
+                    self.in_speech = False
+                    segments.append((SEGMENT_END, None, stream_start))
+                self.gated_bytes += len(chunk)
+                for i in range(max(start, end - self.preroll.maxlen), end):
+                    self.preroll.append(data[i * frame_bytes:(i + 1) * frame_bytes])
+        return segments
+
+    def stats(self) -> dict:
+        total = self.decoded_bytes + self.gated_bytes
+        return {
+            "decoded_seconds": round(self.decoded_bytes / 2 / self.sample_rate, 2),
+            "gated_seconds": round(self.gated_bytes / 2 / self.sample_rate, 2),
+            "gated_ratio": round(self.gated_bytes / total, 3) if total else 0.0,
+            "utterances": self.utterances,
+            "noise_floor_db": round(self.noise_floor, 1) if self.noise_floor is not None else None,
+        }
+
+
+class SampleTimeline:
+    """
+    Correspondance entre l'horloge du recognizer (échantillons réellement décodés)
+    et la position dans le flux reçu : le VAD retire des silences, les timings
+    de mots Vosk doivent donc être recalés avant d'être persistés.
+    """
+
+    def __init__(self, sample_rate: int = 16000):
+        self.sample_rate = sample_rate
+        self.fed = 0
+        self._fed_anchors = [0]
+        self._stream_anchors = [0]
+
+    def feed(self, samples: int, stream_start: Optional[int] = None):
+        """
+        Enregistrer un segment de `samples` échantillons débutant à stream_start
+        (None : segment contigu au précédent, cas sans VAD).
+        """
+        expected = self._stream_anchors[-1] + self.fed - self._fed_anchors[-1]
+        if stream_start is not None and stream_start != expected:
+            self._fed_anchors.append(self.fed)
+            self._stream_anchors.append(stream_start)
+        self.fed += samples
+
+    def to_stream_seconds(self, fed_seconds: float) -> float:
+        fed = int(round(fed_seconds * self.sample_rate))
+        i = max(0, bisect_right(self._fed_anchors, fed) - 1)
+        return (self._stream_anchors[i] + fed - self._fed_anchors[i]) / self.sample_rate
+
+    def stream_seconds(self) -> float:
+        """Position courante (fin du dernier segment décodé) dans le flux."""
+        return self.to_stream_seconds(self.fed / self.sample_rate)
+
+    def prune(self, fed_seconds: float):
+        """Oublier les ancres antérieures à un énoncé déjà finalisé."""
+        fed = int(round(fed_seconds * self.sample_rate))
+        i = max(0, bisect_right(self._fed_anchors, fed) - 1)
+        if i:
+            del self._fed_anchors[:i]
+            del self._stream_anchors[:i]
@@ -1,13 +1,36 @@
 # app/services/vosk_service.py
-import vosk
 import json
 import wave
 import logging
 import os
-from typing import Optional
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+if TYPE_CHECKING:
+    import vosk
 
 logger = logging.getLogger(__name__)
 
+MODEL_STATE_IDLE = "idle"
+MODEL_STATE_LOADING = "loading"
+MODEL_STATE_READY = "ready"
+MODEL_STATE_FAILED = "failed"
+
+DEFAULT_MODEL_SAMPLE_RATE = 16000
+
+
+def read_model_sample_rate(model_path: str) -> int:
+    """Taux natif du modèle, lu dans conf/mfcc.conf (--sample-frequency)."""
+    try:
+        with open(os.path.join(model_path, "conf", "mfcc.conf")) as f:
+            for line in f:
+                if line.strip().startswith("--sample-frequency="):
+                    return int(float(line.split("=", 1)[1]))
+    except (OSError, ValueError):
+        logger.debug("Taux d'échantillonnage du modèle introuvable", exc_info=True)
+    return DEFAULT_MODEL_SAMPLE_RATE
+
 
 class VoskTranscriber:
     def __init__(self, model_path: Optional[str] = None):
@@ -39,15 +62,26 @@ class VoskTranscriber:
                 )
 
         logger.info(f"📦 Chargement du modèle Vosk depuis: {model_path}")
+        # Import différé : vosk (et sa bibliothèque native) n'est chargé qu'avec le modèle
+        started = time.perf_counter()
+        import vosk
+        self.import_seconds = time.perf_counter() - started
         # Initialisation du modèle (peut lever si binaire incompatible)
+        started = time.perf_counter()
         self.model = vosk.Model(model_path)
+        self.load_seconds = time.perf_counter() - started
+        self.model_path = model_path
+        # Les recognizers sont toujours créés à ce taux (l'audio client est rééchantillonné)
+        self.sample_rate = read_model_sample_rate(model_path)
         logger.info("✅ Modèle Vosk chargé avec succès")
 
-    def create_recognizer(self, sample_rate: int = 16000):
+    def create_recognizer(self, sample_rate: int = 16000, partial_words: bool = True):
         """
         Créer un nouveau recognizer pour une session.
         On protège les appels SetWords / SetPartialWords au cas où la version de vosk ne les expose pas.
+        partial_words=False désactive les timings par mot dans les partiels (réglage par réunion).
         """
+        import vosk
         recognizer = vosk.KaldiRecognizer(self.model, sample_rate)
         try:
             # Certaines versions de vosk exposent ces méthodes
@@ -55,7 +89,7 @@ class VoskTranscriber:
         except Exception:
             logger.debug("SetWords non disponible pour cette version de vosk", exc_info=True)
         try:
-            recognizer.SetPartialWords(True)
+            recognizer.SetPartialWords(partial_words)
         except Exception:
             logger.debug("SetPartialWords non disponible pour cette version de vosk", exc_info=True)
         return recognizer
@@ -101,15 +135,18 @@ class VoskTranscriber:
             logger.error(f"Erreur transcription fichier: {e}", exc_info=True)
             raise
 
-    def process_audio_chunk(self, recognizer: vosk.KaldiRecognizer, audio_data: bytes):
+    def process_audio_chunk(self, recognizer: "vosk.KaldiRecognizer", audio_data: bytes, want_partial: bool = True):
         """
         Traiter un chunk audio et retourner le résultat
         Retourne: (texte, is_final, result_json)
+        Si want_partial est False, PartialResult() n'est pas appelé : ("", False, None)
         """
         try:
             if recognizer.AcceptWaveform(audio_data):
                 result = json.loads(recognizer.Result())
                 return result.get("text", ""), True, result
+            elif not want_partial:
+                return "", False, None
             else:
                 result = json.loads(recognizer.PartialResult())
                 return result.get("partial", ""), False, result
@@ -118,25 +155,124 @@ class VoskTranscriber:
             raise
 
 
-# --- Instantiation robuste au démarrage ---
-# On permet de fournir le chemin via la variable d'environnement VOSK_MODEL_PATH
-# pour les environnements (Docker, CI, VPS).
-model_path_env = os.environ.get("VOSK_MODEL_PATH", None)
-try:
-    vosk_transcriber = VoskTranscriber(model_path=model_path_env)
-except Exception as e:
-    # Ne pas planter le démarrage du serveur : on expose None et on logge l'erreur.
-    logger.error(f"Impossible de charger le modèle Vosk au démarrage: {e}", exc_info=True)
-    vosk_transcriber = None
+class ModelLoader:
+    """
+    Chargement du modèle Vosk hors du chemin de démarrage : start() lance un
+    thread, l'état passe de loading à ready (ou failed, avec l'erreur). Les
+    callbacks on_ready sont appelés dans ce thread une fois le modèle prêt.
+    """
+
+    def __init__(self, model_path: Optional[str] = None):
+        self.model_path = model_path
+        self.state = MODEL_STATE_IDLE
+        self.error: Optional[str] = None
+        self.transcriber: Optional[VoskTranscriber] = None
+        self.timings: dict = {}
+        # Croissance de la mémoire résidente du process pendant le chargement
+        self.resident_bytes = 0
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._callbacks: List[Callable[[VoskTranscriber], None]] = []
+
+    def start(self):
+        with self._lock:
+            if self.state != MODEL_STATE_IDLE:
+                return
+            self.state = MODEL_STATE_LOADING
+        threading.Thread(target=self._load, name="vosk-model-loader", daemon=True).start()
+
+    def load(self) -> Optional[VoskTranscriber]:
+        """Chargement synchrone (process décodeurs, scripts) ; attend un chargement en cours."""
+        with self._lock:
+            first = self.state == MODEL_STATE_IDLE
+            if first:
+                self.state = MODEL_STATE_LOADING
+        if first:
+            self._load()
+        else:
+            self._done.wait()
+        return self.transcriber
+
+    def _load(self):
+        from app.services.admission import process_rss_bytes
+        started = time.perf_counter()
+        rss_before = process_rss_bytes()
+        try:
+            transcriber = VoskTranscriber(model_path=self.model_path)
+        except Exception as e:
+            # Ne pas planter le serveur : l'état failed est exposé par /readyz
+            logger.error(f"Impossible de charger le modèle Vosk: {e}", exc_info=True)
+            self.error = str(e)
+            self.state = MODEL_STATE_FAILED
+            self.timings = {"total_s": round(time.perf_counter() - started, 3)}
+            self._done.set()
+            return
+        self.resident_bytes = max(0, process_rss_bytes() - rss_before)
+        self.timings = {
+            "vosk_import_s": round(transcriber.import_seconds, 3),
+            "model_load_s": round(transcriber.load_seconds, 3),
+            "total_s": round(time.perf_counter() - started, 3),
+        }
+        with self._lock:
+            self.transcriber = transcriber
+            self.state = MODEL_STATE_READY
+            callbacks = list(self._callbacks)
+        self._done.set()
+        logger.info(f"✅ Modèle Vosk prêt en {self.timings['total_s']}s")
+        for callback in callbacks:
+            self._run_callback(callback)
+
+    def _run_callback(self, callback):
+        try:
+            callback(self.transcriber)
+        except Exception as e:
+            logger.error(f"Callback de chargement du modèle en erreur: {e}", exc_info=True)
+
+    def on_ready(self, callback: Callable[[VoskTranscriber], None]):
+        with self._lock:
+            ready = self.state == MODEL_STATE_READY
+            if not ready:
+                self._callbacks.append(callback)
+        if ready:
+            self._run_callback(callback)
+
+    def unload(self) -> bool:
+        """Libérer le modèle (éviction du registre) ; il sera rechargé à la demande."""
+        with self._lock:
+            if self.state != MODEL_STATE_READY:
+                return False
+            self.transcriber = None
+            self.state = MODEL_STATE_IDLE
+            self.timings = {}
+            self._done.clear()
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def status(self) -> dict:
+        return {"state": self.state, "error": self.error, "model_path": getattr(self.transcriber, "model_path", None),
+                "timings": self.timings}
+
+
+# Le chemin peut être fourni via la variable d'environnement VOSK_MODEL_PATH
+# pour les environnements (Docker, CI, VPS). Rien n'est chargé à l'import.
+model_loader = ModelLoader(model_path=os.environ.get("VOSK_MODEL_PATH", None))
 
 
 def get_vosk_transcriber():
     """
-    Helper pour récupérer l'instance. Lève une RuntimeError si non chargé,
-    afin d'obliger les points d'entrée à vérifier l'état avant usage.
+    Helper pour récupérer l'instance. Lève une RuntimeError si le modèle n'est pas
+    (encore) chargé, afin d'obliger les points d'entrée à vérifier l'état avant usage.
+    Sans chargement en cours (process décodeur, script), charge le modèle ici.
     """
-    if vosk_transcriber is None:
+    if model_loader.state == MODEL_STATE_IDLE:
+        model_loader.load()
+    if model_loader.state == MODEL_STATE_LOADING:
+        raise RuntimeError("Modèle Vosk en cours de chargement, réessayez dans quelques secondes.")
+    if model_loader.transcriber is None:
         raise RuntimeError(
-            "Vosk model non chargé. Définissez VOSK_MODEL_PATH ou placez le modèle dans 'models/' et redémarrez."
+            f"Vosk model non chargé ({model_loader.error}). "
+            "Définissez VOSK_MODEL_PATH ou placez le modèle dans 'models/' et redémarrez."
         )
-    return vosk_transcriber
\ No newline at end of file
+    return model_loader.transcriber
@@ -0,0 +1,27 @@
+# scripts/migrate_caption_settings.py
+"""
+Migration de la table meetings : ajout de la colonne caption_settings (JSON),
+qui porte la politique des partiels posée par l'organisateur pour tous les workers.
+Idempotent. Usage (depuis backend/) : python scripts/migrate_caption_settings.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app.database import engine
+
+
+def migrate_caption_settings():
+    columns = {c["name"] for c in inspect(engine).get_columns("meetings")}
+    if "caption_settings" not in columns:
+        print("🔧 Ajout de la colonne meetings.caption_settings")
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE meetings ADD COLUMN caption_settings JSON NULL"))
+    print("✅ Table meetings à jour")
+
+
+if __name__ == "__main__":
+    migrate_caption_settings()
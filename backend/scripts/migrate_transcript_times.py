@@ -0,0 +1,41 @@
+# scripts/migrate_transcript_times.py
+"""
+Migration de la table transcripts pour la pagination par curseur :
+- start_time, end_time et duration passent de FLOAT (simple précision) à DOUBLE ;
+  la clé (start_time, id) du curseur se compare alors exactement à la valeur relue ;
+- création de l'index ix_transcripts_meeting_start_id s'il manque.
+Idempotent. Usage (depuis backend/) : python scripts/migrate_transcript_times.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app.database import engine
+
+TIME_COLUMNS = ("start_time", "end_time", "duration")
+
+
+def migrate_transcript_times():
+    inspector = inspect(engine)
+    columns = {c["name"]: c for c in inspector.get_columns("transcripts")}
+    indexes = {i["name"] for i in inspector.get_indexes("transcripts")}
+    with engine.begin() as conn:
+        to_widen = [name for name in TIME_COLUMNS if "DOUBLE" not in str(columns[name]["type"]).upper()]
+        if to_widen:
+            print(f"🔧 Colonnes converties en DOUBLE: {', '.join(to_widen)}")
+            conn.execute(text(
+                "ALTER TABLE transcripts " + ", ".join(f"MODIFY {name} DOUBLE NULL" for name in to_widen)
+            ))
+        if "ix_transcripts_meeting_start_id" not in indexes:
+            print("🔧 Création de l'index ix_transcripts_meeting_start_id")
+            conn.execute(text(
+                "CREATE INDEX ix_transcripts_meeting_start_id ON transcripts (meeting_id, start_time, id)"
+            ))
+    print("✅ Table transcripts à jour")
+
+
+if __name__ == "__main__":
+    migrate_transcript_times()
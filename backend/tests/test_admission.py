@@ -0,0 +1,57 @@
+# backend/tests/test_admission.py
+import asyncio
+
+import pytest
+
+from app.services.admission import AdmissionController, AdmissionRejected, REASON_PROCESS_FULL
+from app.services.asr_farm import ASRWorkerFarm
+
+
+class FakeWorker:
+    def __init__(self, index, state="ready"):
+        self.index = index
+        self.state = state
+        self.sessions = 0
+
+
+def test_farm_capacity_follows_live_workers():
+    farm = ASRWorkerFarm(processes=2, slots=3)
+    assert farm.capacity() == 6
+    farm.workers = [FakeWorker(0), FakeWorker(1, state="dead")]
+    assert farm.capacity() == 3
+
+
+def test_farm_refuses_a_session_when_every_worker_is_full():
+    farm = ASRWorkerFarm(processes=2, slots=1)
+    farm.workers = [FakeWorker(0), FakeWorker(1)]
+
+    async def request(worker, op, session_id, *args):
+        return 16000
+
+    farm.request = request
+
+    async def scenario():
+        first = await farm.open_session()
+        second = await farm.open_session()
+        assert first.worker is not second.worker
+        with pytest.raises(RuntimeError):
+            await farm.open_session()
+
+    asyncio.run(scenario())
+
+
+def test_admission_is_sized_from_the_farm():
+    farm = ASRWorkerFarm(processes=2, slots=2)
+    controller = AdmissionController()
+    controller.set_capacity(farm.capacity)
+
+    async def scenario():
+        tickets = [await controller.acquire(meeting, timeout=0) for meeting in range(4)]
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire(99, timeout=0)
+        assert rejected.value.reason == REASON_PROCESS_FULL
+        assert controller.stats()["max_sessions"] == 4
+        controller.release(tickets[0])
+        controller.release(await controller.acquire(99, timeout=0))
+
+    asyncio.run(scenario())
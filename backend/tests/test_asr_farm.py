@@ -0,0 +1,116 @@
+# backend/tests/test_asr_farm.py
+import asyncio
+import multiprocessing as mp
+import threading
+
+import pytest
+
+from app.services import asr_farm
+from app.services.asr_farm import ASRWorkerFarm, FarmDecoderSession, ShmRing, _Worker
+
+
+@pytest.fixture
+def ring():
+    ring = ShmRing.create(16)
+    yield ring
+    ring.close()
+
+
+def test_ring_wraps_around_and_frees_space(ring):
+    consumer = ShmRing.attach(ring.name, ring.capacity)
+    try:
+        first = ring.write(b"0123456789")
+        assert consumer.read(first, 10) == b"0123456789"
+        # Starts at offset 10 and wraps past the end of the segment
+        second = ring.write(b"abcdefghijkl")
+        assert second == 10
+        assert ring.free_space() == 4
+        assert consumer.read(second, 12) == b"abcdefghijkl"
+        assert ring.free_space() == 16
+    finally:
+        consumer.close()
+
+
+def test_full_ring_refuses_writes_until_the_consumer_reads(ring):
+    position = ring.write(b"x" * 12)
+    assert ring.write(b"y" * 5) is None
+    assert ring.write(b"y" * 4) == 12
+    assert ring.free_space() == 0
+    ring.read(position, 12)
+    assert ring.write(b"z" * 12) == 16
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    monkeypatch.setattr(asr_farm, "WORKER_RING_BYTES", 64)
+    worker = _Worker(0, mp.get_context("spawn"))
+    worker.state = "ready"
+    yield worker
+    worker.ring.close()
+
+
+def test_accept_waits_for_the_worker_to_free_ring_space(worker):
+    farm = ASRWorkerFarm(processes=1)
+    consumer = ShmRing.attach(worker.ring.name, worker.ring.capacity)
+    requests = []
+
+    async def request(w, op, session_id, position, size, want_partial):
+        requests.append((position, size))
+        return "", False, {}
+
+    farm.request = request
+    session = FarmDecoderSession(farm, worker, 1, 16000)
+
+    async def scenario():
+        await session.accept(b"\x01" * 48)
+        blocked = asyncio.ensure_future(session.accept(b"\x02" * 48))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+        assert len(worker.space_waiters) == 1
+
+        # The worker consumes the first chunk, then its result wakes the waiting session
+        def worker_reads():
+            consumer.read(*requests[0])
+            worker.notify_space()
+
+        threading.Thread(target=worker_reads).start()
+        await asyncio.wait_for(blocked, 1)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        consumer.close()
+    assert requests == [(0, 48), (48, 48)]
+
+
+def test_accept_fails_when_the_worker_dies_while_waiting(worker):
+    farm = ASRWorkerFarm(processes=1)
+
+    async def request(*args):
+        return "", False, {}
+
+    farm.request = request
+    session = FarmDecoderSession(farm, worker, 1, 16000)
+
+    async def scenario():
+        await session.accept(b"\x01" * 48)
+        blocked = asyncio.ensure_future(session.accept(b"\x02" * 48))
+        await asyncio.sleep(0.01)
+        worker.state = "dead"
+        worker.notify_space()
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(blocked, 1)
+
+    asyncio.run(scenario())
+
+
+def test_writer_thread_sends_messages_in_order(worker):
+    farm = ASRWorkerFarm(processes=1)
+    thread = threading.Thread(target=farm._writer, args=(worker,))
+    thread.start()
+    for index in range(3):
+        worker.send(("audio", 1, index))
+    worker.outbox.put(None)
+    thread.join(1)
+    child = worker.process._args[3]
+    assert [child.recv() for _ in range(3)] == [("audio", 1, 0), ("audio", 1, 1), ("audio", 1, 2)]
@@ -0,0 +1,76 @@
+# backend/tests/test_audio_codecs.py
+import struct
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.services.audio_codecs import (
+    ALAW_TABLE, ENCODING_ALAW, ENCODING_IMA_ADPCM, ENCODING_MULAW, ENCODING_PCM,
+    IMA_INDEX_TABLE, IMA_STEP_TABLE, MULAW_TABLE,
+    AudioDecoder, decode_ima_adpcm_block, normalize_encoding,
+)
+
+
+def reference_ima_decode(block: bytes):
+    """Sample-by-sample decoder straight from the IMA/DVI specification."""
+    predictor, index = struct.unpack_from("<hB", block)
+    samples = [predictor]
+    for byte in block[4:]:
+        for nibble in (byte & 0x0F, byte >> 4):
+            step = int(IMA_STEP_TABLE[index])
+            diff = step >> 3
+            if nibble & 4:
+                diff += step
+            if nibble & 2:
+                diff += step >> 1
+            if nibble & 1:
+                diff += step >> 2
+            predictor += -diff if nibble & 8 else diff
+            predictor = min(32767, max(-32768, predictor))
+            index = min(88, max(0, index + IMA_INDEX_TABLE[nibble]))
+            samples.append(predictor)
+    return samples
+
+
+def test_g711_tables_match_reference_values():
+    assert MULAW_TABLE[0xFF] == 0
+    assert MULAW_TABLE[0x7F] == 0
+    assert MULAW_TABLE[0x00] == -32124
+    assert MULAW_TABLE[0x80] == 32124
+    assert ALAW_TABLE[0xD5] == 8
+    assert ALAW_TABLE[0x55] == -8
+    assert ALAW_TABLE[0xAA] == 32256
+    assert ALAW_TABLE[0x2A] == -32256
+
+
+def test_ima_adpcm_matches_the_sequential_decoder():
+    rng = np.random.default_rng(1)
+    block = struct.pack("<hBB", -1200, 20, 0) + rng.integers(0, 256, 256, dtype=np.uint8).tobytes()
+    assert decode_ima_adpcm_block(block).tolist() == reference_ima_decode(block)
+
+
+def test_ima_adpcm_saturates_like_the_sequential_decoder():
+    # Large positive steps from near full scale: the predictor must clamp at every sample
+    block = struct.pack("<hBB", 32000, 88, 0) + bytes([0x77]) * 16
+    decoded = decode_ima_adpcm_block(block).tolist()
+    assert decoded == reference_ima_decode(block)
+    assert max(decoded) == 32767
+
+
+def test_decoder_sizes_and_aliases():
+    assert normalize_encoding(None) == ENCODING_PCM
+    assert normalize_encoding("PCMU") == ENCODING_MULAW
+    with pytest.raises(ValueError):
+        normalize_encoding("opus")
+
+    pcm = AudioDecoder()
+    assert pcm.decode(b"\x01\x02") == b"\x01\x02"
+    mulaw = AudioDecoder("ulaw")
+    assert len(mulaw.decode(bytes(160))) == 320
+    assert mulaw.encoded_size(320) == 160
+    assert AudioDecoder(ENCODING_ALAW).encoded_size(320) == 160
+    adpcm = AudioDecoder(ENCODING_IMA_ADPCM)
+    assert adpcm.encoded_size(3200) == 4 + 800
+    # One header sample plus two samples per byte
+    assert len(adpcm.decode(struct.pack("<hBB", 0, 0, 0) + bytes(10))) == 2 * 21
@@ -0,0 +1,139 @@
+# backend/tests/test_batch_transcriber.py
+import json
+import struct
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.services import batch_transcriber
+from app.services.batch_transcriber import BatchTranscriber, find_segments, read_wav_layout
+
+RATE = 16000
+
+
+def write_wav(path, samples, rate=RATE, channels=1):
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.asarray(samples, dtype="<i2").tobytes())
+
+
+def raw_wav(path, chunks, fmt_extra=b"", bits=16, channels=1):
+    """WAV assembled by hand: arbitrary chunks and declared sizes."""
+    fmt = struct.pack("<HHIIHH", 1, channels, RATE, RATE * 2 * channels, 2 * channels, bits) + fmt_extra
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+    for chunk_id, declared, payload in chunks:
+        body += chunk_id + struct.pack("<I", declared) + payload
+    path.write_bytes(b"RIFF" + struct.pack("<I", len(body)) + body)
+    return str(path)
+
+
+def test_layout_of_truncated_and_unusual_headers(tmp_path):
+    # Recording interrupted before the header was finalized: size 0, data up to the end of file
+    layout = read_wav_layout(raw_wav(tmp_path / "zero.wav", [(b"data", 0, b"\x01\x00" * 100)]))
+    assert layout.data_bytes == 200 and layout.frames == 100
+
+    # Declared size larger than the file, odd trailing byte trimmed to whole frames
+    layout = read_wav_layout(raw_wav(tmp_path / "cut.wav", [(b"data", 10000, b"\x01\x00" * 50 + b"\x01")]))
+    assert layout.data_bytes == 100
+
+    # Extended fmt chunk and an odd-sized chunk with its pad byte before data
+    path = raw_wav(
+        tmp_path / "odd.wav", [(b"LIST", 3, b"abc\x00"), (b"data", 8, b"\x00" * 8)],
+        fmt_extra=b"\x00\x00", channels=2,
+    )
+    layout = read_wav_layout(path)
+    assert (layout.channels, layout.data_bytes, layout.frames) == (2, 8, 2)
+    assert layout.data_offset == 12 + 8 + 18 + 8 + 4 + 8
+
+    with pytest.raises(ValueError):
+        read_wav_layout(raw_wav(tmp_path / "24bit.wav", [(b"data", 6, b"\x00" * 6)], bits=24))
+
+
+def energy(pattern):
+    """pattern: list of (frames, dB) runs."""
+    return np.concatenate([np.full(n, db, dtype=np.float32) for n, db in pattern])
+
+
+def test_cuts_fall_in_the_middle_of_pauses():
+    # 10 ms frames; pauses of 0.4 s around 0.9 s and 2.0 s
+    db = energy([(70, -20), (40, -70), (70, -20), (40, -70), (80, -20)])
+    segments = find_segments(db, 10, db.size * 10, target_seconds=1.0, max_seconds=1.5,
+                             min_silence_ms=300, sample_rate=1000)
+    assert [s[:2] for s in segments] == [(0, 900), (900, 2000), (2000, 3000)]
+    assert all(speech for _, _, speech in segments)
+
+
+def test_short_pauses_are_not_cut_points_and_max_seconds_forces_a_cut():
+    # One long stretch of speech with a 0.1 s pause (too short) and a quieter frame
+    db = energy([(20, -20), (10, -70), (90, -20), (1, -26), (129, -20)])
+    segments = find_segments(db, 10, 2500, target_seconds=1.0, max_seconds=1.5,
+                             min_silence_ms=300, sample_rate=1000)
+    boundaries = [start for start, _, _ in segments[1:]]
+    # No usable pause: the cut lands on the quietest frame in [target/2, max_seconds]
+    assert boundaries[0] == 1200
+    for start, end, _ in segments:
+        assert end - start <= 1500
+    assert segments[-1][1] == 2500
+
+
+def test_silent_file_is_a_single_non_speech_segment():
+    db = np.full(100, -80, dtype=np.float32)
+    assert find_segments(db, 10, 1000, 1.0, 1.5, 300, 1000) == [(0, 1000, False)]
+    assert find_segments(np.zeros(0, dtype=np.float32), 10, 5, 1.0, 1.5, 300, 1000) == [(0, 5, False)]
+
+
+class FakeRecognizer:
+    """Word times relative to the recognizer's own start, as with a fresh Vosk recognizer."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.samples = 0
+
+    def AcceptWaveform(self, data):
+        self.samples += len(data) // 2
+        return False
+
+    def FinalResult(self):
+        heard = self.samples / self.rate
+        return json.dumps({"text": "mot", "result": [
+            {"word": "mot", "start": 0.25, "end": min(heard, 0.5), "conf": 0.9},
+        ]})
+
+
+class FakeTranscriber:
+    def create_recognizer(self, rate, partial_words=True):
+        return FakeRecognizer(rate)
+
+
+def test_word_times_are_stitched_across_segments(tmp_path, monkeypatch):
+    t = np.arange(RATE) / RATE
+    speech = (8000 * np.sin(2 * np.pi * 220 * t)).astype("<i2")
+    pause = np.zeros(RATE, dtype="<i2")
+    path = tmp_path / "meeting.wav"
+    write_wav(path, np.concatenate([speech, pause, speech, pause, speech]))
+
+    monkeypatch.setattr(batch_transcriber, "BATCH_SEGMENT_SECONDS", 1.5)
+    monkeypatch.setattr(batch_transcriber, "BATCH_MAX_SEGMENT_SECONDS", 2.5)
+    monkeypatch.setattr(batch_transcriber, "_worker_transcriber", FakeTranscriber())
+    monkeypatch.setattr(batch_transcriber, "_worker_wav", None)
+    transcriber = BatchTranscriber(workers=2)
+    transcriber._executor = ThreadPoolExecutor(2)
+    progress = []
+    try:
+        result = transcriber.transcribe(str(path), on_progress=lambda done, total: progress.append((done, total)))
+    finally:
+        transcriber.shutdown()
+        batch_transcriber._worker_wav.close()
+
+    starts = [segment["start"] for segment in result["segments"]]
+    assert len(starts) == 3 and starts[0] == 0.0
+    # Each word is shifted by its segment's offset in the whole file
+    assert [w["start"] for w in result["words"]] == [round(s + 0.25, 3) for s in starts]
+    assert result["text"] == "mot mot mot"
+    assert result["duration"] == 5.0
+    assert progress[-1] == (5.0, 5.0)
@@ -0,0 +1,85 @@
+# backend/tests/test_broadcaster.py
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.services import broadcaster
+from app.services.broadcaster import audio_sockets, meeting_connections, subscribe, unsubscribe
+
+
+class FakeSocket:
+    def __init__(self, blocked=False):
+        self.sent = []
+        self.closed_with = None
+        self.blocked = blocked
+
+    async def send_text(self, data):
+        if self.blocked:
+            await asyncio.Event().wait()
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        await self.send_text(data)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_partials_of_a_speaker_replace_each_other_in_the_queue():
+    async def scenario():
+        ws = FakeSocket(blocked=True)
+        fanout = subscribe(101, ws)
+        sub = fanout.subscribers[ws]
+        sub.queue.clear()
+        await asyncio.sleep(0)
+        sub.enqueue(True, 7, "p1")
+        sub.enqueue(False, 7, "final")
+        sub.enqueue(True, 7, "p2")
+        sub.enqueue(True, 7, "p3")
+        queued = [m[2] for m in sub.queue]
+        unsubscribe(101, ws)
+        return queued
+
+    # p1 and p2 are superseded by p3; finals are never dropped
+    assert run(scenario()) == ["final", "p3"]
+
+
+def test_slow_listener_is_closed(monkeypatch):
+    monkeypatch.setattr(broadcaster, "EVICT_QUEUE", 3)
+
+    async def scenario():
+        ws = FakeSocket(blocked=True)
+        subscribe(102, ws)
+        for i in range(10):
+            broadcaster.publish(102, {"type": "transcription", "final": True, "text": str(i)})
+        await asyncio.sleep(0.01)
+        return ws
+
+    ws = run(scenario())
+    assert ws.closed_with == 1013
+    assert 102 not in meeting_connections
+
+
+def test_slow_speaker_keeps_its_socket_and_gets_a_lag_notice():
+    async def scenario():
+        ws = FakeSocket()
+        fanout = subscribe(103, ws)
+        audio_sockets.add(ws)
+        try:
+            fanout.evict(ws)
+            await asyncio.sleep(0.01)
+        finally:
+            audio_sockets.discard(ws)
+        return fanout, ws
+
+    fanout, ws = run(scenario())
+    assert ws.closed_with is None
+    assert ws not in fanout
+    assert json.loads(ws.sent[-1])["status"] == "captions_dropped"
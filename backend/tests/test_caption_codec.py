@@ -0,0 +1,68 @@
+# backend/tests/test_caption_codec.py
+from app.services.caption_codec import MAX_ID_CHARS, CaptionCodec, decode_frame
+
+
+def final_payload(**fields):
+    payload = {
+        "type": "transcription",
+        "final": True,
+        "text": "bonjour à tous",
+        "meeting_id": 12,
+        "user_id": 7,
+        "words": [
+            {"word": "bonjour", "start": 0.5, "end": 0.9, "conf": 1.0},
+            {"word": "à", "start": 0.9, "end": 1.0, "conf": 0.5},
+            {"word": "tous", "start": 1.0, "end": 1.4, "conf": 0.8},
+        ],
+    }
+    payload.update(fields)
+    return payload
+
+
+def test_final_round_trip():
+    codec = CaptionCodec()
+    frame, entries = codec.encode(final_payload())
+    assert entries == [(0, 12), (1, 7)]
+    decoded = decode_frame(frame, codec.values)
+    assert decoded["text"] == "bonjour à tous"
+    assert decoded["meeting_id"] == 12 and decoded["user_id"] == 7
+    assert [w["word"] for w in decoded["words"]] == ["bonjour", "à", "tous"]
+    assert decoded["words"][2]["start"] == 1.0
+
+
+def test_delta_partial_round_trip():
+    codec = CaptionCodec()
+    frame, _ = codec.encode({
+        "type": "transcription", "final": False, "is_partial": True, "delta": True,
+        "meeting_id": 1, "user_id": "alice", "stable_offset": 8, "stable": "bonjour ", "tail": "à t",
+    })
+    decoded = decode_frame(frame, codec.values)
+    assert decoded["delta"] and decoded["is_partial"]
+    assert (decoded["stable_offset"], decoded["stable"], decoded["tail"]) == (8, "bonjour ", "à t")
+
+
+def test_unhashable_user_id_is_coerced_to_str():
+    codec = CaptionCodec()
+    frame, entries = codec.encode(final_payload(user_id=["a", {"b": 1}]))
+    assert frame is not None
+    assert entries[1] == (1, "['a', {'b': 1}]")
+
+
+def test_long_user_id_is_truncated():
+    codec = CaptionCodec()
+    codec.encode(final_payload(user_id="x" * 1000))
+    assert codec.values[1] == "x" * MAX_ID_CHARS
+
+
+def test_oversized_text_falls_back_to_json_without_leaking_entries():
+    codec = CaptionCodec()
+    frame, entries = codec.encode(final_payload(text="é" * 40000, user_id="bob"))
+    assert (frame, entries) == (None, [])
+    assert codec.values == [] and codec.ids == {}
+    # The next frame still gets consistent indexes
+    frame, entries = codec.encode(final_payload(user_id="bob"))
+    assert entries == [(0, 12), (1, "bob")]
+
+
+def test_non_caption_payload_is_not_encoded():
+    assert CaptionCodec().encode({"type": "status"}) == (None, [])
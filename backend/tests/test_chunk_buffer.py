@@ -0,0 +1,45 @@
+# backend/tests/test_chunk_buffer.py
+from app.services.chunk_buffer import ChunkCoalescer, PcmRingBuffer
+
+
+def test_ring_buffer_reads_across_the_wrap_point():
+    ring = PcmRingBuffer(8)
+    ring.write(b"abcdef")
+    assert ring.read(4) == b"abcd"
+    ring.write(b"ghijk")
+    assert len(ring) == 7
+    assert ring.read(7) == b"efghijk"
+    assert len(ring) == 0
+
+
+def test_ring_buffer_grows_and_keeps_order():
+    ring = PcmRingBuffer(4)
+    ring.write(b"abc")
+    assert ring.read(2) == b"ab"
+    ring.write(b"0123456789")
+    assert ring.capacity >= 11
+    assert ring.read(100) == b"c0123456789"
+
+
+def test_coalescer_emits_fixed_frames_and_keeps_the_remainder():
+    coalescer = ChunkCoalescer(sample_rate=16000, frame_ms=100, max_latency_ms=250)
+    frame = coalescer.frame_bytes
+    assert frame == 3200
+    assert coalescer.push(b"\x01" * (frame // 2), now=0.0) == []
+    frames = coalescer.push(b"\x02" * (frame * 2), now=0.1)
+    assert [len(f) for f in frames] == [frame, frame]
+    assert frames[0] == b"\x01" * (frame // 2) + b"\x02" * (frame // 2)
+    # The remainder arrived with the last chunk: its deadline starts there
+    assert abs(coalescer.timeout(now=0.2) - 0.15) < 1e-9
+
+
+def test_coalescer_deadline_and_sample_aligned_flush():
+    coalescer = ChunkCoalescer(sample_rate=16000, frame_ms=200, max_latency_ms=250)
+    assert coalescer.timeout() is None
+    coalescer.push(b"\x00" * 101, now=10.0)
+    assert abs(coalescer.timeout(now=10.1) - 0.15) < 1e-9
+    assert coalescer.timeout(now=11.0) == 0.0
+    # A dangling odd byte is kept for the next chunk
+    assert len(coalescer.flush()) == 100
+    assert coalescer.timeout() is None
+    assert coalescer.flush() is None
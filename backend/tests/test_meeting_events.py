@@ -0,0 +1,76 @@
+# backend/tests/test_meeting_events.py
+import asyncio
+
+from app.services.meeting_events import (
+    MEETING_ENDED, TRANSCRIPTION_STARTED, MeetingEventBus, MessageSource, wait_for_transcription,
+)
+
+
+class FakeSocket:
+    def __init__(self):
+        self.inbox = asyncio.Queue()
+        self.receives = 0
+
+    async def receive(self):
+        self.receives += 1
+        return await self.inbox.get()
+
+
+def audio():
+    return {"type": "websocket.receive", "bytes": b"\x00\x00"}
+
+
+def test_event_reaches_an_open_socket_without_losing_messages():
+    async def scenario():
+        bus = MeetingEventBus()
+        bus.bind_loop(asyncio.get_running_loop())
+        socket = FakeSocket()
+        source = MessageSource(socket, bus.watch(1))
+        try:
+            assert await source.next(timeout=0.01) == ("timeout", None)
+            # Another meeting's event is not delivered to this socket
+            bus.publish(TRANSCRIPTION_STARTED, 2)
+            bus.publish(TRANSCRIPTION_STARTED, 1, language="fr")
+            kind, event = await source.next(timeout=1)
+            assert kind == "event" and event.meeting_id == 1 and event.data == {"language": "fr"}
+
+            # Both ready: the message wins, the event is returned by the next call
+            socket.inbox.put_nowait(audio())
+            bus.publish(MEETING_ENDED, 1)
+            await asyncio.sleep(0)
+            assert (await source.next(timeout=1))[0] == "message"
+            assert (await source.next(timeout=1))[1].event == MEETING_ENDED
+            # The receive pending since the timeout was reused, never restarted
+            assert socket.receives == 2
+        finally:
+            source.close()
+            source.watch.close()
+        assert bus._watches == {}
+
+    asyncio.run(scenario())
+
+
+def test_parked_client_is_upgraded_when_transcription_starts():
+    async def scenario():
+        bus = MeetingEventBus()
+        bus.bind_loop(asyncio.get_running_loop())
+        socket = FakeSocket()
+        source = MessageSource(socket, bus.watch(1))
+        waiting = asyncio.ensure_future(wait_for_transcription(source))
+        # Audio sent too early is ignored while parked
+        socket.inbox.put_nowait(audio())
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        bus.publish(TRANSCRIPTION_STARTED, 1)
+        assert await asyncio.wait_for(waiting, 1) is True
+
+        # Same source, next wait: the meeting ends instead
+        waiting = asyncio.ensure_future(wait_for_transcription(source))
+        bus.publish(MEETING_ENDED, 1)
+        assert await asyncio.wait_for(waiting, 1) is False
+
+        socket.inbox.put_nowait({"type": "websocket.disconnect"})
+        assert await wait_for_transcription(source) is False
+        source.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,46 @@
+# backend/tests/test_model_registry.py
+import threading
+import time
+
+from app.services.model_registry import ModelEntry, ModelRegistry
+from app.services.vosk_service import MODEL_STATE_IDLE, MODEL_STATE_READY
+
+
+class FakeLoader:
+    def __init__(self):
+        self.state = MODEL_STATE_IDLE
+        self.transcriber = None
+        self.error = None
+        self.resident_bytes = 0
+        self.timings = {}
+        self.calls = 0
+
+    def load(self):
+        self.calls += 1
+        time.sleep(0.05)
+        self.transcriber = object()
+        self.state = MODEL_STATE_READY
+        return self.transcriber
+
+
+def test_only_the_session_that_loads_the_model_reports_it():
+    registry = ModelRegistry(budget_mb=0)
+    loader = FakeLoader()
+    registry.entries["en:small"] = ModelEntry("en", "small", None, loader=loader)
+
+    results = []
+
+    def open_session():
+        results.append(registry.acquire("en")[2])
+
+    threads = [threading.Thread(target=open_session) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loader.calls == 1
+    assert sorted(results) == [False, False, False, True]
+    entry, _, loaded = registry.acquire("en")
+    assert not loaded
+    assert entry.users == 5
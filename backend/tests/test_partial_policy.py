@@ -0,0 +1,55 @@
+# backend/tests/test_partial_policy.py
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.partial_policy import PartialPolicy, PartialThrottle, get_partial_policy, set_partial_policy
+
+
+def test_rate_limit_counts_skipped_partials():
+    throttle = PartialThrottle(PartialPolicy(max_rate=5))
+    assert throttle.due(now=10.0)
+    throttle.partial_fields("bonjour", now=10.0)
+    assert not throttle.due(now=10.1)
+    assert throttle.due(now=10.25)
+    assert throttle.skipped == 1
+    assert not PartialThrottle(PartialPolicy(enabled=False)).due(now=10.0)
+
+
+def test_unchanged_partials_are_dropped():
+    throttle = PartialThrottle(PartialPolicy(mode="full"))
+    assert throttle.partial_fields("bonjour à", now=1.0) == {"text": "bonjour à"}
+    assert throttle.partial_fields("bonjour à", now=2.0) is None
+    assert throttle.partial_fields("", now=3.0) is None
+    assert throttle.emitted == 1
+
+
+def test_delta_mode_sends_new_stable_words_and_the_tail():
+    throttle = PartialThrottle(PartialPolicy(mode="delta"))
+    first = throttle.partial_fields("bonjour à tous", now=1.0)
+    assert first == {"delta": True, "stable_offset": 0, "stable": "", "tail": "bonjour à tous"}
+    second = throttle.partial_fields("bonjour à tous les", now=2.0)
+    assert second == {"delta": True, "stable_offset": 0, "stable": "bonjour à tous", "tail": "les"}
+    # Revision of an unstable word: only the tail after the stable prefix changes
+    third = throttle.partial_fields("bonjour à tous nous", now=3.0)
+    assert third == {"delta": True, "stable_offset": 3, "stable": "", "tail": "nous"}
+
+    throttle.reset()
+    assert throttle.partial_fields("merci", now=4.0)["stable_offset"] == 0
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        PartialPolicy(mode="words")
+
+
+def test_meeting_settings_travel_with_the_meeting_row():
+    meeting = SimpleNamespace(caption_settings=None)
+    assert get_partial_policy(meeting).to_dict() == PartialPolicy().to_dict()
+
+    set_partial_policy(meeting, PartialPolicy(max_rate=2, mode="delta", partial_words=False))
+    # What another worker reads back from the stored JSON
+    stored = SimpleNamespace(caption_settings=dict(meeting.caption_settings))
+    policy = get_partial_policy(stored)
+    assert (policy.max_rate, policy.mode, policy.partial_words) == (2, "delta", False)
+    assert PartialPolicy.from_dict({"mode": "delta"}).max_rate == PartialPolicy().max_rate
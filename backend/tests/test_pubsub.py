@@ -0,0 +1,59 @@
+# backend/tests/test_pubsub.py
+import asyncio
+import sys
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.services.pubsub import BroadcastBackend, BrokerBackend, BrokerConnection, MemoryBroker, create_broadcast_backend
+
+
+def test_incomplete_backends_fail_at_instantiation():
+    class NoPublish(BroadcastBackend):
+        pass
+
+    class NoListen(BrokerConnection):
+        async def publish_many(self, messages):
+            pass
+
+        async def subscribe(self, channel):
+            pass
+
+        async def unsubscribe(self, channel):
+            pass
+
+    with pytest.raises(TypeError):
+        NoPublish()
+    with pytest.raises(TypeError):
+        NoListen()
+
+
+def test_memory_broker_delivers_to_other_workers_only():
+    async def scenario():
+        broker = MemoryBroker()
+        sender, receiver = BrokerBackend(broker.connect()), BrokerBackend(broker.connect())
+        await sender.start()
+        await receiver.start()
+        await sender.connection.subscribe(sender.channel(5))
+        await receiver.connection.subscribe(receiver.channel(5))
+        await sender.publish(5, {"type": "transcription", "text": "bonjour"})
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if receiver.received:
+                break
+        await sender.stop()
+        await receiver.stop()
+        return sender, receiver
+
+    sender, receiver = asyncio.run(scenario())
+    assert sender.published == 1
+    assert receiver.received == 1
+    assert sender.received == 0
+
+
+def test_redis_backend_without_the_package_names_the_requirement(monkeypatch):
+    monkeypatch.setitem(sys.modules, "redis", None)
+    monkeypatch.setitem(sys.modules, "redis.asyncio", None)
+    with pytest.raises(RuntimeError, match="redis>=4.2"):
+        create_broadcast_backend("redis")
@@ -0,0 +1,96 @@
+# backend/tests/test_recognizer_pool.py
+import asyncio
+import json
+
+from app.services import async_decoder as async_decoder_module
+from app.services.async_decoder import AsyncVoskDecoder
+from app.services.recognizer_pool import RecognizerPool, shift_word_times
+
+
+class FakeRecognizer:
+    """Keeps counting decoded samples across Reset(), like Vosk's word-time clock."""
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.clock = 0
+        self.pending = None
+
+    def AcceptWaveform(self, data):
+        start = self.clock / self.sample_rate
+        self.clock += len(data) // 2
+        self.pending = {"text": "bonjour", "result": [
+            {"word": "bonjour", "start": start, "end": self.clock / self.sample_rate, "conf": 1.0}
+        ]}
+        return True
+
+    def Result(self):
+        return json.dumps(self.pending)
+
+    def FinalResult(self):
+        return json.dumps({"text": ""})
+
+    def Reset(self):
+        self.pending = None
+
+
+class FakeTranscriber:
+    model_path = "models/fake"
+    sample_rate = 16000
+
+    def create_recognizer(self, sample_rate=16000, partial_words=True):
+        return FakeRecognizer(sample_rate)
+
+    def process_audio_chunk(self, recognizer, audio_data, want_partial=True):
+        recognizer.AcceptWaveform(audio_data)
+        result = json.loads(recognizer.Result())
+        return result["text"], True, result
+
+
+def test_recycled_recognizer_keeps_its_clock_base():
+    pool = RecognizerPool(target=0)
+    transcriber = FakeTranscriber()
+    recognizer, base = pool.acquire(16000, True, transcriber)
+    assert base == 0
+    pool.release(recognizer, 16000, True, transcriber, consumed=32000)
+    again, base = pool.acquire(16000, True, transcriber)
+    assert again is recognizer
+    assert base == 32000
+
+
+def test_shift_word_times():
+    result = {"result": [{"start": 2.5, "end": 3.0}], "partial_result": [{"start": 3.1, "end": 3.4}]}
+    shift_word_times(result, 2.0)
+    assert result["result"][0] == {"start": 0.5, "end": 1.0}
+    assert abs(result["partial_result"][0]["start"] - 1.1) < 1e-9
+
+
+def test_word_times_restart_at_zero_for_each_session(monkeypatch):
+    transcriber = FakeTranscriber()
+    monkeypatch.setattr(async_decoder_module.model_registry, "acquire", lambda language=None: (object(), transcriber, False))
+    monkeypatch.setattr(async_decoder_module.model_registry, "release", lambda entry: None)
+    decoder = AsyncVoskDecoder(transcriber=transcriber, max_workers=1)
+    decoder._pool = RecognizerPool(target=0)
+
+    async def one_session():
+        session = await decoder.open_session()
+        _, _, first = await session.accept(b"\x00" * 32000)
+        recognizer = session.recognizer
+        session.close()
+        # Let the recycle task hand the recognizer back to the pool
+        for _ in range(20):
+            await asyncio.sleep(0.01)
+            if decoder.pool.recycled:
+                break
+        return recognizer, first
+
+    async def two_sessions():
+        return await one_session(), await one_session()
+
+    try:
+        (first_recognizer, first), (second_recognizer, second) = asyncio.run(two_sessions())
+    finally:
+        decoder.shutdown()
+    assert second_recognizer is first_recognizer
+    assert first["result"][0]["start"] == 0.0
+    assert second["result"][0]["start"] < 0.05
+    assert abs(second["result"][0]["end"] - 1.0) < 0.05
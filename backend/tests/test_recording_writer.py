@@ -0,0 +1,57 @@
+# backend/tests/test_recording_writer.py
+import struct
+import time
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pymysql")
+
+from app.services import recording_writer as writer_module
+from app.services.recording_writer import RecordingManager
+
+
+def header_sizes(path):
+    with open(path, "rb") as f:
+        header = f.read(44)
+    return struct.unpack_from("<I", header, 4)[0], struct.unpack_from("<I", header, 40)[0]
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_silent_track_is_checkpointed_while_others_keep_writing(tmp_path, monkeypatch):
+    monkeypatch.setattr(writer_module, "RECORDING_CHECKPOINT_SECONDS", 0.05)
+    manager = RecordingManager(base_dir=str(tmp_path))
+    silent = manager.open_track(1, "silent", 16000)
+    busy = manager.open_track(1, "busy", 16000)
+    manager.write(silent, b"\x01\x00" * 800)
+
+    # The queue never stays idle long enough for a timeout-only checkpoint
+    deadline = time.monotonic() + 0.5
+    while time.monotonic() < deadline:
+        manager.write(busy, b"\x00\x00" * 10)
+        time.sleep(0.01)
+
+    assert wait_for(lambda: header_sizes(silent.path) == (36 + 1600, 1600))
+    manager.finalize_meeting(1, timeout=2)
+
+
+def test_finalize_closes_tracks_left_open(tmp_path, monkeypatch):
+    monkeypatch.setattr(writer_module, "RECORDING_FINALIZE_GRACE_SECONDS", 0.05)
+    manager = RecordingManager(base_dir=str(tmp_path))
+    track = manager.open_track(7, "speaker", 16000)
+    manager.write(track, b"\x00\x00" * 16000)
+
+    finalized = manager.finalize_meeting(7, timeout=2)
+
+    assert finalized == [track]
+    assert track.duration == 1.0
+    assert header_sizes(track.path) == (36 + 32000, 32000)
+    assert manager._tracks == {}
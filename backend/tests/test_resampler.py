@@ -0,0 +1,54 @@
+# backend/tests/test_resampler.py
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.services.resampler import StreamingResampler
+
+
+def tone(rate, seconds, freq=440.0, amplitude=8000.0):
+    t = np.arange(int(rate * seconds)) / rate
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype("<i2")
+
+
+def test_chunked_output_matches_a_single_call():
+    pcm = tone(44100, 1.0).tobytes()
+    whole = StreamingResampler(44100, 16000).process(pcm)
+
+    streaming = StreamingResampler(44100, 16000)
+    # Odd chunk sizes split samples across calls
+    pieces = [streaming.process(pcm[i:i + 1001]) for i in range(0, len(pcm), 1001)]
+    assert b"".join(pieces) == whole
+    assert abs(len(whole) // 2 - 16000) <= 1
+
+
+def test_tone_keeps_its_frequency_and_level():
+    out = np.frombuffer(StreamingResampler(48000, 16000).process(tone(48000, 1.0).tobytes()), dtype="<i2")
+    steady = out[1000:-1000].astype(np.float64)
+    spectrum = np.abs(np.fft.rfft(steady * np.hanning(steady.size)))
+    peak_hz = np.argmax(spectrum) * 16000 / steady.size
+    assert abs(peak_hz - 440) < 2
+    assert abs(np.sqrt(np.mean(steady ** 2)) - 8000 / np.sqrt(2)) < 100
+
+
+def test_content_above_the_target_nyquist_is_filtered():
+    out = np.frombuffer(StreamingResampler(48000, 16000).process(tone(48000, 1.0, freq=12000).tobytes()), dtype="<i2")
+    assert np.sqrt(np.mean(out[1000:-1000].astype(np.float64) ** 2)) < 100
+
+
+def test_stereo_is_downmixed():
+    left = tone(16000, 0.1)
+    stereo = np.stack((left, np.zeros_like(left)), axis=1).astype("<i2").tobytes()
+    resampler = StreamingResampler(16000, 16000, channels=2)
+    assert not resampler.passthrough
+    out = np.frombuffer(resampler.process(stereo), dtype="<i2")
+    assert np.max(np.abs(out - left / 2)) <= 1
+    assert resampler.input_bytes_for(3200) == 6400
+
+
+def test_passthrough_and_invalid_parameters():
+    resampler = StreamingResampler(16000, 16000)
+    assert resampler.passthrough
+    assert resampler.process(b"\x01\x02\x03") == b"\x01\x02\x03"
+    with pytest.raises(ValueError):
+        StreamingResampler(0, 16000)
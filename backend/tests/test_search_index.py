@@ -0,0 +1,54 @@
+# backend/tests/test_search_index.py
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pymysql")
+
+from app.services.search_index import SearchIndex, hit_matches
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.add(1, 10, "Le budget de l'équipe est validé")
+    index.add(2, 10, "on parle du budget budget budget encore")
+    index.add(3, 20, "les réunions du budget annuel")
+    index.add(4, 20, "planning des congés")
+    return index
+
+
+def test_accents_plurals_and_elisions_are_folded(index):
+    hits, total = index.search("Equipe")
+    assert total == 1 and hits[0][0] == 1
+    # "réunions" is indexed as "reunion"; offsets point at the spoken word
+    hits, _ = index.search("réunion")
+    assert hits == [(3, hits[0][1], (1,))]
+
+
+def test_bm25_ranks_by_term_frequency_and_scopes_meetings(index):
+    hits, total = index.search("budget")
+    assert total == 3
+    assert hits[0][0] == 2
+    assert hits[0][2] == (3, 4, 5)
+
+    hits, total = index.search("budget", meeting_ids={20})
+    assert total == 1 and hits[0][0] == 3
+    assert index.search("le de", meeting_ids=None) == ([], 0)
+
+
+def test_reindexing_and_removal_keep_statistics_consistent(index):
+    index.add(4, 20, "budget des congés")
+    assert index.doc_freq["budget"] == 4
+    index.remove(4)
+    index.remove(1)
+    assert index.doc_freq["budget"] == 2
+    assert "conge" not in index.postings
+    assert index.total_terms == sum(length for _, length in index.docs.values())
+    _, total = index.search("equipe")
+    assert total == 0
+
+
+def test_hit_matches_uses_word_timestamps():
+    raw = {"words": [{"word": "le", "start": 0.0, "end": 0.2}, {"word": "budget", "start": 0.2, "end": 0.7}]}
+    assert hit_matches(raw, "le budget", [1]) == [{"offset": 1, "word": "budget", "start": 0.2, "end": 0.7}]
+    assert hit_matches(None, "le budget", [1]) == [{"offset": 1, "word": "budget", "start": None, "end": None}]
@@ -0,0 +1,83 @@
+# backend/tests/test_session_resume.py
+import asyncio
+
+from app.services.session_resume import ReplayBuffer, ResumeRegistry
+
+
+def session(meeting_id=1, user_id=7, token="tok"):
+    return {"session_id": "s1", "meeting_id": meeting_id, "user_id": user_id, "resume_token": token}
+
+
+def test_token_is_claimed_once_by_the_same_meeting_and_user():
+    registry = ResumeRegistry(grace_seconds=5)
+    expired = []
+
+    async def on_expire(item):
+        expired.append(item)
+
+    async def scenario():
+        parked = session()
+        registry.park(parked, on_expire)
+        assert registry.claim(None, 1, 7) is None
+        assert registry.claim("other", 1, 7) is None
+        # Wrong meeting or user: the token stays valid for its owner
+        assert registry.claim("tok", 2, 7) is None
+        assert registry.claim("tok", 1, 8) is None
+        assert registry.claim("tok", 1, 7) is parked
+        assert "resumed_after" in parked
+        assert registry.claim("tok", 1, 7) is None
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert expired == []
+    assert registry.stats()["resumed"] == 1 and registry.stats()["parked_now"] == 0
+
+
+def test_unclaimed_session_expires_after_the_grace_period():
+    registry = ResumeRegistry(grace_seconds=0.01)
+    expired = []
+
+    async def on_expire(item):
+        expired.append(item["session_id"])
+
+    async def scenario():
+        registry.park(session(), on_expire)
+        await asyncio.sleep(0.05)
+        assert registry.claim("tok", 1, 7) is None
+
+    asyncio.run(scenario())
+    assert expired == ["s1"]
+    assert registry.stats()["expired"] == 1
+
+
+def test_expire_meeting_finishes_only_that_meeting():
+    registry = ResumeRegistry(grace_seconds=5)
+    expired = []
+
+    async def on_expire(item):
+        expired.append(item["meeting_id"])
+
+    async def scenario():
+        registry.park(session(meeting_id=1, token="a"), on_expire)
+        registry.park(session(meeting_id=2, token="b"), on_expire)
+        registry.expire_meeting(1)
+        await asyncio.sleep(0)
+        assert registry.claim("b", 2, 7) is not None
+
+    asyncio.run(scenario())
+    assert expired == [1]
+
+
+def test_replay_buffer_keeps_the_latest_messages_in_order():
+    replay = ReplayBuffer(limit=3)
+
+    async def scenario():
+        await replay.send_text("a")
+        await replay.send_bytes(b"b")
+        await replay.send_text("c")
+        await replay.send_text("d")
+        await replay.close()
+
+    asyncio.run(scenario())
+    # The oldest message is dropped once the buffer is full
+    assert list(replay.messages) == [b"b", "c", "d"]
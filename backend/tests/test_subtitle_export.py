@@ -0,0 +1,71 @@
+# backend/tests/test_subtitle_export.py
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pymysql")
+
+from app.services import subtitle_export
+from app.services.subtitle_export import render_srt, render_text, render_vtt, split_cues, write_through
+
+
+def transcript(text, start=0.0, end=None, words=None, speaker=None):
+    return SimpleNamespace(
+        text=text, start_time=start, end_time=end, speaker=speaker,
+        raw_data={"words": words} if words is not None else None,
+    )
+
+
+def words(*items):
+    return [{"word": w, "start": s, "end": e} for w, s, e in items]
+
+
+def test_word_timings_split_on_pauses_and_duration():
+    row = transcript("bonjour à tous nous commençons", words=words(
+        ("bonjour", 0.0, 0.4), ("à", 0.4, 0.5), ("tous", 0.5, 0.9),
+        # A 2 s pause opens a new cue
+        ("nous", 2.9, 3.1), ("commençons", 3.1, 3.8),
+    ))
+    cues = list(split_cues(row))
+    assert [c.text for c in cues] == ["bonjour à tous", "nous commençons"]
+    assert (cues[0].start, cues[0].end) == (0.0, 0.9)
+
+    long_row = transcript("", words=words(*[(f"mot{i}", i * 0.5, i * 0.5 + 0.4) for i in range(20)]))
+    for cue in split_cues(long_row):
+        assert cue.end - cue.start <= subtitle_export.CUE_MAX_SECONDS
+
+
+def test_text_without_timings_is_spread_over_the_row():
+    text = " ".join(["parole"] * 40)
+    cues = list(split_cues(transcript(text, start=10.0, end=20.0)))
+    assert len(cues) > 1
+    assert cues[0].start == 10.0 and abs(cues[-1].end - 20.0) < 1e-9
+    for cue in cues:
+        assert len(cue.text) <= subtitle_export.CUE_LINE_CHARS * subtitle_export.CUE_MAX_LINES + 1
+
+
+def test_srt_vtt_and_text_rendering():
+    rows = [transcript("Q&A <demo>", start=3661.5, end=3662.0, speaker="Alice")]
+    srt = "".join(render_srt(rows))
+    assert srt == "1\n01:01:01,500 --> 01:01:02,200\nQ&A <demo>\n\n"
+    vtt = "".join(render_vtt(rows))
+    assert vtt == "WEBVTT\n\n01:01:01.500 --> 01:01:02.200\n<v Alice>Q&amp;A &lt;demo>\n\n"
+    assert "".join(render_text(rows)) == "[01:01:01] Alice: Q&A <demo>\n"
+
+
+def test_cache_is_published_only_for_complete_exports(tmp_path, monkeypatch):
+    monkeypatch.setattr(subtitle_export, "EXPORT_CACHE_DIR", str(tmp_path))
+    assert "".join(write_through(iter(["a", "b"]), 1, "srt", "2-5")) == "ab"
+    assert open(subtitle_export.cached_export(1, "srt", "2-5")).read() == "ab"
+
+    # Client gone mid-stream: nothing is published, the temp file is removed
+    stream = write_through(iter(["c", "d"]), 1, "srt", "3-6")
+    next(stream)
+    stream.close()
+    assert subtitle_export.cached_export(1, "srt", "3-6") is None
+
+    # A newer complete export replaces the older one
+    "".join(write_through(iter(["e"]), 1, "srt", "3-6"))
+    assert os.listdir(tmp_path) == ["meeting_1_3-6.srt"]
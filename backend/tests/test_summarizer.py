@@ -0,0 +1,111 @@
+# backend/tests/test_summarizer.py
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pymysql")
+pytest.importorskip("jose")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import meeting, meeting_participant, recording, summary, transcript, user  # noqa: F401
+from app.models.meeting import Meeting
+from app.models.summary import MeetingSummary
+from app.models.transcript import Transcript
+from app.services import summarizer as summarizer_module
+from app.services.summarizer import SENTENCE_MAX_WORDS, MeetingDigest, SummaryEngine
+
+BUDGET = "le budget marketing du projet doit augmenter pour la campagne de printemps"
+BUDGET_AGAIN = "le budget marketing du projet doit augmenter pour la campagne de printemps prochaine"
+ROADMAP = "la feuille de route technique du projet prévoit la migration des serveurs"
+CHATTER = "il fait beau aujourd'hui sur la terrasse du bâtiment principal"
+
+
+def test_long_utterances_are_split_with_proportional_times():
+    digest = MeetingDigest(1)
+    digest.add(" ".join(["mot"] * (SENTENCE_MAX_WORDS + 10)), start=0.0, end=8.0, speaker="alice")
+    assert [len(s.text.split()) for s in digest.sentences] == [20, 20]
+    assert [(s.start, s.end) for s in digest.sentences] == [(0.0, 4.0), (4.0, 8.0)]
+
+
+def test_action_items_are_detected_once_with_their_due_date():
+    digest = MeetingDigest(1)
+    digest.add("Il faut envoyer le devis avant vendredi", start=12.0, speaker="bob")
+    digest.add("Il faut envoyer le devis avant vendredi", start=20.0, speaker="bob")
+    digest.add("Nous avons parlé du temps", start=30.0)
+    assert len(digest.action_items) == 1
+    item = digest.action_items[0]
+    assert item["speaker"] == "bob" and item["start_time"] == 12.0
+    assert item["due"] == "vendredi"
+
+
+def test_summary_skips_redundant_sentences_and_keeps_meeting_order(monkeypatch):
+    monkeypatch.setattr(summarizer_module, "SUMMARY_RATIO", 1.0)
+    monkeypatch.setattr(summarizer_module, "SUMMARY_MAX_SENTENCES", 3)
+    digest = MeetingDigest(1)
+    for index, text in enumerate([ROADMAP, BUDGET, BUDGET_AGAIN, ROADMAP + " en juin", CHATTER]):
+        digest.add(text, start=index * 10.0, end=index * 10.0 + 5, speaker=f"s{index % 2}")
+    result = digest.summarize()
+
+    texts = [p["text"] for p in result["key_points"]]
+    # Near-duplicates are never selected together
+    assert not (BUDGET in texts and BUDGET_AGAIN in texts)
+    # Key points are ranked by score, the summary reads in meeting order
+    in_order = sorted(result["key_points"], key=lambda p: p["start_time"])
+    assert result["summary_text"] == " ".join(summarizer_module._sentence_case(p["text"]) for p in in_order)
+    assert result["total_speakers"] == 2
+    assert result["duration"] == 45.0
+
+
+def test_finalize_rebuilds_from_the_table_when_rows_were_missed(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(summarizer_module, "SessionLocal", Session)
+
+    db = Session()
+    db.add(Meeting(id=1, title="Point hebdo", owner_id=1, language="fr"))
+    for index, text in enumerate([BUDGET, ROADMAP, CHATTER]):
+        db.add(Transcript(meeting_id=1, text=text, start_time=index * 10.0, end_time=index * 10.0 + 5))
+    db.commit()
+    db.close()
+
+    summaries = SummaryEngine()
+    # This worker only saw the first final: the table has more
+    summaries.add({"meeting_id": 1, "text": BUDGET, "start_time": 0.0, "end_time": 5.0})
+    summary_id = summaries.finalize(1)
+    assert summary_id is not None and summaries.rebuilt == 1
+
+    db = Session()
+    row = db.get(MeetingSummary, summary_id)
+    assert row.total_words == sum(len(t.split()) for t in (BUDGET, ROADMAP, CHATTER))
+    assert row.model_used == summarizer_module.SUMMARY_MODEL
+    db.close()
+
+    # Regenerating updates the same row
+    assert summaries.finalize(1) == summary_id
+
+
+def test_finals_after_finalize_are_ignored_until_the_meeting_restarts(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(summarizer_module, "SessionLocal", Session)
+    db = Session()
+    db.add(Meeting(id=1, title="Point hebdo", owner_id=1, language="fr"))
+    db.commit()
+    db.close()
+
+    summaries = SummaryEngine()
+    summaries.add({"meeting_id": 1, "text": BUDGET, "start_time": 0.0})
+    summaries.finalize(1)
+    # A late final would otherwise leave a stale digest behind
+    summaries.add({"meeting_id": 1, "text": ROADMAP, "start_time": 10.0})
+    assert summaries.stats()["tracked_meetings"] == 0
+
+    summaries.reopen(1)
+    summaries.add({"meeting_id": 1, "text": ROADMAP, "start_time": 10.0})
+    assert summaries.stats()["tracked_meetings"] == 1
@@ -0,0 +1,86 @@
+# backend/tests/test_topic_stream.py
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.services import pubsub, topic_stream
+from app.services.topic_stream import TopicStreams, TopicWindow
+
+
+class RecordingBackend:
+    def __init__(self):
+        self.internal = []
+
+    async def publish(self, meeting_id, payload):
+        pass
+
+    async def publish_internal(self, meeting_id, payload):
+        self.internal.append(payload)
+
+
+def test_window_expires_on_meeting_time():
+    window = TopicWindow(1, window_seconds=60)
+    window.add("budget budget migration", at=10.0)
+    window.add("serveur serveur", at=50.0)
+    assert window.counts["budget"] == 2
+    window.add("serveur", at=75.0)
+    # The first final ended more than 60 s of meeting time before the latest one
+    assert "budget" not in window.counts
+    assert window.counts["serveur"] == 3
+
+
+def test_bigram_covers_its_terms():
+    window = TopicWindow(1)
+    window.add("base données base données base données", at=1.0)
+    assert [t["term"] for t in window.top()] == ["base données"]
+
+
+def test_rows_without_end_time_are_skipped():
+    streams = TopicStreams(origin="a")
+    streams.add({"meeting_id": 1, "text": "budget budget", "end_time": None})
+    assert streams.windows == {}
+
+
+def test_workers_merge_their_counts(monkeypatch):
+    monkeypatch.setattr(topic_stream, "TOPICS_INTERVAL_SECONDS", 0)
+    backend = RecordingBackend()
+    monkeypatch.setattr(pubsub, "broadcast_backend", backend)
+
+    async def scenario():
+        first, second = TopicStreams(origin="a"), TopicStreams(origin="b")
+        first.add({"meeting_id": 9, "text": "budget budget budget", "end_time": 5.0})
+        second.add({"meeting_id": 9, "text": "serveur serveur budget", "end_time": 6.0})
+        await asyncio.sleep(0)
+        for payload in list(backend.internal):
+            first.remember_remote(9, payload)
+            second.remember_remote(9, payload)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    first_topics = first.snapshot(9)["topics"]
+    assert first_topics == second.snapshot(9)["topics"]
+    counts = {t["term"]: t["count"] for t in first_topics}
+    assert counts == {"budget": 4, "serveur": 2}
+
+
+def test_final_after_meeting_end_does_not_recreate_a_window(monkeypatch):
+    monkeypatch.setattr(pubsub, "broadcast_backend", RecordingBackend())
+
+    async def scenario():
+        streams = TopicStreams(origin="a")
+        streams.add({"meeting_id": 3, "text": "budget budget", "end_time": 5.0})
+        streams.drop(3)
+        # The last utterance of a closing session is flushed after MEETING_ENDED
+        streams.add({"meeting_id": 3, "text": "budget serveur", "end_time": 9.0})
+        streams.remember_remote(3, {"type": "topic_counts", "origin": "b", "candidates": [["budget", 3, "budget"]]})
+        assert streams.windows == {}
+        assert streams.remote == {}
+
+        streams.reopen(3)
+        streams.add({"meeting_id": 3, "text": "budget budget", "end_time": 1.0})
+        assert 3 in streams.windows
+        streams.drop(3)
+
+    asyncio.run(scenario())
@@ -0,0 +1,75 @@
+# backend/tests/test_transcript_writer.py
+import asyncio
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pymysql")
+
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.services import transcript_writer as writer_module
+from app.services.transcript_writer import TranscriptWriteBehind, clean_row
+
+
+def row(meeting_id, text="bonjour"):
+    return {"meeting_id": meeting_id, "text": text, "speaker": "1", "language": "fr"}
+
+
+def writer_with(insert):
+    writer = TranscriptWriteBehind(batch_size=100)
+    written = []
+
+    def fake_insert(rows):
+        insert(rows)
+        written.extend(rows)
+
+    writer._insert = fake_insert
+    return writer, written
+
+
+def test_bad_row_is_isolated_and_dead_lettered():
+    def insert(rows):
+        if any(r["meeting_id"] == 404 for r in rows):
+            raise IntegrityError("INSERT", {}, Exception("foreign key"))
+
+    writer, written = writer_with(insert)
+    for meeting_id in (1, 2, 404, 3, 4):
+        writer.add(row(meeting_id))
+    asyncio.run(writer.flush())
+
+    assert sorted(r["meeting_id"] for r in written) == [1, 2, 3, 4]
+    assert writer.rows_rejected == 1
+    assert writer.dead_letters[0][0]["meeting_id"] == 404
+    assert writer._rows == []
+
+
+def test_unavailable_database_keeps_rows_queued():
+    def insert(rows):
+        raise OperationalError("INSERT", {}, Exception("gone away"))
+
+    writer, written = writer_with(insert)
+    for meeting_id in (1, 2, 3):
+        writer.add(row(meeting_id))
+    asyncio.run(writer.flush())
+
+    assert written == []
+    assert writer.rows_rejected == 0
+    assert [r["meeting_id"] for r in writer._rows] == [1, 2, 3]
+
+
+def test_queue_cap_drops_oldest_rows(monkeypatch):
+    monkeypatch.setattr(writer_module, "TRANSCRIPT_MAX_PENDING", 3)
+    writer = TranscriptWriteBehind(batch_size=100)
+    for meeting_id in range(5):
+        writer.add(row(meeting_id))
+    assert [r["meeting_id"] for r in writer._rows] == [2, 3, 4]
+    assert writer.rows_dropped == 2
+
+
+def test_clean_row_truncates_to_column_lengths():
+    cleaned = clean_row({"meeting_id": 1, "text": "x" * 100000, "speaker": "s" * 500, "language": "fr-FR-extended"})
+    assert len(cleaned["speaker"]) == 100
+    assert len(cleaned["language"]) == 10
+    assert len(cleaned["text"]) == writer_module.TRANSCRIPT_MAX_TEXT_CHARS
+    assert clean_row({"meeting_id": 1, "text": ""}) is None
@@ -0,0 +1,116 @@
+# backend/tests/test_transcription_jobs.py
+import asyncio
+import io
+import os
+import wave
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pymysql")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import meeting, meeting_participant, recording, summary, transcript, user  # noqa: F401
+from app.models.recording import AudioRecording
+from app.models.transcription_job import TranscriptionJob
+from app.services import transcription_jobs as jobs_module
+from app.services.transcription_jobs import (
+    JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JOB_STALE_SECONDS, TranscriptionJobQueue,
+)
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(jobs_module, "SessionLocal", factory)
+    return factory
+
+
+def add_stale_job(factory, attempts, max_attempts=3):
+    db = factory()
+    rec = AudioRecording(meeting_id=1, file_path="missing.wav", processing_status="processing")
+    db.add(rec)
+    db.flush()
+    heartbeat = datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS + 60)
+    job = TranscriptionJob(
+        recording_id=rec.id, meeting_id=1, status=JOB_RUNNING, attempts=attempts, max_attempts=max_attempts,
+        worker="host:1", heartbeat_at=heartbeat, available_at=heartbeat,
+    )
+    db.add(job)
+    db.commit()
+    job_id = job.id
+    db.close()
+    return job_id
+
+
+def test_stale_job_past_max_attempts_is_failed(session_factory):
+    job_id = add_stale_job(session_factory, attempts=3)
+    queue = TranscriptionJobQueue(workers=0)
+
+    assert queue._claim() is None
+
+    db = session_factory()
+    job = db.get(TranscriptionJob, job_id)
+    assert job.status == JOB_FAILED
+    assert "sans signe de vie" in job.error
+    assert job.recording.processing_status == "failed"
+    assert queue.failed == 1
+    db.close()
+
+
+def test_stale_job_with_attempts_left_is_requeued_with_backoff(session_factory):
+    job_id = add_stale_job(session_factory, attempts=1)
+    queue = TranscriptionJobQueue(workers=0)
+
+    # Not claimed right away: it waits for its retry delay like any failed attempt
+    assert queue._claim() is None
+
+    db = session_factory()
+    job = db.get(TranscriptionJob, job_id)
+    assert job.status == JOB_QUEUED
+    assert job.available_at > datetime.utcnow()
+    assert job.recording.processing_status == "pending"
+    db.close()
+
+
+def wav_bytes(frames):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(b"\x01\x00" * frames)
+    return buffer.getvalue()
+
+
+async def body(data, size):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def test_upload_is_streamed_to_disk_and_validated(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs_module, "UPLOADS_DIR", str(tmp_path))
+    monkeypatch.setattr(jobs_module, "UPLOAD_CHUNK_BYTES", 1000)
+    data = wav_bytes(1600)
+
+    path, size, layout = asyncio.run(jobs_module.store_upload(body(data, 300), 1, "../talk.wav"))
+    assert os.path.dirname(path) == str(tmp_path) and path.endswith("_talk.wav")
+    assert size == len(data) and layout.frames == 1600
+    assert open(path, "rb").read() == data
+
+    # Too large or not a WAV: rejected and nothing is left behind
+    monkeypatch.setattr(jobs_module, "UPLOAD_MAX_BYTES", 2000)
+    with pytest.raises(jobs_module.UploadRejected) as rejected:
+        asyncio.run(jobs_module.store_upload(body(data, 300), 1, "big.wav"))
+    assert rejected.value.status_code == 413
+    with pytest.raises(jobs_module.UploadRejected) as rejected:
+        asyncio.run(jobs_module.store_upload(body(b"not a wav file" * 10, 50), 1, "bad.wav"))
+    assert rejected.value.status_code == 400
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
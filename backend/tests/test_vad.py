@@ -0,0 +1,101 @@
+# backend/tests/test_vad.py
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.services import vad as vad_module
+from app.services.vad import SEGMENT_AUDIO, SEGMENT_END, SampleTimeline, VadGate
+
+
+RATE = 16000
+
+
+def noise(seconds, dbfs, seed=0):
+    rng = np.random.default_rng(seed)
+    std = 32768.0 * 10 ** (dbfs / 20)
+    return np.clip(rng.normal(0, std, int(RATE * seconds)), -32768, 32767).astype("<i2").tobytes()
+
+
+def tone(seconds, dbfs, freq=220.0):
+    t = np.arange(int(RATE * seconds)) / RATE
+    amplitude = 32768.0 * 10 ** (dbfs / 20) * np.sqrt(2)
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype("<i2").tobytes()
+
+
+def feed(gate, pcm, chunk_ms=200):
+    size = RATE * chunk_ms // 1000 * 2
+    segments = []
+    for i in range(0, len(pcm), size):
+        segments.extend(gate.process(pcm[i:i + size]))
+    return segments
+
+
+def decoded_seconds(segments):
+    return sum(len(s[1]) for s in segments if s[0] == SEGMENT_AUDIO) / 2 / RATE
+
+
+def test_noisy_room_is_gated_from_the_start():
+    gate = VadGate(RATE)
+    segments = feed(gate, noise(3.0, -30))
+    # Ambient noise well above VAD_MIN_DBFS + margin is recognised as background
+    assert decoded_seconds(segments) < 0.5
+    assert gate.noise_floor > -35
+
+
+def test_speech_over_noise_passes_and_ends():
+    gate = VadGate(RATE)
+    feed(gate, noise(1.0, -35, seed=1))
+    speech = feed(gate, tone(1.0, -10))
+    tail = feed(gate, noise(1.5, -35, seed=2))
+    assert decoded_seconds(speech) >= 0.9
+    assert any(s[0] == SEGMENT_END for s in tail)
+
+
+def test_floor_follows_a_room_that_gets_noisier():
+    gate = VadGate(RATE)
+    feed(gate, noise(1.0, -70, seed=3))
+    # Ventilation starts: the floor climbs at VAD_NOISE_RISE_DB per second, then the gate closes
+    feed(gate, noise(15.0, -40, seed=4))
+    later = feed(gate, noise(2.0, -40, seed=5))
+    assert decoded_seconds(later) < 0.5
+
+
+def test_timeline_maps_decoded_samples_back_to_the_stream():
+    timeline = SampleTimeline(RATE)
+    timeline.feed(RATE, 0)
+    # One second gated out by the VAD, then another second of speech
+    timeline.feed(RATE, 2 * RATE)
+    assert timeline.to_stream_seconds(0.5) == 0.5
+    assert timeline.to_stream_seconds(1.5) == 2.5
+    assert timeline.stream_seconds() == 3.0
+
+
+def reference_floor(energies, floor, rise):
+    floors = []
+    for energy in energies:
+        floor = energy if floor is None else min(energy, floor + rise)
+        floor = max(floor, vad_module.VAD_MIN_DBFS)
+        floors.append(floor)
+    return floors
+
+
+def test_vectorized_floor_matches_the_frame_recurrence():
+    rng = np.random.default_rng(3)
+    gate = VadGate(RATE)
+    floor = None
+    for _ in range(5):
+        energies = rng.uniform(-80, -10, 50)
+        expected = reference_floor(energies.tolist(), floor, gate.noise_rise)
+        assert np.allclose(gate._track_floor(energies), expected)
+        floor = expected[-1]
+        assert abs(gate.noise_floor - floor) < 1e-9
+
+
+def test_each_frame_is_counted_once_in_stats():
+    gate = VadGate(RATE)
+    pcm = noise(1.0, -70) + tone(1.0, -20) + noise(1.0, -70) + tone(0.5, -20)
+    segments = feed(gate, pcm)
+    decoded = sum(len(s[1]) for s in segments if s[0] == SEGMENT_AUDIO)
+    # Preroll frames are decoded: they leave the gated count
+    assert gate.decoded_bytes == decoded
+    assert gate.decoded_bytes + gate.gated_bytes == len(pcm)